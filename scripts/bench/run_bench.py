@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""Benchmarks for the orchestrator hot paths at 100 to 100k tasks, gated against a JSON baseline."""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import hashlib
+import itertools
+import json
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "pm"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "sim"))
+
+import dispatch_tasks
+import frontmatter_codec
+import on_pr_merged
+from common import append_event, flush_events, load_workers
+from dispatch_ledger import DispatchLedger
+from frontmatter_codec import parse_frontmatter, render_frontmatter
+from load_gen import generate_dag, issue_payload
+from task_graph import TaskGraph
+from task_snapshot import TaskSnapshotStore
+
+ROOT = Path(__file__).resolve().parents[2]
+BASELINE = Path(__file__).with_name("baseline.json")
+TIERS = [100, 1_000, 10_000, 100_000]
+DEFAULT_TIERS = [100, 1_000, 10_000]
+REPO = "bench/tasks"
+UPDATED_AT = "2026-01-01T00:00:00Z"
+_RUN_IDS = itertools.count(1)
+
+
+@dataclass
+class Fixture:
+    tasks: int
+    issues: list[dict[str, Any]]
+    root: Path
+
+
+def write_workers(tasks: int, root: Path) -> None:
+    """A worker pool that grows with the tier, so dispatch both places and defers tasks."""
+    workers = {
+        f"worker-{i:03d}": {
+            "label": f"worker/{i:03d}",
+            "task_types": ["IMPL", "DEBUG", "REVIEW", "INTEGRATION"],
+            "max_concurrency": 4,
+            "weight": 1 + i % 3,
+            "costs": {"INTEGRATION": 2},
+        }
+        for i in range(max(2, tasks // 20))
+    }
+    (root / "config" / "workers.yaml").write_text(yaml.safe_dump({"workers": workers}, sort_keys=True), encoding="utf-8")
+
+
+def make_fixture(tasks: int, root: Path, seed: int = 1) -> Fixture:
+    """A task DAG in mixed states: ~60% done, the rest ready, in progress or blocked.
+
+    Some blocked tasks already have all dependencies done, so unlock has work to do.
+    """
+    rng = random.Random(seed)
+    write_workers(tasks, root)
+    workers = sorted(load_workers(root))
+    specs = generate_dag(tasks, rng)
+    done: set[str] = set()
+    issues: list[dict[str, Any]] = []
+    for number, spec in enumerate(specs, start=1):
+        if rng.random() < 0.6:
+            spec["status"] = "done"
+            done.add(spec["task_id"])
+        elif all(dep in done for dep in spec["depends_on"]):
+            spec["status"] = rng.choices(["ready", "in_progress", "blocked"], [7, 2, 1])[0]
+        else:
+            spec["status"] = "blocked"
+        if spec["status"] in {"in_progress", "done"}:
+            spec["owner_worker"] = rng.choice(workers)
+        payload = issue_payload(spec)
+        issues.append(
+            {
+                "number": number,
+                "title": payload["title"],
+                "body": payload["body"],
+                "state": "closed" if spec["status"] == "done" else "open",
+                "updated_at": UPDATED_AT,
+                "html_url": f"https://github.com/{REPO}/issues/{number}",
+                "labels": [{"name": name} for name in payload["labels"]],
+                "recent_comments": [],
+            }
+        )
+    return Fixture(tasks, issues, root)
+
+
+def _echo_issue(repo: str, issue_number: int, *, title: str, body: str, labels: list[str], state: str | None = None, assignees: list[str] | None = None) -> dict[str, Any]:
+    return {"number": issue_number, "title": title, "body": body, "state": state or "open", "updated_at": UPDATED_AT, "labels": [{"name": x} for x in labels]}
+
+
+def _drop_comment(repo: str, issue_number: int, body: str) -> None:
+    return None
+
+
+def offline_writes() -> None:
+    """Answer issue writes in memory so only local work is measured."""
+    for module in (dispatch_tasks, on_pr_merged):
+        module.update_issue = _echo_issue  # type: ignore[attr-defined]
+        module.add_issue_comment = _drop_comment  # type: ignore[attr-defined]
+
+
+def _snapshot(fx: Fixture) -> TaskSnapshotStore:
+    snapshot = TaskSnapshotStore(fx.root, REPO)
+    snapshot.issues = {int(x["number"]): dict(x) for x in fx.issues}
+    return snapshot
+
+
+def _run_id() -> str:
+    """A new run (event log, dispatch ids) for every prepared benchmark run."""
+    return f"bench-{next(_RUN_IDS)}"
+
+
+# Each benchmark prepares untimed state and returns the callable that is timed.
+
+
+def bench_frontmatter_parse(fx: Fixture) -> Callable[[], Any]:
+    bodies = [x["body"] for x in fx.issues]
+    return lambda: [parse_frontmatter(body) for body in bodies]
+
+
+def bench_frontmatter_render(fx: Fixture) -> Callable[[], Any]:
+    parsed = [parse_frontmatter(x["body"]) for x in fx.issues]
+    return lambda: [render_frontmatter(meta, body) for meta, body in parsed]
+
+
+def bench_task_graph_build(fx: Fixture) -> Callable[[], Any]:
+    return lambda: TaskGraph.from_issues(fx.issues)
+
+
+def bench_deps_done(fx: Fixture) -> Callable[[], Any]:
+    graph = TaskGraph.from_issues(fx.issues)
+    nodes = list(graph.nodes.values())
+    return lambda: sum(graph.deps_done(node.depends_on) for node in nodes)
+
+
+def bench_critical_paths(fx: Fixture) -> Callable[[], Any]:
+    graph = TaskGraph.from_issues(fx.issues)
+    return graph.critical_paths
+
+
+def bench_unlock_ready(fx: Fixture) -> Callable[[], Any]:
+    snapshot, run_id = _snapshot(fx), _run_id()
+    return lambda: on_pr_merged._unlock_ready_tasks(REPO, run_id, fx.root, snapshot)
+
+
+def bench_dispatch_ready(fx: Fixture) -> Callable[[], Any]:
+    snapshot, run_id = _snapshot(fx), _run_id()
+    return lambda: dispatch_tasks.dispatch_ready(REPO, run_id, fx.root, snapshot, ledger=DispatchLedger(fx.root))
+
+
+def bench_append_event(fx: Fixture) -> Callable[[], Any]:
+    run_id = _run_id()
+
+    def run() -> None:
+        for i in range(fx.tasks):
+            append_event(fx.root, run_id, {"type": "dispatch", "repo": REPO, "entity": "issue", "id": i, "action": "assigned", "result": "ok"})
+        flush_events()
+
+    return run
+
+
+BENCHMARKS: dict[str, Callable[[Fixture], Callable[[], Any]]] = {
+    "frontmatter_parse": bench_frontmatter_parse,
+    "frontmatter_render": bench_frontmatter_render,
+    "task_graph_build": bench_task_graph_build,
+    "deps_done": bench_deps_done,
+    "critical_paths": bench_critical_paths,
+    "unlock_ready": bench_unlock_ready,
+    "dispatch_ready": bench_dispatch_ready,
+    "append_event": bench_append_event,
+}
+
+
+def measure(bench: Callable[[Fixture], Callable[[], Any]], fx: Fixture, repeat: int, min_time: float = 0.5, max_runs: int = 30) -> dict[str, Any]:
+    """Best and median wall time, then peak traced memory of one more run.
+
+    Runs at least `repeat` times and, for fast benchmarks, until `min_time`
+    seconds were sampled (at most `max_runs`), so small tiers are not decided
+    by a few noisy samples. The parse memo is cleared before every run, as in
+    a fresh PM process.
+    """
+    samples: list[float] = []
+    while len(samples) < repeat or (sum(samples) < min_time and len(samples) < max_runs):
+        run = bench(fx)
+        frontmatter_codec._memo.clear()
+        frontmatter_codec._scalars.clear()
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+    run = bench(fx)
+    frontmatter_codec._memo.clear()
+    frontmatter_codec._scalars.clear()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(min(samples), 6), "median": round(statistics.median(samples), 6), "peak_kb": round(peak / 1024, 1)}
+
+
+def calibrate(rounds: int = 5) -> float:
+    """Best time of a fixed pure-Python workload (JSON, dicts, hashing, sorting).
+
+    Timings are compared in units of this loop, so a uniformly slower or faster
+    machine than the one that recorded the baseline does not count as a change.
+    """
+    data = [{"id": i, "task_id": f"TASK-{i:05d}", "depends_on": [f"TASK-{i - 1:05d}"], "status": "ready"} for i in range(20_000)]
+    samples: list[float] = []
+    for _ in range(rounds):
+        gc.collect()
+        started = time.perf_counter()
+        parsed = json.loads(json.dumps(data))
+        index = {x["task_id"]: x for x in parsed}
+        sorted(index, key=lambda k: hashlib.sha1(k.encode("utf-8")).hexdigest())
+        samples.append(time.perf_counter() - started)
+    return round(min(samples), 6)
+
+
+def environment() -> dict[str, str]:
+    return {"python": "%d.%d" % sys.version_info[:2], "implementation": platform.python_implementation(), "machine": platform.machine()}
+
+
+def compare(
+    results: dict[str, dict[str, dict[str, Any]]],
+    baseline: dict[str, dict[str, dict[str, Any]]],
+    threshold: float,
+    memory_threshold: float,
+    min_delta: float = 0.005,
+    min_delta_kb: float = 256.0,
+    scale: float = 1.0,
+    small: float = 0.02,
+) -> list[dict[str, Any]]:
+    """Measurements slower or larger than the baseline by more than the thresholds.
+
+    Timings are multiplied by `scale` (baseline calibration over this run's)
+    first. Baselines under `small` seconds get twice the threshold, and
+    differences under `min_delta` seconds or `min_delta_kb` are treated as noise.
+    """
+    regressions: list[dict[str, Any]] = []
+    for name, tiers in results.items():
+        for tier, now in tiers.items():
+            base = (baseline.get(name) or {}).get(tier)
+            if not base:
+                continue
+            seconds = now["seconds"] * scale
+            allowed = threshold * (2 if base["seconds"] < small else 1)
+            if seconds > base["seconds"] * allowed and seconds - base["seconds"] > min_delta:
+                regressions.append({"bench": name, "tasks": int(tier), "metric": "seconds", "baseline": base["seconds"], "now": round(seconds, 6), "ratio": round(seconds / base["seconds"], 2)})
+            if now["peak_kb"] > base["peak_kb"] * memory_threshold and now["peak_kb"] - base["peak_kb"] > min_delta_kb:
+                regressions.append({"bench": name, "tasks": int(tier), "metric": "peak_kb", "baseline": base["peak_kb"], "now": now["peak_kb"], "ratio": round(now["peak_kb"] / base["peak_kb"], 2)})
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tiers", default=",".join(map(str, DEFAULT_TIERS)), help=f"Comma-separated task counts (known tiers: {TIERS}).")
+    parser.add_argument("--only", default="", help=f"Comma-separated benchmarks (default: all of {', '.join(BENCHMARKS)}).")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", default=str(BASELINE))
+    parser.add_argument("--check", action="store_true", help="Exit 1 if a measurement regressed against the baseline.")
+    parser.add_argument("--update", action="store_true", help="Merge these results into the baseline file.")
+    parser.add_argument("--threshold", type=float, default=1.5, help="Allowed slowdown factor.")
+    parser.add_argument("--memory-threshold", type=float, default=1.5, help="Allowed peak-memory growth factor.")
+    parser.add_argument("--confirm", type=int, default=2, help="With --check, re-measure regressions this many times before reporting them.")
+    parser.add_argument("--out", default="", help="Also write the report JSON here.")
+    args = parser.parse_args()
+
+    tiers = [int(x) for x in args.tiers.split(",") if x.strip()]
+    names = [x for x in args.only.split(",") if x] or list(BENCHMARKS)
+    unknown = sorted(set(names) - set(BENCHMARKS))
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    baseline_path = Path(args.baseline)
+    try:
+        stored = json.loads(baseline_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        stored = {"version": 1, "env": environment(), "results": {}}
+
+    offline_writes()
+    calibrations: list[float] = []
+    results: dict[str, dict[str, dict[str, Any]]] = {name: {} for name in names}
+    regressions: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="orchestrator-bench-") as tmp:
+        root = Path(tmp)
+        shutil.copytree(ROOT / "config", root / "config")
+
+        def run(name: str, fx: Fixture) -> dict[str, Any]:
+            # Calibrating next to every benchmark follows the machine's speed through the run.
+            calibrations.append(calibrate(rounds=3))
+            measured = measure(BENCHMARKS[name], fx, args.repeat)
+            print(f"{name:>20} {fx.tasks:>7} tasks  {measured['seconds']:>10.4f}s  {measured['peak_kb']:>10.1f} KB", file=sys.stderr)
+            return measured
+
+        for tier in tiers:
+            fx = make_fixture(tier, root, args.seed)
+            for name in names:
+                results[name][str(tier)] = run(name, fx)
+
+        calibration = round(statistics.median(calibrations), 6)
+        scale = float(stored.get("calibration") or calibration) / calibration
+        if args.check:
+            if stored.get("env") != environment():
+                print(f"baseline was recorded on {stored.get('env')}, this is {environment()}", file=sys.stderr)
+            regressions = compare(results, stored.get("results") or {}, args.threshold, args.memory_threshold, scale=scale)
+            # A regression must reproduce: re-measure and keep the better result, up to --confirm times.
+            for _ in range(args.confirm):
+                if not regressions:
+                    break
+                for tier in sorted({r["tasks"] for r in regressions}):
+                    fx = make_fixture(tier, root, args.seed)
+                    for name in sorted({r["bench"] for r in regressions if r["tasks"] == tier}):
+                        again, best = run(name, fx), results[name][str(tier)]
+                        results[name][str(tier)] = {**min(best, again, key=lambda m: m["seconds"]), "peak_kb": min(best["peak_kb"], again["peak_kb"])}
+                regressions = compare(results, stored.get("results") or {}, args.threshold, args.memory_threshold, scale=scale)
+
+    print(f"{'calibration':>20} {'':>13}  {calibration:>10.4f}s", file=sys.stderr)
+    if args.update:
+        # Results measured now are stored in the baseline's calibration units.
+        for name, measured in results.items():
+            for tier, now in measured.items():
+                stored["results"].setdefault(name, {})[tier] = {**now, "seconds": round(now["seconds"] * scale, 6), "median": round(now["median"] * scale, 6)}
+        stored.setdefault("calibration", calibration)
+        stored["env"] = environment()
+        baseline_path.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+    report = {"ok": not regressions, "env": environment(), "calibration": calibration, "scale": round(scale, 3), "results": results, "regressions": regressions}
+    text = json.dumps(report, ensure_ascii=False)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
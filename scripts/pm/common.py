@@ -4,23 +4,73 @@
 from __future__ import annotations
 
 import argparse
+import atexit
 import datetime as dt
+import fnmatch
+import gzip
 import hashlib
+import http.client
 import json
 import os
 import re
 import subprocess
 import sys
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
 import yaml
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None  # type: ignore[assignment]
+
+from frontmatter_codec import Loader, parse_frontmatter, render_frontmatter
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+GH_API_BACKEND = os.getenv("GH_API_BACKEND", "auto").strip().lower()
+GH_API_TIMEOUT = float(os.getenv("GH_API_TIMEOUT", "30"))
+GH_API_CACHE = os.getenv("GH_API_CACHE", "true").strip().lower() not in {"0", "false", "off", "no"}
+GH_API_CACHE_DIR = os.getenv("GH_API_CACHE_DIR", "").strip()
+GH_API_CACHE_MAX_MB = float(os.getenv("GH_API_CACHE_MAX_MB", "64"))
+GH_API_CACHE_EXCLUDE = [x.strip() for x in os.getenv("GH_API_CACHE_EXCLUDE", "").split(",") if x.strip()]
+GH_WRITE_CONCURRENCY = int(os.getenv("GH_WRITE_CONCURRENCY", "4"))
+GH_WRITE_RETRIES = int(os.getenv("GH_WRITE_RETRIES", "2"))
+GH_RATE_READ_RESERVE = int(os.getenv("GH_RATE_READ_RESERVE", "100"))
+GH_RATE_PACE_BELOW = float(os.getenv("GH_RATE_PACE_BELOW", "0.1"))
+GH_RATE_MAX_WAIT = float(os.getenv("GH_RATE_MAX_WAIT", "3600"))
+EVENT_LOG_BATCH = int(os.getenv("EVENT_LOG_BATCH", "64"))
+EVENT_LOG_FLUSH_SECONDS = float(os.getenv("EVENT_LOG_FLUSH_SECONDS", "1"))
+EVENT_LOG_FSYNC = os.getenv("EVENT_LOG_FSYNC", "true").strip().lower() not in {"0", "false", "off", "no"}
+EVENT_LOG_MAX_MB = float(os.getenv("EVENT_LOG_MAX_MB", "16"))
+
 
 def now_iso() -> str:
     return dt.datetime.now(dt.timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
+def iso_ago(delta: dt.timedelta) -> str:
+    return (dt.datetime.now(dt.timezone.utc) - delta).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def parse_iso(raw: Any) -> dt.datetime | None:
+    try:
+        return dt.datetime.fromisoformat(str(raw).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
 def run_cmd(argv: list[str], cwd: Path | None = None, input_text: str | None = None) -> tuple[int, str, str]:
     proc = subprocess.run(
         argv,
@@ -33,50 +83,537 @@ def run_cmd(argv: list[str], cwd: Path | None = None, input_text: str | None = N
     return proc.returncode, proc.stdout, proc.stderr
 
 
-def gh_api(path: str, method: str = "GET", payload: dict[str, Any] | None = None) -> Any:
-    argv = ["gh", "api", "-X", method, path]
-    input_text = None
-    if payload is not None:
-        argv.extend(["--input", "-"])
-        input_text = json.dumps(payload)
-    code, out, err = run_cmd(argv, input_text=input_text)
-    if code != 0:
-        raise RuntimeError(f"gh api failed ({method} {path}): {err.strip() or out.strip()}")
-    out = out.strip()
-    if not out:
+class GitHubAPIError(RuntimeError):
+    def __init__(self, method: str, path: str, status: int, message: str, headers: dict[str, str] | None = None) -> None:
+        super().__init__(f"gh api failed ({method} {path}): {message}")
+        self.method = method
+        self.path = path
+        self.status = status
+        self.headers = headers or {}
+
+
+class TransportError(RuntimeError):
+    """No HTTP response was received; `sent` tells whether the request may have reached GitHub."""
+
+    def __init__(self, method: str, path: str, message: str, *, sent: bool) -> None:
+        super().__init__(f"gh api failed ({method} {path}): {message}")
+        self.method = method
+        self.path = path
+        self.sent = sent
+
+
+@dataclass
+class ApiResponse:
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    data: Any = None
+
+
+def _api_path(path: str) -> str:
+    """Normalize `gh api` style endpoints and absolute API URLs to `/path?query`."""
+    path = path.strip()
+    if path.startswith(("http://", "https://")):
+        parts = urllib.parse.urlsplit(path)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        base_path = urllib.parse.urlsplit(GITHUB_API_URL).path.rstrip("/")
+        if base_path and path.startswith(base_path + "/"):
+            path = path[len(base_path) :]
+    return "/" + path.lstrip("/")
+
+
+def _decode_body(text: str) -> Any:
+    text = text.strip()
+    if not text:
         return None
     try:
-        return json.loads(out)
+        return json.loads(text)
     except json.JSONDecodeError:
+        return text
+
+
+def _error_message(data: Any, fallback: str) -> str:
+    if isinstance(data, dict) and data.get("message"):
+        return str(data["message"])
+    return fallback.strip() or "unknown error"
+
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD"})
+
+
+class HttpBackend:
+    """Keep-alive HTTPS transport; idle connections are pooled and reused across threads."""
+
+    name = "http"
+
+    def __init__(self, token: str, base_url: str = GITHUB_API_URL, timeout: float = GH_API_TIMEOUT, max_idle: int = 8) -> None:
+        parts = urllib.parse.urlsplit(base_url)
+        self._https = parts.scheme != "http"
+        self._host = parts.hostname or "api.github.com"
+        self._port = parts.port
+        self._prefix = parts.path.rstrip("/")
+        self._timeout = timeout
+        self._max_idle = max_idle
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._headers = {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {token}",
+            "User-Agent": "wfkit-pm",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._https:
+            return http.client.HTTPSConnection(self._host, self._port, timeout=self._timeout)
+        return http.client.HTTPConnection(self._host, self._port, timeout=self._timeout)
+
+    def _acquire(self) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connect(), False
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self._max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def send(self, method: str, path: str, body: str | None, headers: dict[str, str]) -> tuple[int, dict[str, str], str]:
+        url = self._prefix + path
+        all_headers = {**self._headers, **headers}
+        data = body.encode("utf-8") if body is not None else None
+        if data is not None:
+            all_headers["Content-Type"] = "application/json"
+        while True:
+            conn, reused = self._acquire()
+            sent = False
+            try:
+                conn.request(method, url, body=data, headers=all_headers)
+                sent = True
+                resp = conn.getresponse()
+                raw = resp.read()
+            except (http.client.HTTPException, OSError) as exc:
+                conn.close()
+                # A pooled connection may have been closed by the server while idle; retry fresh.
+                # Once a write is sent it may have been applied, so only reads are repeated here.
+                if reused and (not sent or method in IDEMPOTENT_METHODS):
+                    continue
+                raise TransportError(method, path, str(exc), sent=sent) from exc
+            resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return resp.status, resp_headers, raw.decode("utf-8", errors="replace")
+
+
+class GhCliBackend:
+    """Fallback transport that shells out to `gh api -i` for every request."""
+
+    name = "gh"
+
+    def close(self) -> None:
+        return None
+
+    def send(self, method: str, path: str, body: str | None, headers: dict[str, str]) -> tuple[int, dict[str, str], str]:
+        argv = ["gh", "api", "-i", "-X", method, path.lstrip("/")]
+        for key, value in headers.items():
+            argv.extend(["-H", f"{key}: {value}"])
+        if body is not None:
+            argv.extend(["--input", "-"])
+        code, out, err = run_cmd(argv, input_text=body)
+        head, _, text = out.replace("\r\n", "\n").partition("\n\n")
+        lines = head.splitlines()
+        if not lines or not lines[0].startswith("HTTP/"):
+            raise RuntimeError(f"gh api failed ({method} {path}): {err.strip() or out.strip()}")
+        status = int(lines[0].split()[1])
+        resp_headers: dict[str, str] = {}
+        for line in lines[1:]:
+            key, _, value = line.partition(":")
+            resp_headers[key.strip().lower()] = value.strip()
+        if code != 0 and status < 400 and status != 304:
+            raise RuntimeError(f"gh api failed ({method} {path}): {err.strip() or out.strip()}")
+        return status, resp_headers, text
+
+
+def _resolve_token() -> str:
+    for key in ("GH_TOKEN", "GITHUB_TOKEN"):
+        value = os.getenv(key, "").strip()
+        if value:
+            return value
+    try:
+        code, out, _ = run_cmd(["gh", "auth", "token"])
+    except OSError:
+        return ""
+    return out.strip() if code == 0 else ""
+
+
+class ResponseCache:
+    """On-disk store of GET responses revalidated with If-None-Match / If-Modified-Since.
+
+    Entries are keyed by request URL; the least recently used ones are evicted once the
+    directory grows past `max_bytes`. Paths matching an `exclude` glob are never cached.
+    """
+
+    KEPT_HEADERS = ("etag", "last-modified", "link")
+
+    def __init__(self, directory: Path, max_bytes: int, exclude: list[str] | None = None) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.exclude = exclude or []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._index: OrderedDict[str, int] | None = None
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def enabled_for(self, path: str) -> bool:
+        endpoint = path.lstrip("/").split("?", 1)[0]
+        return not any(fnmatch.fnmatchcase(endpoint, pattern) for pattern in self.exclude)
+
+    def _file(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def _load_index(self) -> OrderedDict[str, int]:
+        if self._index is None:
+            entries: list[tuple[float, str, int]] = []
+            if self.directory.is_dir():
+                for item in os.scandir(self.directory):
+                    if item.name.endswith(".json"):
+                        st = item.stat()
+                        entries.append((st.st_mtime, item.name, st.st_size))
+            entries.sort()
+            self._index = OrderedDict((name, size) for _, name, size in entries)
+            self._total = sum(size for _, _, size in entries)
+        return self._index
+
+    def lookup(self, url: str) -> dict[str, Any] | None:
+        path = self._file(url)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not isinstance(entry, dict) or entry.get("url") != url:
+            return None
+        return entry
+
+    @staticmethod
+    def validators(entry: dict[str, Any]) -> dict[str, str]:
+        headers = entry.get("headers") or {}
+        out: dict[str, str] = {}
+        if headers.get("etag"):
+            out["If-None-Match"] = headers["etag"]
+        if headers.get("last-modified"):
+            out["If-Modified-Since"] = headers["last-modified"]
         return out
 
+    def hit(self, url: str) -> None:
+        path = self._file(url)
+        with self._lock:
+            self.hits += 1
+            index = self._load_index()
+            if path.name in index:
+                index.move_to_end(path.name)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def store(self, url: str, headers: dict[str, str], data: Any) -> None:
+        with self._lock:
+            self.misses += 1
+        kept = {k: headers[k] for k in self.KEPT_HEADERS if k in headers}
+        if "etag" not in kept and "last-modified" not in kept:
+            return
+        text = json.dumps({"url": url, "headers": kept, "data": data}, ensure_ascii=False)
+        path = self._file(url)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            return
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            index = self._load_index()
+            self._total += size - index.pop(path.name, 0)
+            index[path.name] = size
+            while self._total > self.max_bytes and len(index) > 1:
+                name, old_size = index.popitem(last=False)
+                self._total -= old_size
+                self.evictions += 1
+                try:
+                    (self.directory / name).unlink()
+                except OSError:
+                    pass
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+@dataclass
+class RateBucket:
+    limit: int = 0
+    remaining: int = -1
+    reset: float = 0.0
+
+
+def _resource_for(api_path: str) -> str:
+    if api_path.startswith("/graphql"):
+        return "graphql"
+    if api_path.startswith("/search/"):
+        return "search"
+    return "core"
+
+
+class RateGovernor:
+    """Shared pacing for all GitHub traffic, driven by the rate-limit response headers.
+
+    Each resource (core, graphql, search) is a token bucket refilled at its reset
+    time. Reads stop `read_reserve` requests short of empty so writes can still
+    land; below `pace_below` of the limit the remaining budget is spread evenly
+    until reset. 403/429 rate-limit replies block every thread for `Retry-After`,
+    until the reset, or with doubling backoff for secondary limits.
+    """
+
+    def __init__(
+        self,
+        read_reserve: int = GH_RATE_READ_RESERVE,
+        pace_below: float = GH_RATE_PACE_BELOW,
+        max_wait: float = GH_RATE_MAX_WAIT,
+    ) -> None:
+        self.read_reserve = read_reserve
+        self.pace_below = pace_below
+        self.max_wait = max_wait
+        self.waited = 0.0
+        self.throttled = 0
+        self._buckets: dict[str, RateBucket] = {}
+        self._next_slot: dict[str, float] = {}
+        self._blocked_until = 0.0
+        self._penalty = 0.0
+        self._lock = threading.Lock()
+
+    def _sleep(self, seconds: float) -> None:
+        with self._lock:
+            self.waited += seconds
+        time.sleep(seconds)
+
+    def acquire(self, resource: str, write: bool) -> None:
+        while True:
+            with self._lock:
+                now = time.time()
+                bucket = self._buckets.get(resource)
+                wait = self._blocked_until - now
+                paced = False
+                if wait <= 0 and bucket is not None and bucket.remaining >= 0 and now < bucket.reset:
+                    floor = 0 if write else self.read_reserve
+                    if bucket.remaining <= floor:
+                        wait = bucket.reset - now + 1
+                    elif bucket.remaining < bucket.limit * self.pace_below:
+                        interval = (bucket.reset - now) / (bucket.remaining - floor)
+                        slot = max(now, self._next_slot.get(resource, 0.0))
+                        self._next_slot[resource] = slot + interval
+                        wait, paced = slot - now, True
+                if wait <= 0 or paced:
+                    if bucket is not None and bucket.remaining > 0:
+                        bucket.remaining -= 1
+                if wait > self.max_wait:
+                    raise RuntimeError(f"GitHub {resource} rate limit exhausted; next request possible in {int(wait)}s")
+            if wait <= 0:
+                return
+            self._sleep(wait)
+            if paced:
+                return
+
+    def observe(self, resource: str, status: int, headers: dict[str, str], text: str) -> float | None:
+        """Record rate-limit headers; return seconds to wait before retrying a throttled request."""
+        with self._lock:
+            now = time.time()
+            if "x-ratelimit-remaining" in headers:
+                bucket = self._buckets.setdefault(resource, RateBucket())
+                bucket.remaining = int(headers["x-ratelimit-remaining"])
+                bucket.limit = int(headers.get("x-ratelimit-limit") or bucket.limit)
+                bucket.reset = float(headers.get("x-ratelimit-reset") or bucket.reset)
+            remaining = headers.get("x-ratelimit-remaining")
+            limited = status == 429 or (
+                status == 403 and ("retry-after" in headers or remaining == "0" or "rate limit" in text.lower())
+            )
+            if not limited:
+                self._penalty = 0.0
+                return None
+            self.throttled += 1
+            if headers.get("retry-after", "").isdigit():
+                wait = float(headers["retry-after"])
+            elif remaining == "0" and headers.get("x-ratelimit-reset"):
+                wait = max(1.0, float(headers["x-ratelimit-reset"]) - now + 1)
+            else:
+                # Secondary limit without guidance: wait at least a minute, doubling each time.
+                self._penalty = min(max(60.0, self._penalty * 2), 900.0)
+                wait = self._penalty
+            self._blocked_until = max(self._blocked_until, now + wait)
+            return wait
+
+    def budget(self) -> dict[str, Any]:
+        with self._lock:
+            out: dict[str, Any] = {
+                resource: {
+                    "limit": b.limit,
+                    "remaining": b.remaining,
+                    "reset": dt.datetime.fromtimestamp(b.reset, dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ") if b.reset else "",
+                }
+                for resource, b in sorted(self._buckets.items())
+            }
+            out["throttled"] = self.throttled
+            out["waited_s"] = round(self.waited, 1)
+            return out
+
+
+class GitHubClient:
+    """REST client shared by the PM scripts; one instance (and connection pool) per process."""
+
+    def __init__(
+        self,
+        backend: HttpBackend | GhCliBackend,
+        cache: ResponseCache | None = None,
+        governor: RateGovernor | None = None,
+    ) -> None:
+        self.backend = backend
+        self.cache = cache
+        self.governor = governor or RateGovernor()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        payload: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        cache: bool = True,
+    ) -> ApiResponse:
+        method = method.upper()
+        api_path = _api_path(path)
+        body = json.dumps(payload) if payload is not None else None
+        resource = _resource_for(api_path)
+        if resource == "graphql":
+            write = str((payload or {}).get("query") or "").lstrip().startswith("mutation")
+        else:
+            write = method != "GET"
+        store = self.cache if cache and method == "GET" and self.cache and self.cache.enabled_for(api_path) else None
+        entry = store.lookup(api_path) if store else None
+        req_headers = {**(ResponseCache.validators(entry) if entry else {}), **(headers or {})}
+        waited = 0.0
+        while True:
+            self.governor.acquire(resource, write)
+            status, resp_headers, text = self.backend.send(method, api_path, body, req_headers)
+            wait = self.governor.observe(resource, status, resp_headers, text)
+            if wait is None or waited + wait > self.governor.max_wait:
+                break
+            waited += wait
+            self.governor._sleep(wait)
+        if status == 304 and store and entry:
+            store.hit(api_path)
+            return ApiResponse(status=status, headers={**entry.get("headers", {}), **resp_headers}, data=entry.get("data"))
+        data = _decode_body(text)
+        if status >= 400:
+            raise GitHubAPIError(method, path, status, _error_message(data, text), resp_headers)
+        if store and status == 200:
+            store.store(api_path, resp_headers, data)
+        return ApiResponse(status=status, headers=resp_headers, data=data)
+
+    def cache_stats(self) -> dict[str, int]:
+        if self.cache is None:
+            return {"hits": 0, "misses": 0, "evictions": 0}
+        return self.cache.stats()
+
+    def rate_budget(self) -> dict[str, Any]:
+        return self.governor.budget()
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+_CLIENT: GitHubClient | None = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def make_backend(kind: str = GH_API_BACKEND) -> HttpBackend | GhCliBackend:
+    if kind == "gh":
+        return GhCliBackend()
+    token = _resolve_token()
+    if token:
+        return HttpBackend(token)
+    if kind == "http":
+        raise RuntimeError("GH_API_BACKEND=http requires GH_TOKEN or GITHUB_TOKEN")
+    return GhCliBackend()
+
+
+def make_cache() -> ResponseCache | None:
+    if not GH_API_CACHE:
+        return None
+    directory = Path(GH_API_CACHE_DIR) if GH_API_CACHE_DIR else Path(__file__).resolve().parents[2] / "state" / "cache" / "http"
+    return ResponseCache(directory, int(GH_API_CACHE_MAX_MB * 1024 * 1024), GH_API_CACHE_EXCLUDE)
 
-def parse_frontmatter(markdown: str) -> tuple[dict[str, Any], str]:
-    text = markdown or ""
-    lines = text.splitlines()
-    if len(lines) < 3 or lines[0].strip() != "---":
-        return {}, text
-    end = None
-    for idx in range(1, len(lines)):
-        if lines[idx].strip() == "---":
-            end = idx
-            break
-    if end is None:
-        return {}, text
-    raw = "\n".join(lines[1:end]).strip()
-    body = "\n".join(lines[end + 1 :]).lstrip("\n")
-    data = yaml.safe_load(raw) if raw else {}
-    if not isinstance(data, dict):
-        data = {}
-    return data, body
+
+def get_client() -> GitHubClient:
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = GitHubClient(make_backend(), make_cache())
+        return _CLIENT
+
+
+def gh_api(path: str, method: str = "GET", payload: dict[str, Any] | None = None) -> Any:
+    return get_client().request(method, path, payload).data
 
 
-def render_frontmatter(meta: dict[str, Any], body: str) -> str:
-    yaml_text = yaml.safe_dump(meta, sort_keys=False, allow_unicode=False).strip()
-    body = (body or "").strip()
-    if body:
-        return f"---\n{yaml_text}\n---\n\n{body}\n"
-    return f"---\n{yaml_text}\n---\n"
+def _next_link(link_header: str) -> str | None:
+    for part in link_header.split(","):
+        url, *params = part.split(";")
+        if any(p.strip() == 'rel="next"' for p in params):
+            return url.strip().strip("<>")
+    return None
+
+
+def gh_paginate(path: str, prefetch: bool = True) -> Iterator[Any]:
+    """Yield list items page by page, following `Link: rel=next`.
+
+    Only the current page and (with `prefetch`) the next one are held in memory;
+    the next page is requested in the background while the current one is consumed.
+    """
+    client = get_client()
+    pool = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        resp = client.request("GET", path)
+        while True:
+            if not isinstance(resp.data, list):
+                raise RuntimeError(f"paginated response must be a JSON array: {path}")
+            next_url = _next_link(resp.headers.get("link", ""))
+            pending = pool.submit(client.request, "GET", next_url) if pool and next_url else None
+            yield from resp.data
+            if not next_url:
+                return
+            resp = pending.result() if pending else client.request("GET", next_url)
+    finally:
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_task_issues(repo: str, state: str = "all", since: str | None = None) -> Iterator[dict[str, Any]]:
+    path = f"repos/{repo}/issues?state={state}&labels=type/task&per_page=100"
+    if since:
+        path += f"&since={urllib.parse.quote(since)}"
+    for item in gh_paginate(path):
+        if isinstance(item, dict) and "pull_request" not in item:
+            yield item
 
 
 def marker_from_task_id(task_id: str) -> str:
@@ -101,11 +638,176 @@ def ensure_event_log(root: Path, run_id: str) -> Path:
     return path
 
 
+_SEGMENT_RE = re.compile(r"^events-(\d+)\.jsonl\.gz$")
+
+
+def event_log_files(run_dir: Path) -> list[Path]:
+    """Rotated segments of a run (oldest first) followed by the live `events.jsonl`."""
+    segments = sorted(
+        (int(m.group(1)), p) for p in run_dir.glob("events-*.jsonl.gz") if (m := _SEGMENT_RE.match(p.name))
+    )
+    files = [p for _, p in segments]
+    live = run_dir / "events.jsonl"
+    if live.exists():
+        files.append(live)
+    return files
+
+
+def log_identity(f: Any) -> str:
+    """Device, inode and first complete line of an open live event log.
+
+    A rotation unlinks `events.jsonl` and a new one is created, possibly on the
+    same inode; its first event still differs, so readers resuming from a
+    stored offset can tell the file was replaced.
+    """
+    st = os.fstat(f.fileno())
+    f.seek(0)
+    head = f.readline()
+    if not head.endswith(b"\n"):
+        head = b""
+    return f"{st.st_dev}:{st.st_ino}:{hashlib.sha1(head).hexdigest()[:16]}"
+
+
+class EventSink:
+    """Append-only writer for one run's `events.jsonl`.
+
+    Events are buffered and written as one locked append once `batch` events are
+    pending, `flush_seconds` after the oldest pending one (a background timer
+    flushes an idle sink), or on `flush()`/`close()` (and at exit);
+    with `fsync` every flush is synced to disk. When the live file grows past
+    `max_bytes` it is rotated to a gzip segment `events-N.jsonl.gz`. Writers in
+    other processes coordinate through `events.lock` and reopen after a rotation.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        batch: int = EVENT_LOG_BATCH,
+        flush_seconds: float = EVENT_LOG_FLUSH_SECONDS,
+        fsync: bool = EVENT_LOG_FSYNC,
+        max_bytes: int = int(EVENT_LOG_MAX_MB * 1024 * 1024),
+    ) -> None:
+        self.path = path
+        self.batch = batch
+        self.flush_seconds = flush_seconds
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self._pending: list[bytes] = []
+        self._last_flush = time.monotonic()
+        self._fd: int | None = None
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock_fd = os.open(path.parent / "events.lock", os.O_RDWR | os.O_CREAT, 0o644)
+
+    def append(self, record: dict[str, Any]) -> None:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            self._pending.append(line)
+            due = len(self._pending) >= self.batch or time.monotonic() - self._last_flush >= self.flush_seconds
+            if not due and self._timer is None and self.flush_seconds > 0:
+                self._timer = threading.Timer(self.flush_seconds, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def _timed_flush(self) -> None:
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except OSError as exc:
+            print(f"event log flush failed: {exc}", file=sys.stderr)
+
+    def _open(self) -> int:
+        if self._fd is not None:
+            try:
+                if os.fstat(self._fd).st_ino == os.stat(self.path).st_ino:
+                    return self._fd
+            except FileNotFoundError:
+                pass
+            os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        return self._fd
+
+    def _rotate(self) -> None:
+        segments = [int(m.group(1)) for p in self.path.parent.iterdir() if (m := _SEGMENT_RE.match(p.name))]
+        target = self.path.with_name(f"events-{max(segments, default=0) + 1}.jsonl.gz")
+        tmp = target.with_name(f"{target.name}.tmp")
+        with self.path.open("rb") as src, gzip.open(tmp, "wb") as dst:
+            while chunk := src.read(1 << 20):
+                dst.write(chunk)
+        os.replace(tmp, target)
+        self.path.unlink()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._pending:
+                return
+            data = b"".join(self._pending)
+            self._pending.clear()
+            self._last_flush = time.monotonic()
+            if fcntl is not None:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                fd = self._open()
+                os.write(fd, data)
+                if self.fsync:
+                    os.fsync(fd)
+                if self.max_bytes > 0 and os.fstat(fd).st_size >= self.max_bytes:
+                    self._rotate()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        self.flush()
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            if self._lock_fd >= 0:
+                os.close(self._lock_fd)
+                self._lock_fd = -1
+
+
+_SINKS: dict[Path, EventSink] = {}
+_SINKS_LOCK = threading.Lock()
+
+
+def event_sink(root: Path, run_id: str) -> EventSink:
+    path = root / "state" / "runs" / run_id / "events.jsonl"
+    with _SINKS_LOCK:
+        sink = _SINKS.get(path)
+        if sink is None:
+            sink = _SINKS[path] = EventSink(path)
+        return sink
+
+
+def flush_events() -> None:
+    """Write out every buffered event; call at the end of each completed phase."""
+    with _SINKS_LOCK:
+        sinks = list(_SINKS.values())
+    for sink in sinks:
+        sink.flush()
+
+
+@atexit.register
+def _close_event_sinks() -> None:
+    with _SINKS_LOCK:
+        sinks = list(_SINKS.values())
+        _SINKS.clear()
+    for sink in sinks:
+        sink.close()
+
+
 def append_event(root: Path, run_id: str, payload: dict[str, Any]) -> None:
-    log_path = ensure_event_log(root, run_id)
-    record = {"timestamp": now_iso(), **payload}
-    with log_path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    event_sink(root, run_id).append({"timestamp": now_iso(), **payload})
 
 
 def stable_dispatch_id(issue_number: int, issue_updated_at: str, run_id: str | None = None) -> str:
@@ -116,7 +818,7 @@ def stable_dispatch_id(issue_number: int, issue_updated_at: str, run_id: str | N
 
 def load_workers(root: Path) -> dict[str, Any]:
     path = root / "config" / "workers.yaml"
-    data = yaml.safe_load(path.read_text(encoding="utf-8"))
+    data = yaml.load(path.read_text(encoding="utf-8"), Loader=Loader)
     if not isinstance(data, dict) or "workers" not in data:
         raise ValueError("config/workers.yaml is invalid")
     workers = data["workers"]
@@ -209,6 +911,105 @@ def add_issue_comment(repo: str, issue_number: int, body: str) -> None:
     )
 
 
+def comment_verifier(repo: str, issue_number: int, body: str) -> Callable[[], bool]:
+    """Return a check for whether `body` was already posted, for retrying a comment safely."""
+    # Allow for clock skew between this host and GitHub.
+    since = iso_ago(dt.timedelta(minutes=10))
+
+    def verify() -> bool:
+        for comment in gh_paginate(f"repos/{repo}/issues/{issue_number}/comments?since={since}&per_page=100", prefetch=False):
+            if isinstance(comment, dict) and str(comment.get("body") or "") == body:
+                return True
+        return False
+
+    return verify
+
+
+@dataclass
+class WriteResult:
+    key: Any
+    op: str
+    ok: bool
+    value: Any = None
+    error: str = ""
+    attempts: int = 0
+
+
+def _retryable(exc: RuntimeError, verifiable: bool) -> bool:
+    """5xx/429 replies and lost connections are transient; anything else fails fast.
+
+    A connection lost after a write was sent is only retried when the write can
+    be verified first, since GitHub may already have applied it.
+    """
+    if isinstance(exc, GitHubAPIError):
+        return exc.status >= 500 or exc.status == 429
+    if isinstance(exc, TransportError):
+        return not exc.sent or exc.method in IDEMPOTENT_METHODS or verifiable
+    return False
+
+
+class WriteExecutor:
+    """Run GitHub writes on a thread pool.
+
+    Writes sharing a key (normally the issue number) form a chain that runs in
+    submission order and stops at the first failure; different chains run in
+    parallel. Transient failures are retried with backoff, and a write that has a
+    `verify` check is only retried after confirming it did not already land.
+    """
+
+    def __init__(self, concurrency: int = GH_WRITE_CONCURRENCY, retries: int = GH_WRITE_RETRIES, backoff: float = 0.5) -> None:
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self.backoff = backoff
+        self._chains: dict[Any, list[tuple[str, Callable[[], Any], Callable[[], bool] | None]]] = {}
+
+    def add(self, key: Any, op: str, func: Callable[[], Any], verify: Callable[[], bool] | None = None) -> None:
+        self._chains.setdefault(key, []).append((op, func, verify))
+
+    def _run_op(self, key: Any, op: str, func: Callable[[], Any], verify: Callable[[], bool] | None) -> WriteResult:
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                return WriteResult(key=key, op=op, ok=True, value=func(), attempts=attempts)
+            except RuntimeError as exc:
+                if attempts > self.retries or not _retryable(exc, verify is not None):
+                    return WriteResult(key=key, op=op, ok=False, error=str(exc), attempts=attempts)
+            time.sleep(self.backoff * 2 ** (attempts - 1))
+            if verify is None:
+                continue
+            try:
+                if verify():
+                    return WriteResult(key=key, op=op, ok=True, attempts=attempts)
+            except RuntimeError:
+                pass
+
+    def _run_chain(self, key: Any, ops: list[tuple[str, Callable[[], Any], Callable[[], bool] | None]]) -> list[WriteResult]:
+        results: list[WriteResult] = []
+        for op, func, verify in ops:
+            result = self._run_op(key, op, func, verify)
+            results.append(result)
+            if not result.ok:
+                break
+        return results
+
+    def run(self) -> dict[Any, list[WriteResult]]:
+        chains, self._chains = self._chains, {}
+        if not chains:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(chains))) as pool:
+            futures = {key: pool.submit(self._run_chain, key, ops) for key, ops in chains.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+
+def chain_ok(results: list[WriteResult]) -> bool:
+    return bool(results) and all(r.ok for r in results)
+
+
+def chain_error(results: list[WriteResult]) -> str:
+    return next((f"{r.op}: {r.error}" for r in results if not r.ok), "")
+
+
 if __name__ == "__main__":
     print("common.py is a library module", file=sys.stderr)
     sys.exit(1)
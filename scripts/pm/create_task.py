@@ -4,10 +4,25 @@
 from __future__ import annotations
 
 import argparse
+import datetime as dt
 import json
+import math
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
 from typing import Any
 
-from common import gh_api, render_frontmatter
+import yaml
+
+from common import (
+    WriteExecutor,
+    chain_error,
+    chain_ok,
+    gh_api,
+    iso_ago,
+    iter_task_issues,
+)
+from frontmatter_codec import parse_frontmatter, render_frontmatter
 
 TASK_TYPES = {
     "REQ",
@@ -43,51 +58,151 @@ def _expect_issue(data: Any) -> dict[str, Any]:
     return data
 
 
+def _as_list(raw: Any) -> list[str]:
+    if isinstance(raw, list):
+        return [str(x).strip() for x in raw if str(x).strip()]
+    if isinstance(raw, str):
+        return _split_csv(raw)
+    return []
+
+
+def _issue_payload(spec: dict[str, Any]) -> dict[str, Any]:
+    task_id = str(spec.get("task_id") or "").strip()
+    task_type = str(spec.get("task_type") or "").strip()
+    status = str(spec.get("status") or "ready").strip()
+    title = str(spec.get("title") or "").strip()
+    if not task_id or not title:
+        raise ValueError(f"task {task_id or '?'}: task_id and title are required")
+    if task_type not in TASK_TYPES:
+        raise ValueError(f"task {task_id}: invalid task_type {task_type!r}")
+    if status not in STATUSES:
+        raise ValueError(f"task {task_id}: invalid status {status!r}")
+    acceptance = _as_list(spec.get("acceptance"))
+    if not acceptance:
+        raise ValueError(f"task {task_id}: at least one acceptance criterion is required")
+
+    meta = {
+        "task_id": task_id,
+        "task_type": task_type,
+        "status": status,
+        "depends_on": _as_list(spec.get("depends_on")),
+        "owner_worker": str(spec.get("owner_worker") or "").strip(),
+        "acceptance": acceptance,
+    }
+    if spec.get("priority") not in (None, ""):
+        try:
+            meta["priority"] = int(spec["priority"])
+        except (TypeError, ValueError):
+            raise ValueError(f"task {task_id}: priority must be an integer") from None
+    if spec.get("estimate") not in (None, ""):
+        try:
+            meta["estimate"] = float(spec["estimate"])
+        except (TypeError, ValueError):
+            raise ValueError(f"task {task_id}: estimate must be a number") from None
+        if not math.isfinite(meta["estimate"]) or meta["estimate"] <= 0:
+            raise ValueError(f"task {task_id}: estimate must be a positive finite number")
+    body = str(spec.get("body") or "Implement according to acceptance criteria.")
+    labels = _dedupe_keep_order(["type/task", f"status/{status}"] + _as_list(spec.get("labels")))
+    return {"title": title, "body": render_frontmatter(meta, body), "labels": labels}
+
+
+def _create_issue(repo: str, payload: dict[str, Any]) -> dict[str, Any]:
+    return _expect_issue(gh_api(f"repos/{repo}/issues", method="POST", payload=payload))
+
+
+def _issue_verifier(repo: str, task_id: str) -> Callable[[], bool]:
+    """Check whether a retried create already produced the task issue."""
+    since = iso_ago(dt.timedelta(minutes=10))
+
+    def verify() -> bool:
+        for issue in iter_task_issues(repo, since=since):
+            meta, _ = parse_frontmatter(str(issue.get("body") or ""))
+            if str(meta.get("task_id") or "").strip() == task_id:
+                return True
+        return False
+
+    return verify
+
+
+def _issue_summary(repo: str, issue: dict[str, Any], task_id: str) -> dict[str, Any]:
+    number = int(issue["number"])
+    url = str(issue.get("html_url") or f"https://github.com/{repo}/issues/{number}")
+    return {"issue": number, "url": url, "task_id": task_id}
+
+
+def _create_batch(repo: str, path: Path) -> int:
+    specs = yaml.safe_load(path.read_text(encoding="utf-8"))
+    if isinstance(specs, dict):
+        specs = specs.get("tasks")
+    if not isinstance(specs, list) or not all(isinstance(x, dict) for x in specs):
+        raise SystemExit(f"{path}: expected a list of task mappings (optionally under 'tasks')")
+    try:
+        payloads = [(str(spec["task_id"]).strip(), _issue_payload(spec)) for spec in specs]
+    except (KeyError, ValueError) as exc:
+        raise SystemExit(f"{path}: {exc}") from exc
+
+    writes = WriteExecutor()
+    for task_id, payload in payloads:
+        writes.add(task_id, "create_issue", partial(_create_issue, repo, payload), verify=_issue_verifier(repo, task_id))
+    results = writes.run()
+
+    created: list[dict[str, Any]] = []
+    failed: list[dict[str, Any]] = []
+    for task_id, _ in payloads:
+        chain = results[task_id]
+        if not chain_ok(chain):
+            failed.append({"task_id": task_id, "error": chain_error(chain)})
+        elif chain[0].value is None:
+            created.append({"task_id": task_id, "issue": None, "url": "", "recovered": True})
+        else:
+            created.append(_issue_summary(repo, chain[0].value, task_id))
+    print(json.dumps({"ok": not failed, "repo": repo, "created": created, "failed": failed}, ensure_ascii=False))
+    return 0 if not failed else 1
+
+
 def main() -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument("--repo", required=True, help="owner/name")
-    parser.add_argument("--task-id", required=True, help="e.g. TASK-001")
-    parser.add_argument("--task-type", required=True, choices=sorted(TASK_TYPES))
-    parser.add_argument("--title", required=True, help="Issue title")
+    parser.add_argument("--batch", default="", help="YAML/JSON list of tasks to create concurrently; replaces the per-task flags.")
+    parser.add_argument("--task-id", help="e.g. TASK-001")
+    parser.add_argument("--task-type", choices=sorted(TASK_TYPES))
+    parser.add_argument("--title", help="Issue title")
     parser.add_argument("--status", default="ready", choices=sorted(STATUSES))
     parser.add_argument("--depends-on", default="", help="Comma-separated task ids, e.g. TASK-001,TASK-002")
     parser.add_argument("--owner-worker", default="", help="worker-a|worker-b or empty")
-    parser.add_argument("--acceptance", action="append", required=True, help="Repeatable. At least one acceptance criterion.")
+    parser.add_argument("--priority", type=int, default=None, help="Dispatch before lower priorities (default 0).")
+    parser.add_argument("--estimate", type=float, default=None, help="Expected duration in any consistent unit (default 1); weights the critical path.")
+    parser.add_argument("--acceptance", action="append", default=[], help="Repeatable. At least one acceptance criterion.")
     parser.add_argument("--body", default="Implement according to acceptance criteria.")
     parser.add_argument("--label", action="append", default=[], help="Extra labels (repeatable)")
     args = parser.parse_args()
 
-    depends_on = _split_csv(args.depends_on)
-    acceptance = [x.strip() for x in args.acceptance if x.strip()]
-    if not acceptance:
-        raise SystemExit("at least one --acceptance is required")
+    if args.batch:
+        return _create_batch(args.repo, Path(args.batch))
 
-    meta = {
-        "task_id": args.task_id.strip(),
-        "task_type": args.task_type.strip(),
-        "status": args.status.strip(),
-        "depends_on": depends_on,
-        "owner_worker": args.owner_worker.strip(),
-        "acceptance": acceptance,
-    }
+    missing = [flag for flag, value in (("--task-id", args.task_id), ("--task-type", args.task_type), ("--title", args.title)) if not value]
+    if missing:
+        parser.error(f"the following arguments are required: {', '.join(missing)}")
+    if not [x for x in args.acceptance if x.strip()]:
+        raise SystemExit("at least one --acceptance is required")
 
-    issue_body = render_frontmatter(meta, args.body)
-    labels = _dedupe_keep_order(["type/task", f"status/{args.status}"] + [x.strip() for x in args.label if x.strip()])
-
-    issue = _expect_issue(
-        gh_api(
-            f"repos/{args.repo}/issues",
-            method="POST",
-            payload={
-                "title": args.title,
-                "body": issue_body,
-                "labels": labels,
-            },
-        )
+    payload = _issue_payload(
+        {
+            "task_id": args.task_id,
+            "task_type": args.task_type,
+            "title": args.title,
+            "status": args.status,
+            "depends_on": args.depends_on,
+            "owner_worker": args.owner_worker,
+            "acceptance": args.acceptance,
+            "priority": args.priority,
+            "estimate": args.estimate,
+            "body": args.body,
+            "labels": args.label,
+        }
     )
-    number = int(issue["number"])
-    url = str(issue.get("html_url") or f"https://github.com/{args.repo}/issues/{number}")
-    print(json.dumps({"ok": True, "repo": args.repo, "issue": number, "url": url, "task_id": args.task_id}, ensure_ascii=False))
+    issue = _create_issue(args.repo, payload)
+    print(json.dumps({"ok": True, "repo": args.repo, **_issue_summary(args.repo, issue, args.task_id)}, ensure_ascii=False))
     return 0
 
 
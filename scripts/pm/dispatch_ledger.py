@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Local index of dispatch ids for O(1) idempotency checks."""
+
+from __future__ import annotations
+
+import datetime as dt
+import gzip
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any
+
+from common import event_log_files, log_identity, now_iso, parse_iso
+
+COMPACT_MIN_LINES = 1000
+COMPACT_INTERVAL = dt.timedelta(hours=24)
+RETENTION = dt.timedelta(days=30)
+
+
+class DispatchLedger:
+    """Set of dispatch ids persisted under `state/ledger/`.
+
+    The ledger is fed from `state/runs/*/events.jsonl` dispatch events (scanned
+    incrementally from the byte offset reached on the previous start, restarting
+    at 0 when the live file was replaced by a rotation; rotated
+    `events-N.jsonl.gz` segments are read once) and from
+    GitHub comments whenever a dispatch is discovered there instead. Once a day
+    the append-only file is compacted and entries past `RETENTION` are dropped;
+    by then the issue's `updated_at` (and so its dispatch id) has long moved on.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.directory = root / "state" / "ledger"
+        self.ledger_path = self.directory / "dispatch.jsonl"
+        self.index_path = self.directory / "index.json"
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._offsets: dict[str, int] = {}
+        self._identities: dict[str, str] = {}
+        self._compacted_at: dt.datetime | None = None
+        self._lines = 0
+
+    @classmethod
+    def open(cls, root: Path) -> DispatchLedger:
+        ledger = cls(root)
+        ledger._load()
+        ledger._scan_event_logs()
+        if ledger._compaction_due():
+            ledger.compact()
+        return ledger
+
+    def __contains__(self, dispatch_id: object) -> bool:
+        return dispatch_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self) -> None:
+        if self.index_path.exists():
+            try:
+                data = json.loads(self.index_path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                data = {}
+            if isinstance(data, dict):
+                self._offsets = {str(k): int(v) for k, v in (data.get("offsets") or {}).items()}
+                self._identities = {str(k): str(v) for k, v in (data.get("identities") or {}).items()}
+                self._compacted_at = parse_iso(data.get("compacted_at"))
+        if not self.ledger_path.exists():
+            return
+        with self.ledger_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                self._lines += 1
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(record, dict) and record.get("dispatch_id"):
+                    self._entries[str(record["dispatch_id"])] = record
+
+    def _scan_event_logs(self) -> None:
+        runs_dir = self.root / "state" / "runs"
+        found: list[dict[str, Any]] = []
+        seen: set[str] = set()
+        log_paths = [p for run_dir in sorted(runs_dir.glob("*/")) for p in event_log_files(run_dir)]
+        for log_path in log_paths:
+            key = log_path.relative_to(self.root).as_posix()
+            seen.add(key)
+            rotated = log_path.suffix == ".gz"
+            if rotated and key in self._offsets:
+                continue
+            offset = self._offsets.get(key, 0)
+            with gzip.open(log_path, "rb") if rotated else log_path.open("rb") as f:
+                if not rotated:
+                    identity = log_identity(f)
+                    if self._identities.get(key) != identity or os.fstat(f.fileno()).st_size < offset:
+                        offset = 0
+                    self._identities[key] = identity
+                f.seek(offset)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break
+                    offset += len(raw)
+                    try:
+                        event = json.loads(raw)
+                    except json.JSONDecodeError:
+                        continue
+                    if not isinstance(event, dict) or event.get("type") != "dispatch":
+                        continue
+                    details = event.get("details") or {}
+                    dispatch_id = str(details.get("dispatch_id") or "")
+                    if dispatch_id and dispatch_id not in self._entries:
+                        record = {
+                            "dispatch_id": dispatch_id,
+                            "issue": event.get("id"),
+                            "run_id": details.get("run_id"),
+                            "source": "event_log",
+                            "recorded_at": event.get("timestamp") or now_iso(),
+                        }
+                        self._entries[dispatch_id] = record
+                        found.append(record)
+            self._offsets[key] = offset
+        self._offsets = {k: v for k, v in self._offsets.items() if k in seen}
+        self._identities = {k: v for k, v in self._identities.items() if k in seen}
+        self._append(found)
+        self._save_index()
+
+    def _append(self, records: list[dict[str, Any]]) -> None:
+        if not records:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self.ledger_path.open("a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._lines += len(records)
+
+    def _save_index(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = {
+            "offsets": self._offsets,
+            "identities": self._identities,
+            "compacted_at": self._compacted_at.isoformat().replace("+00:00", "Z") if self._compacted_at else None,
+        }
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def _compaction_due(self) -> bool:
+        if self._lines < COMPACT_MIN_LINES:
+            return False
+        if self._compacted_at is None:
+            return True
+        return dt.datetime.now(dt.timezone.utc) - self._compacted_at >= COMPACT_INTERVAL
+
+    def add(self, dispatch_id: str, issue: int, run_id: str = "", source: str = "dispatch") -> None:
+        if dispatch_id in self._entries:
+            return
+        record = {"dispatch_id": dispatch_id, "issue": issue, "run_id": run_id, "source": source, "recorded_at": now_iso()}
+        self._entries[dispatch_id] = record
+        self._append([record])
+
+    def compact(self) -> None:
+        """Rewrite the ledger with one line per dispatch id, dropping expired entries."""
+        now = dt.datetime.now(dt.timezone.utc)
+        kept: dict[str, dict[str, Any]] = {}
+        for dispatch_id, record in self._entries.items():
+            recorded = parse_iso(record.get("recorded_at"))
+            if recorded is None or now - recorded < RETENTION:
+                kept[dispatch_id] = record
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.ledger_path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for record in kept.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.ledger_path)
+        self._entries = kept
+        self._lines = len(kept)
+        self._compacted_at = now
+        self._save_index()
+
+
+if __name__ == "__main__":
+    print("dispatch_ledger.py is a library module", file=sys.stderr)
+    sys.exit(1)
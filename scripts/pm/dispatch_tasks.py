@@ -5,133 +5,109 @@ from __future__ import annotations
 
 import argparse
 import json
+import time
+from functools import partial
 from pathlib import Path
 from typing import Any
 
 from common import (
+    WriteExecutor,
     add_issue_comment,
     append_event,
+    chain_error,
+    chain_ok,
+    comment_verifier,
     current_login,
-    gh_api,
+    elapsed_ms,
+    flush_events,
+    get_client,
     issue_body_with_meta,
     issue_labels,
     load_workers,
-    parse_frontmatter,
     replace_status_labels,
     replace_worker_labels,
     stable_dispatch_id,
     update_issue,
 )
-
-
-def _normalize_dep_list(raw: Any) -> list[str]:
-    if isinstance(raw, list):
-        out = [str(x).strip() for x in raw if str(x).strip()]
-        return out
-    if isinstance(raw, str) and raw.strip():
-        return [raw.strip()]
-    return []
-
-
-def _load_task_issues(repo: str) -> list[dict[str, Any]]:
-    data = gh_api(f"repos/{repo}/issues?state=all&labels=type/task&per_page=100")
-    if not isinstance(data, list):
-        raise RuntimeError("task issue list must be a JSON array")
-    return [x for x in data if isinstance(x, dict) and "pull_request" not in x]
-
-
-def _task_map(issues: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
-    out: dict[str, dict[str, Any]] = {}
-    for issue in issues:
-        meta, _ = parse_frontmatter(str(issue.get("body") or ""))
-        task_id = str(meta.get("task_id") or "").strip()
-        if task_id:
-            out[task_id] = {"issue": issue, "meta": meta}
-    return out
-
-
-def _is_done(entry: dict[str, Any]) -> bool:
-    issue = entry["issue"]
-    meta = entry["meta"]
-    labels = issue_labels(issue)
-    if str(issue.get("state")) == "closed":
-        return True
-    if str(meta.get("status") or "").lower() == "done":
-        return True
-    return "status/done" in labels
-
-
-def _deps_done(depends_on: list[str], lookup: dict[str, dict[str, Any]]) -> bool:
-    for dep in depends_on:
-        dep_entry = lookup.get(dep)
-        if not dep_entry or not _is_done(dep_entry):
-            return False
-    return True
-
-
-def main() -> int:
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--repo", required=True)
-    parser.add_argument("--run-id", required=True)
-    parser.add_argument("--assign-self", action="store_true", help="Assign dispatched issues to current GH actor.")
-    args = parser.parse_args()
-
-    root = Path(__file__).resolve().parents[2]
-    workers = load_workers(root)
-    all_issues = _load_task_issues(args.repo)
-    lookup = _task_map(all_issues)
-    assignees: list[str] | None = None
-    if args.assign_self:
-        login = current_login()
-        if login and not login.endswith("[bot]"):
-            assignees = [login]
-
-    in_progress_count: dict[str, int] = {name: 0 for name in workers.keys()}
-    for entry in lookup.values():
-        issue = entry["issue"]
-        meta = entry["meta"]
-        if str(meta.get("status") or "") != "in_progress":
+from dispatch_ledger import DispatchLedger
+from scheduler import WorkerScheduler, predict_makespan
+from task_graph import TaskGraph, normalize_dep_list
+from task_snapshot import DEFAULT_COMMENTS, TaskSnapshotStore, recent_comment_bodies
+
+
+def dispatch_ready(
+    repo: str,
+    run_id: str,
+    root: Path,
+    snapshot: TaskSnapshotStore,
+    *,
+    ledger: DispatchLedger | None = None,
+    assignees: list[str] | None = None,
+) -> dict[str, Any]:
+    """Assign every dispatchable ready task in an already loaded snapshot.
+
+    Assignments are planned first and then written concurrently, one ordered
+    PATCH+comment chain per issue. Issues written here are applied back to
+    `snapshot`, so callers can keep using it. Open `in_progress` tasks count
+    against their worker's capacity; ready tasks that fit nowhere stay
+    `ready` and are reported as `deferred`. Ready tasks are placed in
+    `TaskGraph.priority_key` order, so tasks gating the longest chains go first.
+    """
+    scheduler = WorkerScheduler(load_workers(root))
+    if ledger is None:
+        ledger = DispatchLedger.open(root)
+    all_issues = snapshot.task_issues()
+    graph = TaskGraph.from_issues(all_issues)
+
+    for node in graph.nodes.values():
+        if str(node.issue.get("state")) != "open" or str(node.meta.get("status") or "") != "in_progress":
             continue
-        owner = str(meta.get("owner_worker") or "")
-        if owner in in_progress_count:
-            in_progress_count[owner] += 1
+        scheduler.occupy(str(node.meta.get("owner_worker") or ""), str(node.meta.get("task_type") or ""))
 
+    writes = WriteExecutor()
+    planned: list[tuple[int, dict[str, Any], str]] = []
     dispatched: list[dict[str, Any]] = []
+    deferred: list[dict[str, Any]] = []
+    failed: list[dict[str, Any]] = []
 
-    for issue in all_issues:
-        if str(issue.get("state")) != "open":
-            continue
-        meta, _ = parse_frontmatter(str(issue.get("body") or ""))
+    paths = graph.critical_paths()
+
+    def order(issue: dict[str, Any]) -> tuple[tuple[int, float, int], int]:
+        task_id = str(graph.issue_meta[int(issue["number"])].get("task_id") or "").strip()
+        return graph.priority_key(task_id, paths), int(issue["number"])
+
+    for issue in sorted((x for x in all_issues if str(x.get("state")) == "open"), key=order):
+        issue_number = int(issue["number"])
+        meta = dict(graph.issue_meta[issue_number])
         if str(meta.get("status") or "") != "ready":
             continue
 
         task_type = str(meta.get("task_type") or "")
         task_id = str(meta.get("task_id") or "")
-        issue_number = int(issue["number"])
-        deps = _normalize_dep_list(meta.get("depends_on"))
-        if deps and not _deps_done(deps, lookup):
+        deps = normalize_dep_list(meta.get("depends_on"))
+        if deps and not graph.deps_done(deps):
             continue
 
-        candidates: list[str] = []
-        for worker_name, conf in workers.items():
-            types = conf.get("task_types") or []
-            if task_type in types:
-                candidates.append(worker_name)
-        if not candidates:
+        if not scheduler.eligible(task_type):
             continue
 
-        worker_name = sorted(candidates, key=lambda x: (in_progress_count.get(x, 0), x))[0]
-        worker_label = str(workers[worker_name].get("label") or f"worker/{worker_name}")
-        dispatch_id = stable_dispatch_id(issue_number, str(issue.get("updated_at") or ""), args.run_id)
+        dispatch_id = stable_dispatch_id(issue_number, str(issue.get("updated_at") or ""), run_id)
+        if dispatch_id in ledger:
+            continue
+        if any(dispatch_id in body for body in recent_comment_bodies(repo, issue)):
+            ledger.add(dispatch_id, issue_number, run_id, source="comment")
+            continue
 
-        comments = gh_api(f"repos/{args.repo}/issues/{issue_number}/comments?per_page=100")
-        if not isinstance(comments, list):
-            comments = []
-        if any(dispatch_id in str(c.get("body") or "") for c in comments if isinstance(c, dict)):
+        slot = scheduler.assign(task_type)
+        if slot is None:
+            deferred.append({"issue": issue_number, "task_id": task_id, "task_type": task_type})
             continue
+        worker_name = slot.name
+        worker_label = slot.label
 
         meta["status"] = "in_progress"
         meta["owner_worker"] = worker_name
+        meta["dispatch_id"] = dispatch_id
 
         labels = issue_labels(issue)
         labels = replace_status_labels(labels, "in_progress")
@@ -139,30 +115,48 @@ def main() -> int:
         if "type/task" not in labels:
             labels.append("type/task")
 
-        body = issue_body_with_meta(issue, meta)
-        update_issue(
-            args.repo,
-            issue_number,
-            title=str(issue.get("title") or f"Task {task_id}"),
-            body=body,
-            labels=labels,
-            assignees=assignees,
-        )
-
         payload = {
             "dispatch_id": dispatch_id,
-            "run_id": args.run_id,
+            "run_id": run_id,
             "worker": worker_name,
             "task_id": task_id,
             "task_type": task_type,
         }
-        add_issue_comment(args.repo, issue_number, f"dispatch\n```json\n{json.dumps(payload, ensure_ascii=False, indent=2)}\n```")
+        comment = f"dispatch\n```json\n{json.dumps(payload, ensure_ascii=False, indent=2)}\n```"
+        writes.add(
+            issue_number,
+            "update_issue",
+            partial(
+                update_issue,
+                repo,
+                issue_number,
+                title=str(issue.get("title") or f"Task {task_id}"),
+                body=issue_body_with_meta(issue, meta),
+                labels=labels,
+                assignees=assignees,
+            ),
+        )
+        writes.add(
+            issue_number,
+            "add_issue_comment",
+            partial(add_issue_comment, repo, issue_number, comment),
+            verify=comment_verifier(repo, issue_number, comment),
+        )
+        planned.append((issue_number, payload, comment))
+
+    results = writes.run()
+    for issue_number, payload, comment in planned:
+        chain = results[issue_number]
+        if not chain_ok(chain):
+            failed.append({"issue": issue_number, "task_id": payload["task_id"], "error": chain_error(chain)})
+            continue
+        snapshot.apply(chain[0].value, comment=comment)
         append_event(
             root,
-            args.run_id,
+            run_id,
             {
                 "type": "dispatch",
-                "repo": args.repo,
+                "repo": repo,
                 "entity": "issue",
                 "id": issue_number,
                 "action": "assigned",
@@ -170,12 +164,74 @@ def main() -> int:
                 "details": payload,
             },
         )
+        ledger.add(payload["dispatch_id"], issue_number, run_id)
+        dispatched.append({"issue": issue_number, "worker": payload["worker"], "task_id": payload["task_id"]})
+
+    flush_events()
+    return {
+        "dispatched": dispatched,
+        "deferred": deferred,
+        "failed": failed,
+        "capacity": scheduler.report(),
+        "graph": graph.report(),
+    }
+
+
+def plan_dispatch(root: Path, snapshot: TaskSnapshotStore) -> dict[str, Any]:
+    """Predicted makespan of the open tasks with the configured pool, in critical-path and in issue order."""
+    workers = load_workers(root)
+    graph = TaskGraph.from_issues(snapshot.task_issues())
+    paths = graph.critical_paths()
+    plan = predict_makespan(graph, workers, lambda tid: graph.priority_key(tid, paths))
+    plan["makespan_issue_order"] = predict_makespan(graph, workers, lambda tid: 0)["makespan"]
+    plan["critical_path"] = max((weight for _, weight in paths.values()), default=0.0)
+    plan["graph"] = graph.report()
+    return plan
 
-        in_progress_count[worker_name] = in_progress_count.get(worker_name, 0) + 1
-        dispatched.append({"issue": issue_number, "worker": worker_name, "task_id": task_id})
 
-    print(json.dumps({"ok": True, "repo": args.repo, "run_id": args.run_id, "dispatched": dispatched}, ensure_ascii=False))
-    return 0
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repo", required=True)
+    parser.add_argument("--run-id", required=True)
+    parser.add_argument("--assign-self", action="store_true", help="Assign dispatched issues to current GH actor.")
+    parser.add_argument("--loader", choices=["graphql", "rest"], default="graphql", help="Task snapshot source.")
+    parser.add_argument("--comments", type=int, default=DEFAULT_COMMENTS, help="Recent comments per issue for idempotency checks.")
+    parser.add_argument("--full-sync", action="store_true", help="Reload every task issue instead of syncing changes since the watermark.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report the predicted makespan and the first assignments.")
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parents[2]
+    started = time.perf_counter()
+    snapshot = TaskSnapshotStore(root, args.repo)
+    snapshot.sync(loader=args.loader, comments=args.comments, full=args.full_sync)
+    if args.dry_run:
+        print(json.dumps({"ok": True, "repo": args.repo, "dry_run": True, **plan_dispatch(root, snapshot), "elapsed_ms": elapsed_ms(started)}, ensure_ascii=False))
+        return 0
+    assignees: list[str] | None = None
+    if args.assign_self:
+        login = current_login()
+        if login and not login.endswith("[bot]"):
+            assignees = [login]
+
+    result = dispatch_ready(args.repo, args.run_id, root, snapshot, assignees=assignees)
+    ok = not result["failed"]
+
+    print(
+        json.dumps(
+            {
+                "ok": ok,
+                "repo": args.repo,
+                "run_id": args.run_id,
+                **result,
+                "snapshot": snapshot.stats,
+                "cache": get_client().cache_stats(),
+                "rate_limit": get_client().rate_budget(),
+                "elapsed_ms": elapsed_ms(started),
+            },
+            ensure_ascii=False,
+        )
+    )
+    return 0 if ok else 1
 
 
 if __name__ == "__main__":
@@ -7,7 +7,8 @@ import argparse
 import json
 from pathlib import Path
 
-from common import extract_issue_number_from_pr_body, gh_api, marker_from_task_id, parse_frontmatter
+from common import extract_issue_number_from_pr_body, gh_api, marker_from_task_id
+from frontmatter_codec import parse_frontmatter
 
 
 def fail(msg: str) -> int:
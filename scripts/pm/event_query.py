@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""Query run event logs and compute orchestrator metrics from them."""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import sys
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any
+
+from common import event_log_files, log_identity, parse_iso
+
+
+@dataclass
+class EventFilter:
+    types: set[str] = field(default_factory=set)
+    repo: str = ""
+    entity: str = ""
+    runs: set[str] = field(default_factory=set)
+    since: str = ""
+
+    def match(self, event: dict[str, Any]) -> bool:
+        if self.types and str(event.get("type") or "") not in self.types:
+            return False
+        if self.repo and str(event.get("repo") or "") != self.repo:
+            return False
+        if self.entity and str(event.get("entity") or "") != self.entity:
+            return False
+        return not self.since or str(event.get("timestamp") or "") >= self.since
+
+
+def _open(path: Path) -> IO[bytes]:
+    return gzip.open(path, "rb") if path.suffix == ".gz" else path.open("rb")
+
+
+def _lines_at(f: IO[bytes], offsets: list[int]) -> Iterator[bytes]:
+    for offset in offsets:
+        f.seek(offset)
+        yield f.readline()
+
+
+class EventIndex:
+    """Per-file summary of the run logs, kept under `state/cache/events/index.json`.
+
+    For every log file the index records how far it was read, the event count,
+    the repos and entities seen and the byte offsets of each event type. Only
+    new files and the appended tail of live files are read on refresh; queries
+    skip files that cannot match and seek straight to typed events in live files.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.runs_dir = root / "state" / "runs"
+        self.path = root / "state" / "cache" / "events" / "index.json"
+        self.files: dict[str, dict[str, Any]] = {}
+
+    @classmethod
+    def open(cls, root: Path) -> EventIndex:
+        index = cls(root)
+        try:
+            data = json.loads(index.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            data = {}
+        if isinstance(data, dict) and isinstance(data.get("files"), dict):
+            index.files = data["files"]
+        index.refresh()
+        return index
+
+    def run_files(self) -> Iterator[tuple[str, Path]]:
+        for run_dir in sorted(self.runs_dir.glob("*/")):
+            for path in event_log_files(run_dir):
+                yield run_dir.name, path
+
+    def _key(self, path: Path) -> str:
+        return path.relative_to(self.root).as_posix()
+
+    def _index_file(self, f: IO[bytes], entry: dict[str, Any]) -> None:
+        offset = int(entry.get("size") or 0)
+        types: dict[str, list[int]] = entry.setdefault("types", {})
+        repos = set(entry.get("repos") or [])
+        entities = set(entry.get("entities") or [])
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            start, offset = offset, offset + len(raw)
+            try:
+                event = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(event, dict):
+                continue
+            types.setdefault(str(event.get("type") or ""), []).append(start)
+            repos.add(str(event.get("repo") or ""))
+            entities.add(str(event.get("entity") or ""))
+            entry["count"] = int(entry.get("count") or 0) + 1
+        entry["size"] = offset
+        entry["repos"] = sorted(repos)
+        entry["entities"] = sorted(entities)
+
+    def refresh(self) -> None:
+        seen: set[str] = set()
+        changed = False
+        for _, path in self.run_files():
+            key = self._key(path)
+            seen.add(key)
+            entry = self.files.get(key)
+            rotated = path.suffix == ".gz"
+            if entry is not None and rotated:
+                continue
+            with _open(path) as f:
+                if not rotated:
+                    # Same replacement check as the dispatch ledger: a new file may reuse the inode.
+                    identity = log_identity(f)
+                    size = os.fstat(f.fileno()).st_size
+                    if entry is not None and (entry.get("identity") != identity or size < int(entry.get("size") or 0)):
+                        entry = None
+                    if entry is not None and size == int(entry.get("size") or 0):
+                        continue
+                    entry = entry or {"identity": identity, "size": 0, "count": 0}
+                entry = entry or {"size": 0, "count": 0}
+                self._index_file(f, entry)
+            self.files[key] = entry
+            changed = True
+        if seen != set(self.files):
+            self.files = {k: v for k, v in self.files.items() if k in seen}
+            changed = True
+        if changed:
+            self._save()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"files": self.files}), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _may_match(self, entry: dict[str, Any], flt: EventFilter) -> bool:
+        if flt.types and not flt.types & set(entry.get("types") or {}):
+            return False
+        if flt.repo and flt.repo not in (entry.get("repos") or []):
+            return False
+        return not flt.entity or flt.entity in (entry.get("entities") or [])
+
+    def query(self, flt: EventFilter) -> Iterator[tuple[str, dict[str, Any]]]:
+        """Yield `(run_id, event)` for matching events, run by run in log order."""
+        for run_id, path in self.run_files():
+            if flt.runs and run_id not in flt.runs:
+                continue
+            entry = self.files.get(self._key(path))
+            if entry is None or not self._may_match(entry, flt):
+                continue
+            with _open(path) as f:
+                lines: Iterator[bytes] = f
+                if flt.types and path.suffix != ".gz":
+                    types = entry.get("types") or {}
+                    lines = _lines_at(f, sorted(o for t in flt.types for o in types.get(t, [])))
+                for raw in lines:
+                    try:
+                        event = json.loads(raw)
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(event, dict) and flt.match(event):
+                        yield run_id, event
+
+    def events_per_run(self, flt: EventFilter) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for run_id, path in self.run_files():
+            if flt.runs and run_id not in flt.runs:
+                continue
+            entry = self.files.get(self._key(path)) or {}
+            counts[run_id] = counts.get(run_id, 0) + int(entry.get("count") or 0)
+        return counts
+
+
+def _summary(values: list[float]) -> dict[str, Any]:
+    if not values:
+        return {"count": 0, "sum": 0.0, "mean": None, "p50": None, "p90": None, "max": None}
+    ordered = sorted(values)
+
+    def pct(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+    total = sum(ordered)
+    return {
+        "count": len(ordered),
+        "sum": round(total, 3),
+        "mean": round(total / len(ordered), 3),
+        "p50": pct(0.5),
+        "p90": pct(0.9),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def compute_metrics(index: EventIndex, flt: EventFilter) -> dict[str, Any]:
+    """Lead time (first dispatch to merge), queue wait (unlock to dispatch) per worker,
+    unlock fan-out per merge and events per run."""
+    dispatched: dict[int, tuple[Any, str]] = {}
+    ready_at: dict[int, Any] = {}
+    lead_times: list[float] = []
+    waits: dict[str, list[float]] = {}
+    fanout: list[int] = []
+    last_merge: dict[str, int] = {}
+    scoped = EventFilter(types={"dispatch", "unlock", "pr_merged"}, repo=flt.repo, entity=flt.entity, runs=flt.runs, since=flt.since)
+    events = sorted(index.query(scoped), key=lambda x: str(x[1].get("timestamp") or ""))
+    for run_id, event in events:
+        ts = parse_iso(event.get("timestamp"))
+        if ts is None:
+            continue
+        kind = event.get("type")
+        details = event.get("details") or {}
+        if kind == "unlock":
+            ready_at[int(event["id"])] = ts
+            if run_id in last_merge:
+                fanout[last_merge[run_id]] += 1
+        elif kind == "dispatch":
+            issue = int(event["id"])
+            worker = str(details.get("worker") or "")
+            dispatched.setdefault(issue, (ts, worker))
+            if issue in ready_at:
+                waits.setdefault(worker, []).append((ts - ready_at.pop(issue)).total_seconds())
+        elif kind == "pr_merged":
+            last_merge[run_id] = len(fanout)
+            fanout.append(0)
+            issue = details.get("issue")
+            if issue is not None and int(issue) in dispatched:
+                lead_times.append((ts - dispatched.pop(int(issue))[0]).total_seconds())
+    runs = index.events_per_run(flt)
+    return {
+        "runs": len(runs),
+        "events_total": sum(runs.values()),
+        "events_per_run": runs,
+        "lead_time_seconds": _summary(lead_times),
+        "queue_wait_seconds": {worker: _summary(v) for worker, v in sorted(waits.items())},
+        "unlock_fanout": _summary([float(x) for x in fanout]),
+    }
+
+
+def _labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    body = ",".join(f'{k}="{escape(v)}"' for k, v in labels.items())
+    return f"{{{body}}}" if body else ""
+
+
+def _prom_summary(name: str, help_text: str, series: dict[str, dict[str, Any]], label: str = "") -> list[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+    for key, stats in series.items():
+        extra = {label: key} if label else {}
+        for key_name, quantile in (("p50", "0.5"), ("p90", "0.9")):
+            if stats[key_name] is not None:
+                lines.append(f"{name}{_labels(**extra, quantile=quantile)} {stats[key_name]}")
+        lines.append(f"{name}_sum{_labels(**extra)} {stats['sum']}")
+        lines.append(f"{name}_count{_labels(**extra)} {stats['count']}")
+    return lines
+
+
+def render_prometheus(metrics: dict[str, Any]) -> str:
+    lines = ["# HELP orchestrator_events_total Events recorded per run.", "# TYPE orchestrator_events_total counter"]
+    for run_id, count in metrics["events_per_run"].items():
+        lines.append(f"orchestrator_events_total{_labels(run=run_id)} {count}")
+    lines += _prom_summary(
+        "orchestrator_dispatch_lead_time_seconds", "Time from first dispatch to PR merge.", {"": metrics["lead_time_seconds"]}
+    )
+    lines += _prom_summary(
+        "orchestrator_queue_wait_seconds", "Time from unlock to dispatch.", metrics["queue_wait_seconds"], label="worker"
+    )
+    lines += _prom_summary("orchestrator_unlock_fanout", "Tasks unlocked per merged PR.", {"": metrics["unlock_fanout"]})
+    return "\n".join(lines) + "\n"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["events", "metrics"])
+    parser.add_argument("--type", action="append", default=[], help="Event type; repeat for several.")
+    parser.add_argument("--repo", default="")
+    parser.add_argument("--entity", default="")
+    parser.add_argument("--run-id", action="append", default=[], help="Restrict to a run; repeat for several.")
+    parser.add_argument("--since", default="", help="Only events at/after this ISO timestamp.")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many events (events command).")
+    parser.add_argument("--format", choices=["json", "prom"], default="json", help="Metrics output format.")
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parents[2]
+    index = EventIndex.open(root)
+    flt = EventFilter(types=set(args.type), repo=args.repo, entity=args.entity, runs=set(args.run_id), since=args.since)
+
+    if args.command == "events":
+        for n, (run_id, event) in enumerate(index.query(flt), start=1):
+            print(json.dumps({"run_id": run_id, **event}, ensure_ascii=False))
+            if args.limit and n >= args.limit:
+                break
+        return 0
+
+    metrics = compute_metrics(index, flt)
+    if args.format == "prom":
+        sys.stdout.write(render_prometheus(metrics))
+    else:
+        print(json.dumps({"ok": True, **metrics}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""Merge a batch of worker PRs through one speculative candidate branch, bisecting on failure."""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+import yaml
+
+from common import add_issue_comment, append_event, elapsed_ms, flush_events, gh_api
+from pr_waiter import PRWaiter, wait_for_commit
+
+CANDIDATE_PREFIX = "merge-queue"
+
+
+class QueueError(RuntimeError):
+    pass
+
+
+def required_checks(root: Path) -> frozenset[str]:
+    data = yaml.safe_load((root / "config" / "policy.yaml").read_text(encoding="utf-8")) or {}
+    return frozenset(str(x) for x in data.get("required_checks") or [])
+
+
+@dataclass
+class QueuedPR:
+    number: int
+    title: str
+    head_ref: str
+    head_sha: str
+    body: str = ""
+
+
+@dataclass
+class Candidate:
+    branch: str
+    sha: str
+    prs: list[int]
+    result: str = ""
+    failing: list[str] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+
+class MergeQueue:
+    """Builds `merge-queue/<batch>-<n>` candidates on top of `main` in a scratch worktree.
+
+    Each PR enters the candidate as a `--no-ff` merge of its head, so once `main`
+    is fast-forwarded to a passing candidate GitHub sees every PR head in `main`
+    and marks the PRs merged. A failing candidate is split in halves and each
+    half is retried on top of whatever has merged so far, until the culprits
+    are single PRs. `check` is the CI oracle: it receives a pushed candidate
+    and returns `("passed" | "failed" | "timeout", failing_checks)`.
+    """
+
+    def __init__(
+        self,
+        repo: str,
+        root: Path,
+        batch_id: str,
+        check: Callable[[Candidate], tuple[str, list[str]]],
+        remote: str = "origin",
+        base: str = "main",
+    ) -> None:
+        self.repo = repo
+        self.root = root
+        self.batch_id = batch_id
+        self.check = check
+        self.remote = remote
+        self.base = base
+        self.workdir = Path(tempfile.mkdtemp(prefix="merge-queue-"))
+        self.candidates: list[Candidate] = []
+        self.merged: list[int] = []
+        self.rejected: list[dict[str, Any]] = []
+
+    def _git(self, *args: str, cwd: Path | None = None, check: bool = True) -> subprocess.CompletedProcess[str]:
+        proc = subprocess.run(["git", *args], cwd=cwd or self.workdir, text=True, capture_output=True, check=False)
+        if check and proc.returncode != 0:
+            raise QueueError(f"git {' '.join(args)} failed: {proc.stderr.strip()}")
+        return proc
+
+    def fetch(self, prs: list[QueuedPR]) -> None:
+        refspecs = [f"+refs/heads/{self.base}:refs/{CANDIDATE_PREFIX}/base"]
+        refspecs += [f"+refs/pull/{pr.number}/head:refs/{CANDIDATE_PREFIX}/pr/{pr.number}" for pr in prs]
+        self._git("fetch", "--quiet", self.remote, *refspecs, cwd=self.root)
+
+    def _base_sha(self) -> str:
+        self._git("fetch", "--quiet", self.remote, f"+refs/heads/{self.base}:refs/{CANDIDATE_PREFIX}/base", cwd=self.root)
+        return self._git("rev-parse", f"refs/{CANDIDATE_PREFIX}/base", cwd=self.root).stdout.strip()
+
+    def build(self, prs: list[QueuedPR]) -> tuple[str, list[QueuedPR]]:
+        """Merge `prs` onto the current base; PRs that conflict are rejected and left out."""
+        if not (self.workdir / ".git").exists():
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            self._git("worktree", "add", "--quiet", "--detach", str(self.workdir), self._base_sha(), cwd=self.root)
+        else:
+            self._git("checkout", "--quiet", "--detach", self._base_sha())
+        included: list[QueuedPR] = []
+        for pr in prs:
+            merged = self._git(
+                "-c", "user.name=merge-queue", "-c", "user.email=merge-queue@local.invalid",
+                "merge", "--no-ff", "--quiet", "-m", f"Merge PR #{pr.number} from {pr.head_ref}: {pr.title}", f"refs/{CANDIDATE_PREFIX}/pr/{pr.number}",
+                check=False,
+            )
+            if merged.returncode != 0:
+                self._git("merge", "--abort", check=False)
+                self.reject(pr, "conflicts with main or an earlier PR in the batch")
+                continue
+            included.append(pr)
+        return self._git("rev-parse", "HEAD").stdout.strip(), included
+
+    def reject(self, pr: QueuedPR, reason: str) -> None:
+        self.rejected.append({"pr": pr.number, "reason": reason})
+        add_issue_comment(self.repo, pr.number, f"Removed from merge queue batch `{self.batch_id}`: {reason}.")
+
+    def _test(self, prs: list[QueuedPR]) -> tuple[Candidate, list[QueuedPR]]:
+        sha, included = self.build(prs)
+        candidate = Candidate(f"{CANDIDATE_PREFIX}/{self.batch_id}-{len(self.candidates) + 1}", sha, [p.number for p in included])
+        self.candidates.append(candidate)
+        if not included:
+            candidate.result = "empty"
+            return candidate, included
+        started = time.perf_counter()
+        self._git("push", "--quiet", "--force", self.remote, f"{sha}:refs/heads/{candidate.branch}")
+        try:
+            candidate.result, candidate.failing = self.check(candidate)
+        finally:
+            self._git("push", "--quiet", self.remote, f":refs/heads/{candidate.branch}", check=False)
+        candidate.elapsed_ms = elapsed_ms(started)
+        return candidate, included
+
+    def _fast_forward(self, candidate: Candidate) -> bool:
+        pushed = self._git("push", "--quiet", self.remote, f"{candidate.sha}:refs/heads/{self.base}", check=False)
+        if pushed.returncode != 0:
+            candidate.result = "stale"
+            return False
+        return True
+
+    def process(self, prs: list[QueuedPR], attempts: int = 2) -> None:
+        """Merge every PR of `prs` that passes CI together with what already merged."""
+        if not prs:
+            return
+        candidate, included = self._test(prs)
+        if candidate.result == "passed":
+            if self._fast_forward(candidate):
+                self.merged += candidate.prs
+            elif attempts > 1:
+                # main moved under us: rebuild the same set on the new main.
+                self.process(included, attempts - 1)
+            else:
+                for pr in included:
+                    self.reject(pr, f"`{self.base}` kept moving while the batch was being checked")
+            return
+        if candidate.result == "timeout":
+            # Bisecting would only multiply the wait; leave the PRs for the next batch.
+            for pr in included:
+                self.reject(pr, f"checks on candidate `{candidate.branch}` did not finish in time")
+            return
+        if candidate.result != "failed":
+            return
+        if len(included) == 1:
+            failing = ", ".join(candidate.failing) or "unknown"
+            self.reject(included[0], f"checks failed on candidate `{candidate.branch}` ({failing})")
+            return
+        half = len(included) // 2
+        self.process(included[:half])
+        self.process(included[half:])
+
+    def close(self) -> None:
+        self._git("worktree", "remove", "--force", str(self.workdir), cwd=self.root, check=False)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+        refs = self._git("for-each-ref", "--format=%(refname)", f"refs/{CANDIDATE_PREFIX}/", cwd=self.root).stdout.split()
+        for ref in refs:
+            self._git("update-ref", "-d", ref, cwd=self.root, check=False)
+
+
+def load_prs(repo: str, numbers: list[int], base: str, require_approval: bool) -> tuple[list[QueuedPR], list[dict[str, Any]]]:
+    queued: list[QueuedPR] = []
+    skipped: list[dict[str, Any]] = []
+    for number in dict.fromkeys(numbers):
+        pr = gh_api(f"repos/{repo}/pulls/{number}")
+        head_ref = str((pr.get("head") or {}).get("ref") or "")
+        reason = ""
+        if pr.get("state") != "open":
+            reason = "not open"
+        elif str((pr.get("base") or {}).get("ref") or "") != base:
+            reason = f"does not target {base}"
+        elif not head_ref.startswith("worker/"):
+            reason = "not a worker branch"
+        elif require_approval:
+            reviews = gh_api(f"repos/{repo}/pulls/{number}/reviews?per_page=100") or []
+            latest: dict[str, str] = {}
+            for review in reviews:
+                latest[str((review.get("user") or {}).get("login") or "")] = str(review.get("state") or "")
+            if "APPROVED" not in latest.values() or "CHANGES_REQUESTED" in latest.values():
+                reason = "not approved"
+        if reason:
+            skipped.append({"pr": number, "reason": reason})
+            continue
+        queued.append(QueuedPR(number, str(pr.get("title") or ""), head_ref, str((pr.get("head") or {}).get("sha") or ""), str(pr.get("body") or "")))
+    return queued, skipped
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repo", required=True)
+    parser.add_argument("--pr", type=int, action="append", required=True, help="PR number in merge order; repeat for the batch.")
+    parser.add_argument("--run-id", default=dt.datetime.now(dt.timezone.utc).strftime("%Y%m%d-%H%M%S"))
+    parser.add_argument("--base", default="main")
+    parser.add_argument("--require-approval", action="store_true", help="Skip PRs without an approving review.")
+    parser.add_argument("--timeout-sec", type=float, default=1800.0, help="Per candidate CI wait.")
+    parser.add_argument("--post-merge", choices=["true", "false"], default="true", help="Run on_pr_merged.py for each merged PR.")
+    parser.add_argument("--delete-branch", choices=["true", "false"], default="true")
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parents[2]
+    required = required_checks(root)
+    prs, skipped = load_prs(args.repo, args.pr, args.base, args.require_approval)
+
+    def check(candidate: Candidate) -> tuple[str, list[str]]:
+        status = wait_for_commit(args.repo, candidate.sha, args.timeout_sec, required)
+        return ("timeout" if status.state == "pending" else status.state), status.failing
+
+    queue = MergeQueue(args.repo, root, args.run_id, check, base=args.base)
+    try:
+        queue.fetch(prs)
+        queue.process(prs)
+    finally:
+        queue.close()
+
+    for candidate in queue.candidates:
+        append_event(
+            root,
+            args.run_id,
+            {
+                "type": "merge_candidate",
+                "repo": args.repo,
+                "entity": "branch",
+                "id": candidate.branch,
+                "action": "check",
+                "result": candidate.result,
+                "details": {"sha": candidate.sha, "prs": candidate.prs, "elapsed_ms": candidate.elapsed_ms},
+            },
+        )
+    flush_events()
+
+    post_merge: list[dict[str, Any]] = []
+    unmerged: list[dict[str, Any]] = []
+    if queue.merged:
+        # GitHub marks the PRs merged asynchronously once their heads are reachable from the base.
+        waiter = PRWaiter(args.repo, queue.merged, until="merged", min_interval=2.0, max_interval=15.0)
+        states = {status.number: status.state for status in waiter.watch(300.0)}
+        by_number = {pr.number: pr for pr in prs}
+        for number in queue.merged:
+            # Deleting the head of a PR GitHub has not marked merged closes it unmerged.
+            state = states.get(number, "timeout")
+            if state != "merged":
+                unmerged.append({"pr": number, "state": state})
+                continue
+            if args.delete_branch == "true":
+                try:
+                    gh_api(f"repos/{args.repo}/git/refs/heads/{by_number[number].head_ref}", method="DELETE")
+                except RuntimeError as exc:
+                    print(f"deleting branch of PR #{number} failed: {exc}", file=sys.stderr)
+            if args.post_merge == "true":
+                proc = subprocess.run(
+                    [sys.executable, str(Path(__file__).with_name("on_pr_merged.py")), "--repo", args.repo, "--pr", str(number), "--run-id", args.run_id],
+                    text=True,
+                    capture_output=True,
+                    check=False,
+                )
+                lines = proc.stdout.strip().splitlines()
+                try:
+                    post_merge.append({"pr": number, **json.loads(lines[-1])})
+                except (IndexError, json.JSONDecodeError):
+                    post_merge.append({"pr": number, "ok": False, "error": proc.stderr.strip()[-500:]})
+
+    ok = not queue.rejected and not skipped and not unmerged and all(item.get("ok") and not item.get("skipped") for item in post_merge)
+    print(
+        json.dumps(
+            {
+                "ok": ok,
+                "repo": args.repo,
+                "batch": args.run_id,
+                "merged": queue.merged,
+                "rejected": queue.rejected,
+                "skipped": skipped,
+                "unmerged": unmerged,
+                "candidates": [vars(c) for c in queue.candidates],
+                "post_merge": post_merge,
+            },
+            ensure_ascii=False,
+        )
+    )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
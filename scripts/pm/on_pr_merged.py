@@ -5,93 +5,87 @@ from __future__ import annotations
 
 import argparse
 import json
-import subprocess
-import sys
+import time
+from functools import partial
 from pathlib import Path
 from typing import Any
 
 from common import (
+    WriteExecutor,
     add_issue_comment,
     append_event,
+    chain_error,
+    chain_ok,
+    comment_verifier,
+    elapsed_ms,
     extract_issue_number_from_pr_body,
+    flush_events,
+    get_client,
     gh_api,
     issue_body_with_meta,
     issue_labels,
-    parse_frontmatter,
     replace_status_labels,
     update_issue,
 )
-
-
-def _normalize_dep_list(raw: Any) -> list[str]:
-    if isinstance(raw, list):
-        return [str(x).strip() for x in raw if str(x).strip()]
-    if isinstance(raw, str) and raw.strip():
-        return [raw.strip()]
-    return []
-
-
-def _load_task_issues(repo: str) -> list[dict[str, Any]]:
-    data = gh_api(f"repos/{repo}/issues?state=all&labels=type/task&per_page=100")
-    if not isinstance(data, list):
-        raise RuntimeError("task issue list must be a JSON array")
-    return [x for x in data if isinstance(x, dict) and "pull_request" not in x]
-
-
-def _task_done(issue: dict[str, Any], meta: dict[str, Any]) -> bool:
-    labels = issue_labels(issue)
-    return str(issue.get("state")) == "closed" or str(meta.get("status") or "") == "done" or "status/done" in labels
-
-
-def _unlock_ready_tasks(repo: str, run_id: str, root: Path) -> list[int]:
-    all_issues = _load_task_issues(repo)
-    task_map: dict[str, tuple[dict[str, Any], dict[str, Any]]] = {}
-    for issue in all_issues:
-        meta, _ = parse_frontmatter(str(issue.get("body") or ""))
-        tid = str(meta.get("task_id") or "").strip()
-        if tid:
-            task_map[tid] = (issue, meta)
-
-    unlocked: list[int] = []
-    for issue in all_issues:
+from dispatch_tasks import dispatch_ready
+from frontmatter_codec import parse_frontmatter
+from task_graph import TaskGraph
+from task_snapshot import TaskSnapshotStore
+
+
+def _unlock_ready_tasks(
+    repo: str,
+    run_id: str,
+    root: Path,
+    snapshot: TaskSnapshotStore,
+    closed_task_id: str | None = None,
+) -> tuple[list[int], list[dict[str, Any]]]:
+    graph = TaskGraph.from_issues(snapshot.task_issues())
+    if closed_task_id:
+        # The snapshot may lag the close we just wrote; apply it before reading dependents.
+        graph.mark_done(closed_task_id)
+        candidates = graph.dependents.get(closed_task_id, [])
+    else:
+        candidates = list(graph.nodes)
+
+    comment = f"Dependencies resolved. Marked as `ready` by run `{run_id}`."
+    writes = WriteExecutor()
+    for tid in dict.fromkeys(candidates):
+        node = graph.nodes[tid]
+        issue, meta = node.issue, node.meta
         if str(issue.get("state")) != "open":
             continue
-        meta, _ = parse_frontmatter(str(issue.get("body") or ""))
         status = str(meta.get("status") or "")
         if status in {"in_progress", "done"}:
             continue
-
-        deps = _normalize_dep_list(meta.get("depends_on"))
-        if not deps:
-            continue
-
-        all_done = True
-        for dep in deps:
-            dep_entry = task_map.get(dep)
-            if not dep_entry:
-                all_done = False
-                break
-            dep_issue, dep_meta = dep_entry
-            if not _task_done(dep_issue, dep_meta):
-                all_done = False
-                break
-
-        if not all_done:
+        if not node.depends_on or not graph.is_unblocked(tid):
             continue
 
         meta["status"] = "ready"
-        labels = replace_status_labels(issue_labels(issue), "ready")
-        body = issue_body_with_meta(issue, meta)
-        updated = update_issue(
-            repo,
-            int(issue["number"]),
-            title=str(issue.get("title") or "Task"),
-            body=body,
-            labels=labels,
+        num = int(issue["number"])
+        writes.add(
+            num,
+            "update_issue",
+            partial(
+                update_issue,
+                repo,
+                num,
+                title=str(issue.get("title") or "Task"),
+                body=issue_body_with_meta(issue, meta),
+                labels=replace_status_labels(issue_labels(issue), "ready"),
+            ),
         )
-        num = int(updated["number"])
+        writes.add(num, "add_issue_comment", partial(add_issue_comment, repo, num, comment), verify=comment_verifier(repo, num, comment))
+
+    results = writes.run()
+    unlocked: list[int] = []
+    failed: list[dict[str, Any]] = []
+    for num, chain in results.items():
+        if not chain_ok(chain):
+            failed.append({"issue": num, "error": chain_error(chain)})
+            continue
         unlocked.append(num)
-        add_issue_comment(repo, num, f"Dependencies resolved. Marked as `ready` by run `{run_id}`.")
+        snapshot.apply(chain[0].value, comment=comment)
         append_event(
             root,
             run_id,
@@ -105,7 +99,8 @@ def _unlock_ready_tasks(repo: str, run_id: str, root: Path) -> list[int]:
             },
         )
 
-    return unlocked
+    flush_events()
+    return unlocked, failed
 
 
 def main() -> int:
@@ -113,6 +108,8 @@ def main() -> int:
     parser.add_argument("--repo", required=True)
     parser.add_argument("--pr", type=int, required=True)
     parser.add_argument("--run-id", required=True)
+    parser.add_argument("--loader", choices=["graphql", "rest"], default="graphql", help="Task snapshot source.")
+    parser.add_argument("--full-sync", action="store_true", help="Reload every task issue instead of syncing changes since the watermark.")
     args = parser.parse_args()
 
     root = Path(__file__).resolve().parents[2]
@@ -130,7 +127,14 @@ def main() -> int:
         print(json.dumps({"ok": False, "error": "missing_closes_link", "pr": args.pr}))
         return 1
 
-    issue = gh_api(f"repos/{args.repo}/issues/{issue_number}")
+    phases: dict[str, dict[str, Any]] = {}
+    started = time.perf_counter()
+    snapshot = TaskSnapshotStore(root, args.repo)
+    snapshot.sync(loader=args.loader, full=args.full_sync)
+    phases["snapshot"] = {**snapshot.stats, "elapsed_ms": elapsed_ms(started)}
+
+    started = time.perf_counter()
+    issue = snapshot.issues.get(issue_number) or gh_api(f"repos/{args.repo}/issues/{issue_number}")
     if not isinstance(issue, dict):
         print(json.dumps({"ok": False, "error": "missing_issue", "issue": issue_number}))
         return 1
@@ -140,7 +144,7 @@ def main() -> int:
     labels = replace_status_labels(issue_labels(issue), "done")
     body = issue_body_with_meta(issue, meta)
 
-    update_issue(
+    closed = update_issue(
         args.repo,
         issue_number,
         title=str(issue.get("title") or "Task"),
@@ -148,7 +152,9 @@ def main() -> int:
         labels=labels,
         state="closed",
     )
-    add_issue_comment(args.repo, issue_number, f"Closed automatically after merge of PR #{args.pr}.")
+    comment = f"Closed automatically after merge of PR #{args.pr}."
+    add_issue_comment(args.repo, issue_number, comment)
+    snapshot.apply(closed, comment=comment)
     append_event(
         root,
         args.run_id,
@@ -162,32 +168,45 @@ def main() -> int:
             "details": {"issue": issue_number},
         },
     )
+    flush_events()
+    phases["close"] = {"issue": issue_number, "elapsed_ms": elapsed_ms(started)}
 
-    unlocked = _unlock_ready_tasks(args.repo, args.run_id, root)
-
-    dispatch_script = Path(__file__).resolve().parent / "dispatch_tasks.py"
-    proc = subprocess.run(
-        [sys.executable, str(dispatch_script), "--repo", args.repo, "--run-id", args.run_id],
-        check=False,
-        capture_output=True,
-        text=True,
+    started = time.perf_counter()
+    unlocked, unlock_failed = _unlock_ready_tasks(
+        args.repo,
+        args.run_id,
+        root,
+        snapshot,
+        closed_task_id=str(meta.get("task_id") or "").strip() or None,
     )
+    phases["unlock"] = {"unlocked": unlocked, "failed": unlock_failed, "elapsed_ms": elapsed_ms(started)}
+
+    started = time.perf_counter()
+    ok = not unlock_failed
+    try:
+        phases["dispatch"] = dispatch_ready(args.repo, args.run_id, root, snapshot)
+        ok = ok and not phases["dispatch"]["failed"]
+    except RuntimeError as exc:
+        ok = False
+        phases["dispatch"] = {"error": str(exc)}
+    phases["dispatch"]["elapsed_ms"] = elapsed_ms(started)
 
     print(
         json.dumps(
             {
-                "ok": proc.returncode == 0,
+                "ok": ok,
                 "repo": args.repo,
                 "pr": args.pr,
                 "closed_issue": issue_number,
                 "unlocked": unlocked,
-                "dispatch_stdout": proc.stdout.strip(),
-                "dispatch_stderr": proc.stderr.strip(),
+                "dispatched": phases["dispatch"].get("dispatched", []),
+                "phases": phases,
+                "rate_limit": get_client().rate_budget(),
             },
             ensure_ascii=False,
         )
     )
-    return 0 if proc.returncode == 0 else 1
+    return 0 if ok else 1
 
 
 if __name__ == "__main__":
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""Wait for checks or merges on many PRs at once with conditional requests and backoff."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Iterator
+
+from common import GitHubAPIError, GitHubClient, get_client
+
+OK_CONCLUSIONS = {"success", "neutral", "skipped"}
+# Terminal states per wait target; anything else keeps the PR in the poll set.
+TERMINAL = {
+    "checks": {"passed", "failed", "merged", "closed"},
+    "merged": {"merged", "closed", "failed"},
+}
+SUCCESS = {"passed", "merged"}
+
+
+@dataclass
+class PRStatus:
+    number: int
+    state: str = "pending"
+    head_sha: str = ""
+    total: int = 0
+    pending: int = 0
+    failed: int = 0
+    failing: list[str] = field(default_factory=list)
+    polls: int = 0
+
+
+class ConditionalFetcher:
+    """GET with per-URL ETags kept in memory; a 304 returns the previous body and `changed=False`.
+
+    Unchanged (304) replies are not counted against the REST rate limit.
+    """
+
+    def __init__(self, client: GitHubClient) -> None:
+        self.client = client
+        self._seen: dict[str, tuple[str, Any]] = {}
+        self.requests = 0
+        self.not_modified = 0
+
+    def get(self, path: str) -> tuple[Any, bool]:
+        etag, data = self._seen.get(path, ("", None))
+        resp = self.client.request("GET", path, headers={"If-None-Match": etag} if etag else None, cache=False)
+        self.requests += 1
+        if resp.status == 304:
+            self.not_modified += 1
+            return data, False
+        new_etag = resp.headers.get("etag", "")
+        if new_etag:
+            self._seen[path] = (new_etag, resp.data)
+        return resp.data, True
+
+
+def classify(
+    pr: dict[str, Any],
+    runs: list[dict[str, Any]],
+    combined: dict[str, Any],
+    status: PRStatus,
+    required: frozenset[str] = frozenset(),
+) -> None:
+    """Fold the PR, its check runs and its combined commit status into `status.state`.
+
+    With `required` check names, a commit only passes once all of them have reported.
+    """
+    if pr.get("merged") or pr.get("merged_at"):
+        status.state = "merged"
+        return
+    if pr.get("state") == "closed":
+        status.state = "closed"
+        return
+    status.failing = []
+    status.total = status.pending = status.failed = 0
+    seen: set[str] = set()
+    for run in runs:
+        seen.add(str(run.get("name") or ""))
+        status.total += 1
+        if run.get("status") != "completed":
+            status.pending += 1
+        elif str(run.get("conclusion") or "") not in OK_CONCLUSIONS:
+            status.failed += 1
+            status.failing.append(str(run.get("name") or ""))
+    for ctx in combined.get("statuses") or []:
+        seen.add(str(ctx.get("context") or ""))
+        status.total += 1
+        if ctx.get("state") == "pending":
+            status.pending += 1
+        elif ctx.get("state") != "success":
+            status.failed += 1
+            status.failing.append(str(ctx.get("context") or ""))
+    if status.failed:
+        status.state = "failed"
+    elif status.total and not status.pending and required <= seen:
+        status.state = "passed"
+    else:
+        status.state = "pending"
+
+
+class PRWaiter:
+    """Polls a set of PRs concurrently until they reach a terminal state.
+
+    Every PR has its own poll interval: it doubles (up to `max_interval`) while
+    nothing changes and drops back to `min_interval` when something does, with
+    jitter so many waiters do not poll in lockstep. Requests carry the last
+    ETag, so idle PRs cost 304s rather than rate-limit budget.
+    """
+
+    def __init__(
+        self,
+        repo: str,
+        prs: list[int],
+        until: str = "checks",
+        min_interval: float = 5.0,
+        max_interval: float = 60.0,
+        client: GitHubClient | None = None,
+        concurrency: int = 8,
+        rng: random.Random | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.repo = repo
+        self.until = until
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.fetcher = ConditionalFetcher(client or get_client())
+        self.concurrency = concurrency
+        self.rng = rng or random.Random()
+        self.clock = clock
+        self.sleep = sleep
+        self.status = {n: PRStatus(n) for n in dict.fromkeys(prs)}
+        self._interval = {n: min_interval for n in self.status}
+
+    def poll(self, number: int) -> bool:
+        """Refresh one PR; returns whether anything changed since the previous poll."""
+        status = self.status[number]
+        status.polls += 1
+        pr, changed = self.fetcher.get(f"repos/{self.repo}/pulls/{number}")
+        status.head_sha = str((pr.get("head") or {}).get("sha") or "")
+        runs: list[dict[str, Any]] = []
+        combined: dict[str, Any] = {}
+        if not pr.get("merged") and pr.get("state") != "closed" and status.head_sha:
+            checks, runs_changed = self.fetcher.get(f"repos/{self.repo}/commits/{status.head_sha}/check-runs?per_page=100")
+            combined, status_changed = self.fetcher.get(f"repos/{self.repo}/commits/{status.head_sha}/status")
+            runs = list((checks or {}).get("check_runs") or [])
+            combined = combined or {}
+            changed = changed or runs_changed or status_changed
+        classify(pr, runs, combined, status)
+        return changed
+
+    def _next_interval(self, number: int, changed: bool) -> float:
+        base = self.min_interval if changed else min(self.max_interval, self._interval[number] * 2)
+        self._interval[number] = base
+        return self.rng.uniform(base / 2, base)
+
+    def watch(self, timeout: float) -> Iterator[PRStatus]:
+        """Yield each PR as it reaches a terminal state; stops at `timeout` seconds."""
+        deadline = self.clock() + timeout
+        due = {n: 0.0 for n in self.status}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(due)))) as pool:
+            while due:
+                now = self.clock()
+                ready = [n for n, at in due.items() if at <= now]
+                for number, changed in zip(ready, pool.map(self._safe_poll, ready)):
+                    if self.status[number].state in TERMINAL[self.until]:
+                        del due[number]
+                        yield self.status[number]
+                    else:
+                        due[number] = self.clock() + self._next_interval(number, changed)
+                if not due:
+                    return
+                now = self.clock()
+                if now >= deadline:
+                    return
+                self.sleep(max(0.0, min(min(due.values()), deadline) - now))
+
+    def _safe_poll(self, number: int) -> bool:
+        try:
+            return self.poll(number)
+        except GitHubAPIError as exc:
+            if exc.status not in {404, 500, 502, 503, 504}:
+                raise
+            # Transient (or not yet visible) PR: retry on the next, backed-off round.
+            return False
+
+    def stats(self) -> dict[str, int]:
+        return {"requests": self.fetcher.requests, "not_modified": self.fetcher.not_modified}
+
+
+def wait_for_commit(
+    repo: str,
+    sha: str,
+    timeout: float,
+    required: frozenset[str] = frozenset(),
+    min_interval: float = 5.0,
+    max_interval: float = 60.0,
+    client: GitHubClient | None = None,
+    rng: random.Random | None = None,
+) -> PRStatus:
+    """Wait until the checks on one commit pass or fail; `state` stays "pending" on timeout."""
+    fetcher = ConditionalFetcher(client or get_client())
+    rng = rng or random.Random()
+    status = PRStatus(0, head_sha=sha)
+    deadline = time.monotonic() + timeout
+    interval = min_interval
+    while True:
+        status.polls += 1
+        checks, runs_changed = fetcher.get(f"repos/{repo}/commits/{sha}/check-runs?per_page=100")
+        combined, status_changed = fetcher.get(f"repos/{repo}/commits/{sha}/status")
+        classify({"state": "open"}, list((checks or {}).get("check_runs") or []), combined or {}, status, required)
+        if status.state != "pending" or time.monotonic() >= deadline:
+            return status
+        interval = min_interval if runs_changed or status_changed else min(max_interval, interval * 2)
+        time.sleep(min(rng.uniform(interval / 2, interval), max(0.0, deadline - time.monotonic())))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repo", required=True)
+    parser.add_argument("--pr", type=int, action="append", required=True, help="PR number; repeat for several.")
+    parser.add_argument("--until", choices=sorted(TERMINAL), default="checks")
+    parser.add_argument("--all", action="store_true", help="Wait for every PR instead of returning at the first terminal one.")
+    parser.add_argument("--timeout-sec", type=float, default=1800.0)
+    parser.add_argument("--min-interval", type=float, default=5.0)
+    parser.add_argument("--max-interval", type=float, default=60.0)
+    args = parser.parse_args()
+
+    waiter = PRWaiter(args.repo, args.pr, args.until, args.min_interval, args.max_interval)
+    started = time.monotonic()
+    done: list[PRStatus] = []
+    for status in waiter.watch(args.timeout_sec):
+        done.append(status)
+        if not args.all:
+            break
+    finished = {s.number for s in done}
+    timed_out = not done or (args.all and len(finished) < len(waiter.status))
+    print(
+        json.dumps(
+            {
+                "ok": bool(done) and not timed_out and all(s.state in SUCCESS for s in done),
+                "repo": args.repo,
+                "until": args.until,
+                "done": [asdict(s) for s in done],
+                "pending": [asdict(s) for n, s in waiter.status.items() if n not in finished],
+                "timed_out": timed_out,
+                "elapsed_sec": round(time.monotonic() - started, 1),
+                "api": waiter.stats(),
+            },
+            ensure_ascii=False,
+        )
+    )
+    if timed_out:
+        return 2
+    return 0 if all(s.state in SUCCESS for s in done) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Capacity-aware worker selection for dispatch, driven by `config/workers.yaml`."""
+
+from __future__ import annotations
+
+import heapq
+import math
+import sys
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from task_graph import TaskGraph, task_estimate
+
+
+@dataclass
+class WorkerSlot:
+    """One worker's capacity in cost units; a task's cost comes from `costs[task_type]` (default 1)."""
+
+    name: str
+    label: str
+    task_types: frozenset[str]
+    capacity: float = math.inf
+    weight: float = 1.0
+    costs: dict[str, float] = field(default_factory=dict)
+    load: float = 0.0
+
+    @classmethod
+    def from_config(cls, name: str, conf: dict[str, Any]) -> WorkerSlot:
+        raw_capacity = conf.get("max_concurrency")
+        raw_weight = conf.get("weight")
+        try:
+            slot = cls(
+                name=name,
+                label=str(conf.get("label") or f"worker/{name}"),
+                task_types=frozenset(str(x) for x in conf.get("task_types") or []),
+                capacity=math.inf if raw_capacity in (None, "") else float(raw_capacity),
+                weight=1.0 if raw_weight in (None, "") else float(raw_weight),
+                costs={str(k): float(v) for k, v in (conf.get("costs") or {}).items()},
+            )
+        except (TypeError, ValueError, AttributeError):
+            raise ValueError(f"workers.yaml: {name}: max_concurrency, weight and costs must be numbers") from None
+        if not 0 < slot.weight < math.inf:
+            raise ValueError(f"workers.yaml: {name}: weight must be positive")
+        if not slot.capacity > 0 or any(not 0 < cost < math.inf for cost in slot.costs.values()):
+            raise ValueError(f"workers.yaml: {name}: max_concurrency and costs must be positive")
+        return slot
+
+    def cost(self, task_type: str) -> float:
+        return self.costs.get(task_type, 1.0)
+
+    def fits(self, task_type: str) -> bool:
+        return self.load + self.cost(task_type) <= self.capacity
+
+
+class WorkerScheduler:
+    """Places each task on the eligible worker with the lowest utilization after taking it.
+
+    Every task type has a heap of `((load + cost) / weight, name, version)`
+    entries over the workers accepting it. An entry goes stale when its
+    worker's load changes and is dropped when it surfaces; so is a worker that
+    no longer fits the type, since load only grows while dispatching. Ties
+    break on the worker name, so PM nodes reading the same snapshot make the
+    same assignments.
+    """
+
+    def __init__(self, workers: dict[str, dict[str, Any]]) -> None:
+        self.slots = {name: WorkerSlot.from_config(name, conf or {}) for name, conf in sorted(workers.items())}
+        self._version = {name: 0 for name in self.slots}
+        self._heaps: dict[str, list[tuple[float, str, int]]] = {}
+        self._types = frozenset(t for slot in self.slots.values() for t in slot.task_types)
+        for slot in self.slots.values():
+            self._push(slot)
+
+    def _push(self, slot: WorkerSlot) -> None:
+        version = self._version[slot.name]
+        for task_type in slot.task_types:
+            key = (slot.load + slot.cost(task_type)) / slot.weight
+            heapq.heappush(self._heaps.setdefault(task_type, []), (key, slot.name, version))
+
+    def occupy(self, name: str, task_type: str) -> None:
+        """Count a task already owned by `name` (e.g. `in_progress`) against its capacity."""
+        slot = self.slots.get(name)
+        if slot is None:
+            return
+        slot.load += slot.cost(task_type)
+        self._version[name] += 1
+        self._push(slot)
+
+    def release(self, name: str, task_type: str) -> None:
+        """Return the capacity of a finished task, making the worker a candidate again."""
+        slot = self.slots.get(name)
+        if slot is None:
+            return
+        slot.load = max(0.0, slot.load - slot.cost(task_type))
+        self._version[name] += 1
+        self._push(slot)
+
+    def eligible(self, task_type: str) -> bool:
+        return task_type in self._types
+
+    def assign(self, task_type: str) -> WorkerSlot | None:
+        """Reserve capacity for one task on the best fitting worker; None when none has room."""
+        heap = self._heaps.get(task_type) or []
+        while heap:
+            _, name, version = heapq.heappop(heap)
+            if version != self._version[name]:
+                continue
+            slot = self.slots[name]
+            if slot.fits(task_type):
+                self.occupy(name, task_type)
+                return slot
+        return None
+
+    def report(self) -> dict[str, dict[str, Any]]:
+        return {
+            name: {"load": slot.load, "capacity": None if math.isinf(slot.capacity) else slot.capacity}
+            for name, slot in self.slots.items()
+        }
+
+
+def predict_makespan(
+    graph: TaskGraph,
+    workers: dict[str, dict[str, Any]],
+    key: Callable[[str], Any],
+) -> dict[str, Any]:
+    """Simulate dispatching every open task onto `workers` and return the finish time of the last one.
+
+    Each task takes its `estimate`. Open `in_progress` tasks start at time 0
+    on their owner. Whenever tasks finish, the unblocked tasks are started in
+    `key` order wherever `WorkerScheduler` finds room; a task type that does
+    not fit is skipped until the next finish. Tasks with missing
+    dependencies, on a cycle or with no eligible worker never start and are
+    reported as `unschedulable`.
+    """
+    scheduler = WorkerScheduler(workers)
+    nodes = graph.nodes
+    unmet = {tid: graph.unmet[tid] for tid, node in nodes.items() if not node.done}
+    running: list[tuple[float, str, str]] = []
+    ready: dict[str, list[tuple[Any, int, str]]] = {}
+    started: set[str] = set()
+    first_wave: list[dict[str, Any]] = []
+
+    def task_type(tid: str) -> str:
+        return str(nodes[tid].meta.get("task_type") or "")
+
+    for tid in unmet:
+        node = nodes[tid]
+        if str(node.issue.get("state")) == "open" and str(node.meta.get("status") or "") == "in_progress":
+            scheduler.occupy(str(node.meta.get("owner_worker") or ""), task_type(tid))
+            started.add(tid)
+            heapq.heappush(running, (task_estimate(node.meta), tid, str(node.meta.get("owner_worker") or "")))
+        elif unmet[tid] == 0 and scheduler.eligible(task_type(tid)):
+            heapq.heappush(ready.setdefault(task_type(tid), []), (key(tid), int(node.issue["number"]), tid))
+
+    now = 0.0
+    while True:
+        full: set[str] = set()
+        while True:
+            heads = [(heap[0], kind) for kind, heap in ready.items() if heap and kind not in full]
+            if not heads:
+                break
+            _, kind = min(heads)
+            slot = scheduler.assign(kind)
+            if slot is None:
+                full.add(kind)
+                continue
+            _, _, tid = heapq.heappop(ready[kind])
+            started.add(tid)
+            heapq.heappush(running, (now + task_estimate(nodes[tid].meta), tid, slot.name))
+            if now == 0:
+                first_wave.append({"task_id": tid, "issue": int(nodes[tid].issue["number"]), "worker": slot.name})
+        if not running:
+            break
+        now = running[0][0]
+        while running and running[0][0] == now:
+            _, tid, worker = heapq.heappop(running)
+            scheduler.release(worker, task_type(tid))
+            for child in graph.dependents[tid]:
+                if child not in unmet or child in started:
+                    continue
+                unmet[child] -= 1
+                if unmet[child] == 0 and scheduler.eligible(task_type(child)):
+                    heapq.heappush(ready.setdefault(task_type(child), []), (key(child), int(nodes[child].issue["number"]), child))
+
+    unschedulable = sorted(set(unmet) - started)
+    return {
+        "makespan": round(now, 3),
+        "tasks": len(started),
+        "unschedulable": unschedulable,
+        "first_wave": first_wave,
+    }
+
+
+if __name__ == "__main__":
+    print("scheduler.py is a library module", file=sys.stderr)
+    sys.exit(1)
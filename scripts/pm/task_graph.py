@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Task dependency graph built from the task snapshot."""
+
+from __future__ import annotations
+
+import math
+import sys
+from dataclasses import dataclass, field
+from typing import Any
+
+from common import issue_labels
+from frontmatter_codec import parse_frontmatter
+
+
+def normalize_dep_list(raw: Any) -> list[str]:
+    if isinstance(raw, list):
+        return [str(x).strip() for x in raw if str(x).strip()]
+    if isinstance(raw, str) and raw.strip():
+        return [raw.strip()]
+    return []
+
+
+def task_done(issue: dict[str, Any], meta: dict[str, Any]) -> bool:
+    if str(issue.get("state")) == "closed":
+        return True
+    if str(meta.get("status") or "").lower() == "done":
+        return True
+    return "status/done" in issue_labels(issue)
+
+
+def task_estimate(meta: dict[str, Any]) -> float:
+    """The `estimate` frontmatter field in arbitrary time units; 1 when unset or not a positive finite number."""
+    try:
+        value = float(meta.get("estimate") or 1)
+    except (TypeError, ValueError):
+        return 1.0
+    return value if math.isfinite(value) and value > 0 else 1.0
+
+
+def task_priority(meta: dict[str, Any]) -> int:
+    """The `priority` frontmatter field; higher goes first, 0 when unset."""
+    try:
+        return int(meta.get("priority") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+@dataclass
+class TaskNode:
+    task_id: str
+    issue: dict[str, Any]
+    meta: dict[str, Any]
+    depends_on: list[str] = field(default_factory=list)
+    done: bool = False
+
+
+class TaskGraph:
+    """Tasks keyed by `task_id` with a reverse-dependency index.
+
+    `unmet[task_id]` counts dependencies that are not done (missing ones included),
+    so readiness is an O(1) lookup and `mark_done` only visits direct dependents.
+    `issue_meta` keeps the parsed frontmatter of every issue, task id or not.
+    """
+
+    def __init__(self, nodes: dict[str, TaskNode], issue_meta: dict[int, dict[str, Any]] | None = None) -> None:
+        self.nodes = nodes
+        self.issue_meta = issue_meta if issue_meta is not None else {int(n.issue["number"]): n.meta for n in nodes.values()}
+        self.dependents: dict[str, list[str]] = {tid: [] for tid in nodes}
+        self.unmet: dict[str, int] = {}
+        self.missing: dict[str, list[str]] = {}
+        for tid, node in nodes.items():
+            unmet = 0
+            for dep in node.depends_on:
+                dep_node = nodes.get(dep)
+                if dep_node is None:
+                    self.missing.setdefault(tid, []).append(dep)
+                    unmet += 1
+                    continue
+                self.dependents[dep].append(tid)
+                if not dep_node.done:
+                    unmet += 1
+            self.unmet[tid] = unmet
+
+    @classmethod
+    def from_issues(cls, issues: list[dict[str, Any]]) -> TaskGraph:
+        nodes: dict[str, TaskNode] = {}
+        issue_meta: dict[int, dict[str, Any]] = {}
+        for issue in issues:
+            meta, _ = parse_frontmatter(str(issue.get("body") or ""))
+            issue_meta[int(issue["number"])] = meta
+            tid = str(meta.get("task_id") or "").strip()
+            if tid:
+                nodes[tid] = TaskNode(
+                    task_id=tid,
+                    issue=issue,
+                    meta=meta,
+                    depends_on=normalize_dep_list(meta.get("depends_on")),
+                    done=task_done(issue, meta),
+                )
+        return cls(nodes, issue_meta)
+
+    def is_unblocked(self, task_id: str) -> bool:
+        return self.unmet.get(task_id, 1) == 0
+
+    def deps_done(self, depends_on: list[str]) -> bool:
+        for dep in depends_on:
+            node = self.nodes.get(dep)
+            if node is None or not node.done:
+                return False
+        return True
+
+    def mark_done(self, task_id: str) -> list[str]:
+        """Mark a task done and return the direct dependents that became unblocked."""
+        node = self.nodes.get(task_id)
+        if node is None or node.done:
+            return []
+        node.done = True
+        unblocked: list[str] = []
+        for dep_id in self.dependents[task_id]:
+            self.unmet[dep_id] -= 1
+            if self.unmet[dep_id] == 0:
+                unblocked.append(dep_id)
+        return unblocked
+
+    def critical_paths(self) -> dict[str, tuple[int, float]]:
+        """`(depth, weight)` of the longest chain of open tasks gated by each open task.
+
+        Depth counts the tasks on the chain and weight sums their `estimate`s,
+        the task itself included. Depth and weight may come from different
+        chains. Tasks on or behind a dependency cycle only count themselves.
+        """
+        pending = {tid: 0 for tid, node in self.nodes.items() if not node.done}
+        for tid in pending:
+            pending[tid] = sum(1 for dep in self.nodes[tid].depends_on if dep in pending)
+        order = [tid for tid, count in pending.items() if count == 0]
+        for tid in order:
+            for child in self.dependents[tid]:
+                if child in pending:
+                    pending[child] -= 1
+                    if pending[child] == 0:
+                        order.append(child)
+
+        paths = {tid: (1, task_estimate(self.nodes[tid].meta)) for tid in pending}
+        for tid in reversed(order):
+            depth, weight = paths[tid]
+            below = [paths[child] for child in self.dependents[tid] if child in pending]
+            if below:
+                paths[tid] = (depth + max(d for d, _ in below), weight + max(w for _, w in below))
+        return paths
+
+    def priority_key(self, task_id: str, paths: dict[str, tuple[int, float]]) -> tuple[int, float, int]:
+        """Sort key for dispatch: higher `priority`, then the heavier and deeper critical path first."""
+        node = self.nodes.get(task_id)
+        if node is None:
+            return (0, -1.0, -1)
+        depth, weight = paths.get(task_id, (1, task_estimate(node.meta)))
+        return (-task_priority(node.meta), -weight, -depth)
+
+    def find_cycles(self) -> list[list[str]]:
+        """Strongly connected components that form dependency cycles (iterative Tarjan)."""
+        index: dict[str, int] = {}
+        low: dict[str, int] = {}
+        on_stack: set[str] = set()
+        stack: list[str] = []
+        cycles: list[list[str]] = []
+        counter = 0
+        for start in self.nodes:
+            if start in index:
+                continue
+            work: list[tuple[str, int]] = [(start, 0)]
+            while work:
+                tid, pos = work.pop()
+                if pos == 0:
+                    index[tid] = low[tid] = counter
+                    counter += 1
+                    stack.append(tid)
+                    on_stack.add(tid)
+                deps = [d for d in self.nodes[tid].depends_on if d in self.nodes]
+                if pos < len(deps):
+                    work.append((tid, pos + 1))
+                    dep = deps[pos]
+                    if dep not in index:
+                        work.append((dep, 0))
+                    elif dep in on_stack:
+                        low[tid] = min(low[tid], index[dep])
+                    continue
+                if low[tid] == index[tid]:
+                    component: list[str] = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == tid:
+                            break
+                    if len(component) > 1 or tid in self.nodes[tid].depends_on:
+                        cycles.append(sorted(component))
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[tid])
+        return cycles
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "tasks": len(self.nodes),
+            "missing_dependencies": {tid: deps for tid, deps in sorted(self.missing.items())},
+            "cycles": self.find_cycles(),
+        }
+
+
+if __name__ == "__main__":
+    print("task_graph.py is a library module", file=sys.stderr)
+    sys.exit(1)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Task issue snapshot: batched GraphQL loader plus a watermark-synced local cache."""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from common import gh_api, issue_labels, iter_task_issues, parse_iso
+
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_COMMENTS = 20
+FULL_SYNC_INTERVAL = dt.timedelta(hours=6)
+
+TASK_ISSUES_QUERY = """
+query($owner: String!, $name: String!, $cursor: String, $pageSize: Int!, $comments: Int!, $since: DateTime) {
+  repository(owner: $owner, name: $name) {
+    issues(
+      first: $pageSize
+      after: $cursor
+      filterBy: {labels: ["type/task"], since: $since}
+      states: [OPEN, CLOSED]
+      orderBy: {field: CREATED_AT, direction: ASC}
+    ) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number
+        title
+        body
+        state
+        updatedAt
+        url
+        labels(first: 50) { nodes { name } }
+        comments(last: $comments) { nodes { body } }
+      }
+    }
+  }
+}
+"""
+
+
+def _rest_shape(node: dict[str, Any]) -> dict[str, Any]:
+    """Map a GraphQL issue node onto the REST issue fields the PM scripts read."""
+    labels = (node.get("labels") or {}).get("nodes") or []
+    comments = (node.get("comments") or {}).get("nodes") or []
+    return {
+        "number": int(node["number"]),
+        "title": node.get("title") or "",
+        "body": node.get("body") or "",
+        "state": str(node.get("state") or "").lower(),
+        "updated_at": node.get("updatedAt") or "",
+        "html_url": node.get("url") or "",
+        "labels": [{"name": x["name"]} for x in labels if isinstance(x, dict) and x.get("name")],
+        "recent_comments": [{"body": x.get("body") or ""} for x in comments if isinstance(x, dict)],
+    }
+
+
+def iter_task_snapshot(
+    repo: str,
+    comments: int = DEFAULT_COMMENTS,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    since: str | None = None,
+) -> Iterator[dict[str, Any]]:
+    owner, _, name = repo.partition("/")
+    cursor: str | None = None
+    while True:
+        data = gh_api(
+            "graphql",
+            method="POST",
+            payload={
+                "query": TASK_ISSUES_QUERY,
+                "variables": {
+                    "owner": owner,
+                    "name": name,
+                    "cursor": cursor,
+                    "pageSize": page_size,
+                    "comments": comments,
+                    "since": since,
+                },
+            },
+        )
+        if not isinstance(data, dict):
+            raise RuntimeError("graphql task snapshot returned a non-object response")
+        if data.get("errors"):
+            messages = "; ".join(str(e.get("message") or e) for e in data["errors"] if isinstance(e, dict))
+            raise RuntimeError(f"graphql task snapshot failed: {messages or data['errors']}")
+        repository = (data.get("data") or {}).get("repository")
+        if not isinstance(repository, dict):
+            raise RuntimeError(f"graphql task snapshot: repository {repo} not found")
+        issues = repository["issues"]
+        for node in issues.get("nodes") or []:
+            if isinstance(node, dict):
+                yield _rest_shape(node)
+        page = issues.get("pageInfo") or {}
+        if not page.get("hasNextPage"):
+            return
+        cursor = page.get("endCursor")
+
+
+def load_task_snapshot(
+    repo: str,
+    loader: str = "graphql",
+    comments: int = DEFAULT_COMMENTS,
+    since: str | None = None,
+) -> list[dict[str, Any]]:
+    """Return task issues (only those updated at/after `since` when given); `rest` omits `recent_comments`."""
+    if loader == "rest":
+        return list(iter_task_issues(repo, since=since))
+    return list(iter_task_snapshot(repo, comments=comments, since=since))
+
+
+class TaskSnapshotStore:
+    """Task snapshot cached under `state/snapshot/` and advanced by an `updated_at` watermark.
+
+    Incremental syncs only fetch issues updated since the watermark and merge them
+    in; a full reload every `FULL_SYNC_INTERVAL` repairs drift such as issues that
+    lost the `type/task` label.
+    """
+
+    def __init__(self, root: Path, repo: str) -> None:
+        self.repo = repo
+        self.path = root / "state" / "snapshot" / f"{repo.replace('/', '__')}.json"
+        self.issues: dict[int, dict[str, Any]] = {}
+        self.watermark = ""
+        self.full_sync_at: dt.datetime | None = None
+        self.stats: dict[str, Any] = {}
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return
+        if not isinstance(data, dict) or data.get("repo") != self.repo:
+            return
+        self.issues = {int(x["number"]): x for x in data.get("issues") or [] if isinstance(x, dict)}
+        self.watermark = str(data.get("watermark") or "")
+        self.full_sync_at = parse_iso(data.get("full_sync_at"))
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "repo": self.repo,
+            "watermark": self.watermark,
+            "full_sync_at": self.full_sync_at.isoformat().replace("+00:00", "Z") if self.full_sync_at else None,
+            "issues": list(self.issues.values()),
+        }
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _full_sync_due(self) -> bool:
+        if not self.watermark or self.full_sync_at is None:
+            return True
+        return dt.datetime.now(dt.timezone.utc) - self.full_sync_at >= FULL_SYNC_INTERVAL
+
+    def sync(self, loader: str = "graphql", comments: int = DEFAULT_COMMENTS, full: bool = False) -> list[dict[str, Any]]:
+        self._load()
+        if full or self._full_sync_due():
+            fetched = load_task_snapshot(self.repo, loader=loader, comments=comments)
+            self.issues = {int(x["number"]): x for x in fetched}
+            self.full_sync_at = dt.datetime.now(dt.timezone.utc)
+            self.watermark = ""
+            mode = "full"
+        else:
+            fetched = load_task_snapshot(self.repo, loader=loader, comments=comments, since=self.watermark)
+            for issue in fetched:
+                self.issues[int(issue["number"])] = issue
+            mode = "incremental"
+        # Only fetched issues move the watermark; see `apply`.
+        self.watermark = max([self.watermark] + [str(x.get("updated_at") or "") for x in fetched])
+        self._save()
+        self.stats = {"mode": mode, "fetched": len(fetched), "total": len(self.issues), "watermark": self.watermark}
+        return self.task_issues()
+
+    def task_issues(self) -> list[dict[str, Any]]:
+        return [self.issues[n] for n in sorted(self.issues)]
+
+    def apply(self, issue: dict[str, Any], comment: str | None = None) -> None:
+        """Fold an issue returned by one of our own writes into the in-memory snapshot.
+
+        The watermark is left alone so the next sync still picks up changes made by
+        others between our fetch and our write.
+        """
+        number = int(issue["number"])
+        previous = self.issues.get(number)
+        if "type/task" not in issue_labels(issue):
+            self.issues.pop(number, None)
+            return
+        merged = dict(issue)
+        if previous is not None and "recent_comments" in previous and "recent_comments" not in merged:
+            merged["recent_comments"] = list(previous["recent_comments"])
+            if comment is not None:
+                merged["recent_comments"].append({"body": comment})
+        self.issues[number] = merged
+
+
+def recent_comment_bodies(repo: str, issue: dict[str, Any]) -> list[str]:
+    """Comments from the snapshot when present, otherwise fetched over REST."""
+    comments = issue.get("recent_comments")
+    if comments is None:
+        comments = gh_api(f"repos/{repo}/issues/{int(issue['number'])}/comments?per_page=100")
+    if not isinstance(comments, list):
+        return []
+    return [str(c.get("body") or "") for c in comments if isinstance(c, dict)]
+
+
+if __name__ == "__main__":
+    print("task_snapshot.py is a library module", file=sys.stderr)
+    sys.exit(1)
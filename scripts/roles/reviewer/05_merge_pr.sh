@@ -42,64 +42,28 @@ if [[ "$DELETE_BRANCH" != "true" && "$DELETE_BRANCH" != "false" ]]; then
   exit 1
 fi
 
+PM_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")/../../pm" && pwd)"
+
 wait_for_checks() {
   local repo="$1"
   local pr="$2"
   local timeout="$3"
   local poll="$4"
-
-  local sha
-  sha="$(gh pr view "$pr" --repo "$repo" --json headRefOid -q '.headRefOid')"
-  local started
-  started="$(date +%s)"
-
-  while true; do
-    export CHECKS_JSON
-    CHECKS_JSON="$(gh api "repos/${repo}/commits/${sha}/check-runs" 2>/dev/null || true)"
-
-    read -r total pending failed <<<"$(python3 - <<'PY'
-import json
-import os
-
-raw = os.environ.get("CHECKS_JSON", "")
-if not raw.strip():
-    print("0 0 0")
-    raise SystemExit(0)
-obj = json.loads(raw)
-runs = obj.get("check_runs", [])
-total = len(runs)
-pending = 0
-failed = 0
-ok_conclusions = {"success", "neutral", "skipped"}
-for run in runs:
-    status = str(run.get("status") or "")
-    conclusion = str(run.get("conclusion") or "")
-    if status != "completed":
-        pending += 1
-    elif conclusion not in ok_conclusions:
-        failed += 1
-print(f"{total} {pending} {failed}")
-PY
-)"
-
-    if [[ "$total" -gt 0 && "$pending" -eq 0 ]]; then
-      if [[ "$failed" -gt 0 ]]; then
-        gh pr checks "$pr" --repo "$repo" || true
-        echo "Checks failed for PR #$pr" >&2
-        return 1
-      fi
-      return 0
-    fi
-
-    local now
-    now="$(date +%s)"
-    if (( now - started > timeout )); then
-      gh pr checks "$pr" --repo "$repo" || true
-      echo "Timed out waiting checks for PR #$pr" >&2
-      return 1
-    fi
-    sleep "$poll"
-  done
+  local code=0
+
+  # Conditional requests with backoff from --poll-sec up; exits 1 on failed checks, 2 on timeout.
+  python3 "${PM_DIR}/pr_waiter.py" --repo "$repo" --pr "$pr" --until checks \
+    --timeout-sec "$timeout" --min-interval "$poll" >/dev/null || code=$?
+  if [[ "$code" -eq 0 ]]; then
+    return 0
+  fi
+  gh pr checks "$pr" --repo "$repo" || true
+  if [[ "$code" -eq 2 ]]; then
+    echo "Timed out waiting checks for PR #$pr" >&2
+  else
+    echo "Checks failed for PR #$pr" >&2
+  fi
+  return 1
 }
 
 if [[ "$WAIT_CHECKS" == "true" ]]; then
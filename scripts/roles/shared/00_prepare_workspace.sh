@@ -29,22 +29,21 @@ fi
 TARGET="${WORKSPACE_ROOT}/$(basename "$REPO")"
 mkdir -p "$WORKSPACE_ROOT"
 
-if [[ -d "${TARGET}/.git" ]]; then
-  git -C "$TARGET" fetch origin "$BRANCH"
-  git -C "$TARGET" checkout "$BRANCH"
-  git -C "$TARGET" pull --ff-only origin "$BRANCH"
-else
-  git clone "https://github.com/${REPO}.git" "$TARGET"
-  git -C "$TARGET" checkout "$BRANCH"
-fi
-
+# Workspaces borrow objects from a shared bare mirror; only the mirror fetches over the network.
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+python3 "${SCRIPT_DIR}/../../worker/repo_cache.py" sync \
+  --url "https://github.com/${REPO}.git" \
+  --workspace "$TARGET" \
+  --branch "$BRANCH" >/dev/null
+
+VENV_PYTHON=""
 if [[ "$INSTALL_DEPS" == "true" && -f "${TARGET}/requirements.txt" ]]; then
-  python3 -m pip install -q -r "${TARGET}/requirements.txt"
+  VENV_PYTHON="$(python3 "${SCRIPT_DIR}/../../worker/venv_cache.py" ensure --requirements "${TARGET}/requirements.txt" --print-python)"
 fi
 
 HEAD_SHA="$(git -C "$TARGET" rev-parse HEAD)"
 
 python3 - <<PY
 import json
-print(json.dumps({"ok": True, "repo": "${REPO}", "workspace": "${TARGET}", "branch": "${BRANCH}", "head": "${HEAD_SHA}"}, ensure_ascii=False))
+print(json.dumps({"ok": True, "repo": "${REPO}", "workspace": "${TARGET}", "branch": "${BRANCH}", "head": "${HEAD_SHA}", "venv_python": "${VENV_PYTHON}"}, ensure_ascii=False))
 PY
@@ -24,41 +24,32 @@ if [[ "$STATUS" != "in_progress" && "$STATUS" != "ready" && "$STATUS" != "all" ]
   exit 1
 fi
 
-ISSUES_JSON="$(gh api "repos/${REPO}/issues?state=open&labels=type/task&per_page=100")"
-export ISSUES_JSON STATUS WORKER
+ROOT="$(git rev-parse --show-toplevel 2>/dev/null || true)"
+if [[ -z "$ROOT" ]]; then
+  echo "Run inside generated project root" >&2
+  exit 1
+fi
+
+PM_DIR="${ROOT}/scripts/pm"
+export PM_DIR REPO STATUS WORKER
 
 python3 - <<'PY'
 import json
 import os
-import re
+import sys
+
+sys.path.insert(0, os.environ["PM_DIR"])
+from common import iter_task_issues
+from frontmatter_codec import parse_frontmatter
 
-issues = json.loads(os.environ.get("ISSUES_JSON", "[]"))
 status_filter = os.environ.get("STATUS", "in_progress")
 worker = os.environ.get("WORKER", "")
-if not isinstance(issues, list):
-    issues = []
-
-def parse_meta(body: str) -> dict:
-    text = body or ""
-    lines = text.splitlines()
-    out = {}
-    if len(lines) >= 3 and lines[0].strip() == "---":
-        for line in lines[1:]:
-            if line.strip() == "---":
-                break
-            m = re.match(r"^([A-Za-z0-9_]+):\s*(.*)$", line.strip())
-            if not m:
-                continue
-            out[m.group(1)] = m.group(2).strip().strip('"').strip("'")
-    return out
 
 items = []
-for issue in issues:
-    if not isinstance(issue, dict) or "pull_request" in issue:
-        continue
-    meta = parse_meta(str(issue.get("body") or ""))
-    status = str(meta.get("status", ""))
-    owner_worker = str(meta.get("owner_worker", ""))
+for issue in iter_task_issues(os.environ["REPO"], state="open"):
+    meta, _ = parse_frontmatter(str(issue.get("body") or ""))
+    status = str(meta.get("status") or "")
+    owner_worker = str(meta.get("owner_worker") or "")
     if status_filter != "all" and status != status_filter:
         continue
     if owner_worker and owner_worker != worker:
@@ -67,8 +58,8 @@ for issue in issues:
         {
             "issue": issue.get("number"),
             "title": issue.get("title"),
-            "task_id": meta.get("task_id", ""),
-            "task_type": meta.get("task_type", ""),
+            "task_id": str(meta.get("task_id") or ""),
+            "task_type": str(meta.get("task_type") or ""),
             "status": status,
             "owner_worker": owner_worker,
             "url": issue.get("html_url"),
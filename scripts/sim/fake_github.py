@@ -0,0 +1,786 @@
+#!/usr/bin/env python3
+"""In-memory stand-in for the GitHub REST and GraphQL endpoints used by the PM and worker scripts."""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import datetime as dt
+import hashlib
+import json
+import re
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+
+import yaml
+
+PER_PAGE_DEFAULT = 30
+PER_PAGE_MAX = 100
+REPO = r"/repos/(?P<owner>[^/]+)/(?P<name>[^/]+)"
+CLOSING_RE = re.compile(r"(?i)\b(?:close[sd]?|fix(?:e[sd])?|resolve[sd]?)\s+#(\d+)")
+
+
+class FakeError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _iso(ts: float) -> str:
+    return dt.datetime.fromtimestamp(ts, dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _public(obj: dict[str, Any]) -> dict[str, Any]:
+    return {k: v for k, v in obj.items() if not k.startswith("_")}
+
+
+def _labels_of(raw: Any) -> list[dict[str, str]]:
+    names = [x.get("name") if isinstance(x, dict) else x for x in raw or []]
+    return [{"name": str(n)} for n in dict.fromkeys(names) if n]
+
+
+@dataclass
+class Bucket:
+    """One rate-limit resource; `limit=0` never runs out."""
+
+    limit: int
+    window: float
+    used: int = 0
+    reset: float = 0.0
+
+    def _roll(self, now: float) -> None:
+        if now >= self.reset:
+            self.used = 0
+            self.reset = now + self.window
+
+    def exhausted(self, now: float) -> bool:
+        self._roll(now)
+        return bool(self.limit) and self.used >= self.limit
+
+    def take(self, now: float) -> None:
+        self._roll(now)
+        self.used += 1
+
+    def headers(self, resource: str) -> dict[str, str]:
+        limit = self.limit or 1_000_000
+        return {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(max(0, limit - self.used)),
+            "X-RateLimit-Used": str(self.used),
+            "X-RateLimit-Reset": str(int(self.reset)),
+            "X-RateLimit-Resource": resource,
+        }
+
+
+@dataclass
+class RepoState:
+    full_name: str
+    next_number: int = 1
+    issues: dict[int, dict[str, Any]] = field(default_factory=dict)
+    comments: dict[int, list[dict[str, Any]]] = field(default_factory=dict)
+    pulls: dict[int, dict[str, Any]] = field(default_factory=dict)
+    reviews: dict[int, list[dict[str, Any]]] = field(default_factory=dict)
+    check_runs: dict[str, list[dict[str, Any]]] = field(default_factory=dict)
+    statuses: dict[str, list[dict[str, Any]]] = field(default_factory=dict)
+    refs: dict[str, str] = field(default_factory=dict)
+    labels: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+
+Handler = Callable[..., Any]
+
+
+class FakeGitHub:
+    """Repositories, issues, PRs and checks held in memory behind one lock.
+
+    Repositories spring into existence on first use. Issues and PRs share one
+    number sequence per repository and PRs show up in the issue list, as on
+    GitHub. New PR heads get `checks` as check runs that complete successfully
+    `check_delay` seconds later; with `require_checks`, merging waits for them.
+    GET responses carry ETags (a matching `If-None-Match` gets a 304 that costs
+    no rate limit) and every API response carries `X-RateLimit-*` headers for
+    the `core` or `graphql` bucket, which answer 403 once spent until reset.
+    """
+
+    def __init__(
+        self,
+        login: str = "fake-user",
+        token: str = "",
+        rate_limit: int = 5000,
+        graphql_limit: int = 5000,
+        rate_window: float = 3600.0,
+        checks: list[str] | None = None,
+        check_delay: float = 0.0,
+        require_checks: bool = True,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.login = login
+        self.token = token
+        self.checks = list(checks or [])
+        self.check_delay = check_delay
+        self.require_checks = require_checks
+        self.clock = clock
+        self.rate_limit = rate_limit
+        self.graphql_limit = graphql_limit
+        self.rate_window = rate_window
+        self._lock = threading.Lock()
+        self._routes: list[tuple[str, re.Pattern[str], str, Handler]] = []
+        for method, pattern, handler in [
+            ("GET", r"/user", self._get_user),
+            ("GET", r"/rate_limit", self._get_rate_limit),
+            ("POST", r"/graphql", self._graphql),
+            ("GET", r"/_fake/stats", self._fake_stats),
+            ("POST", r"/_fake/reset", self._fake_reset),
+            ("POST", rf"/_fake{REPO}/issues", self._fake_seed),
+            ("GET", rf"{REPO}", self._get_repo),
+            ("GET", rf"{REPO}/labels", self._list_labels),
+            ("POST", rf"{REPO}/labels", self._create_label),
+            ("GET", rf"{REPO}/issues", self._list_issues),
+            ("POST", rf"{REPO}/issues", self._create_issue),
+            ("GET", rf"{REPO}/issues/(?P<n>\d+)", self._get_issue),
+            ("PATCH", rf"{REPO}/issues/(?P<n>\d+)", self._patch_issue),
+            ("GET", rf"{REPO}/issues/(?P<n>\d+)/comments", self._list_comments),
+            ("POST", rf"{REPO}/issues/(?P<n>\d+)/comments", self._create_comment),
+            ("POST", rf"{REPO}/issues/(?P<n>\d+)/labels", self._add_labels),
+            ("DELETE", rf"{REPO}/issues/(?P<n>\d+)/labels/(?P<label>[^/]+)", self._remove_label),
+            ("GET", rf"{REPO}/pulls", self._list_pulls),
+            ("POST", rf"{REPO}/pulls", self._create_pull),
+            ("GET", rf"{REPO}/pulls/(?P<n>\d+)", self._get_pull),
+            ("PATCH", rf"{REPO}/pulls/(?P<n>\d+)", self._patch_pull),
+            ("PUT", rf"{REPO}/pulls/(?P<n>\d+)/merge", self._merge_pull),
+            ("GET", rf"{REPO}/pulls/(?P<n>\d+)/reviews", self._list_reviews),
+            ("POST", rf"{REPO}/pulls/(?P<n>\d+)/reviews", self._create_review),
+            ("GET", rf"{REPO}/commits/(?P<sha>[^/]+)/check-runs", self._list_check_runs),
+            ("POST", rf"{REPO}/check-runs", self._create_check_run),
+            ("PATCH", rf"{REPO}/check-runs/(?P<id>\d+)", self._patch_check_run),
+            ("GET", rf"{REPO}/commits/(?P<sha>[^/]+)/status", self._combined_status),
+            ("POST", rf"{REPO}/statuses/(?P<sha>[^/]+)", self._create_status),
+            ("DELETE", rf"{REPO}/git/refs/heads/(?P<ref>.+)", self._delete_ref),
+        ]:
+            template = re.sub(r"\(\?P<(\w+)>[^)]*\)", r"{\1}", pattern)
+            self._routes.append((method, re.compile(f"^{pattern}$"), template, handler))
+        self._reset()
+
+    def _reset(self) -> None:
+        self.repos: dict[str, RepoState] = {}
+        self._ids = 0
+        self._buckets = {
+            "core": Bucket(self.rate_limit, self.rate_window),
+            "graphql": Bucket(self.graphql_limit, self.rate_window),
+        }
+        self.requests: Counter[str] = Counter()
+        self.not_modified = 0
+        self.rate_limited = 0
+
+    def _next_id(self) -> int:
+        self._ids += 1
+        return self._ids
+
+    def _repo(self, owner: str, name: str) -> RepoState:
+        full_name = f"{owner}/{name}"
+        if full_name not in self.repos:
+            self.repos[full_name] = RepoState(full_name)
+        return self.repos[full_name]
+
+    # -- dispatch --------------------------------------------------------
+
+    def handle(
+        self, method: str, target: str, body: bytes, headers: dict[str, str], base_url: str = ""
+    ) -> tuple[int, dict[str, str], Any]:
+        """Serve one request; `headers` keys are lower-case. Returns (status, headers, JSON data)."""
+        parts = urllib.parse.urlsplit(target)
+        path = "/" + parts.path.strip("/")
+        query = {k: v[-1] for k, v in urllib.parse.parse_qs(parts.query).items()}
+        try:
+            payload = json.loads(body) if body.strip() else {}
+        except json.JSONDecodeError:
+            return 400, {}, {"message": "Problems parsing JSON"}
+        with self._lock:
+            now = self.clock()
+            for route_method, pattern, template, handler in self._routes:
+                match = pattern.match(path)
+                if match is None or route_method != method:
+                    continue
+                self.requests[f"{method} {template}"] += 1
+                if template.startswith("/_fake"):
+                    return 200, {}, handler(payload=payload, query=query, **match.groupdict())
+                return self._api(method, template, handler, match.groupdict(), query, payload, headers, base_url, now)
+            self.requests[f"{method} <unknown>"] += 1
+            return 404, {}, {"message": "Not Found", "documentation_url": "https://docs.github.com/rest"}
+
+    def _api(
+        self,
+        method: str,
+        template: str,
+        handler: Handler,
+        params: dict[str, str],
+        query: dict[str, str],
+        payload: Any,
+        headers: dict[str, str],
+        base_url: str,
+        now: float,
+    ) -> tuple[int, dict[str, str], Any]:
+        if self.token and headers.get("authorization", "").split(" ")[-1] != self.token:
+            return 401, {}, {"message": "Bad credentials"}
+        resource = "graphql" if template == "/graphql" else "core"
+        bucket = self._buckets[resource]
+        if bucket.exhausted(now):
+            self.rate_limited += 1
+            return 403, bucket.headers(resource), {"message": f"API rate limit exceeded for user {self.login}."}
+        try:
+            result = handler(payload=payload, query=query, base_url=base_url, now=now, **params)
+        except FakeError as exc:
+            bucket.take(now)
+            return exc.status, bucket.headers(resource), {"message": exc.message}
+        status, data = result[0], result[1]
+        out_headers = dict(result[2]) if len(result) > 2 else {}
+        if method == "GET" and status == 200:
+            etag = 'W/"%s"' % hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+            out_headers["ETag"] = etag
+            if headers.get("if-none-match") == etag:
+                self.not_modified += 1
+                return 304, {**out_headers, **bucket.headers(resource)}, None
+        bucket.take(now)
+        return status, {**out_headers, **bucket.headers(resource)}, data
+
+    def _page(self, items: list[Any], query: dict[str, str], base_url: str, path: str) -> tuple[int, list[Any], dict[str, str]]:
+        per_page = max(1, min(PER_PAGE_MAX, int(query.get("per_page") or PER_PAGE_DEFAULT)))
+        page = max(1, int(query.get("page") or 1))
+        last = max(1, -(-len(items) // per_page))
+        links = []
+        for rel, number in (("prev", page - 1), ("next", page + 1), ("first", 1), ("last", last)):
+            if 1 <= number <= last and (rel in {"first", "last"} or number != page):
+                url = f"{base_url}{path}?{urllib.parse.urlencode({**query, 'page': number})}"
+                links.append(f'<{url}>; rel="{rel}"')
+        headers = {"Link": ", ".join(links)} if last > 1 else {}
+        return 200, items[(page - 1) * per_page : page * per_page], headers
+
+    # -- meta ------------------------------------------------------------
+
+    def _get_user(self, **_: Any) -> tuple[int, Any]:
+        return 200, {"login": self.login, "id": 1, "type": "User"}
+
+    def _get_rate_limit(self, now: float, **_: Any) -> tuple[int, Any]:
+        resources = {}
+        for name, bucket in self._buckets.items():
+            bucket.exhausted(now)
+            limit = bucket.limit or 1_000_000
+            resources[name] = {"limit": limit, "used": bucket.used, "remaining": max(0, limit - bucket.used), "reset": int(bucket.reset)}
+        return 200, {"resources": resources, "rate": resources["core"]}
+
+    def _get_repo(self, owner: str, name: str, **_: Any) -> tuple[int, Any]:
+        repo = self._repo(owner, name)
+        return 200, {"full_name": repo.full_name, "name": name, "owner": {"login": owner}, "default_branch": "main", "private": False}
+
+    def _fake_stats(self, **_: Any) -> dict[str, Any]:
+        return {
+            "requests": sum(self.requests.values()),
+            "not_modified": self.not_modified,
+            "rate_limited": self.rate_limited,
+            "by_route": dict(self.requests.most_common()),
+            "repos": {
+                name: {"issues": sum(1 for i in r.issues.values() if "pull_request" not in i), "pulls": len(r.pulls)}
+                for name, r in self.repos.items()
+            },
+        }
+
+    def _fake_reset(self, **_: Any) -> dict[str, Any]:
+        self._reset()
+        return {"ok": True}
+
+    def _fake_seed(self, owner: str, name: str, payload: Any, **_: Any) -> dict[str, Any]:
+        """Bulk-create issues outside the rate limit; returns their numbers in order."""
+        now = self.clock()
+        repo = self._repo(owner, name)
+        numbers = [self._new_issue(repo, spec, now)["number"] for spec in payload.get("issues") or []]
+        return {"numbers": numbers}
+
+    # -- labels and issues -----------------------------------------------
+
+    def _list_labels(self, owner: str, name: str, query: dict[str, str], base_url: str, **_: Any) -> Any:
+        repo = self._repo(owner, name)
+        return self._page(list(repo.labels.values()), query, base_url, f"/repos/{repo.full_name}/labels")
+
+    def _create_label(self, owner: str, name: str, payload: Any, **_: Any) -> tuple[int, Any]:
+        repo = self._repo(owner, name)
+        label = str(payload.get("name") or "")
+        if not label:
+            raise FakeError(422, "Validation Failed")
+        if label in repo.labels:
+            raise FakeError(422, "Validation Failed: already_exists")
+        repo.labels[label] = {"name": label, "color": str(payload.get("color") or "ededed"), "description": payload.get("description") or ""}
+        return 201, repo.labels[label]
+
+    def _issue(self, repo: RepoState, n: str | int) -> dict[str, Any]:
+        issue = repo.issues.get(int(n))
+        if issue is None:
+            raise FakeError(404, "Not Found")
+        return issue
+
+    def _touch(self, issue: dict[str, Any], now: float) -> None:
+        issue["updated_at"] = _iso(now)
+
+    def _new_issue(self, repo: RepoState, spec: dict[str, Any], now: float, pull: bool = False) -> dict[str, Any]:
+        if not str(spec.get("title") or "").strip():
+            raise FakeError(422, "Validation Failed: title is missing")
+        number = repo.next_number
+        repo.next_number += 1
+        issue = {
+            "id": self._next_id(),
+            "number": number,
+            "title": str(spec["title"]),
+            "body": str(spec.get("body") or ""),
+            "state": "open",
+            "labels": _labels_of(spec.get("labels")),
+            "assignees": [{"login": str(a)} for a in spec.get("assignees") or []],
+            "user": {"login": self.login},
+            "comments": 0,
+            "created_at": _iso(now),
+            "updated_at": _iso(now),
+            "closed_at": None,
+            "html_url": f"https://github.com/{repo.full_name}/{'pull' if pull else 'issues'}/{number}",
+        }
+        if pull:
+            issue["pull_request"] = {"html_url": issue["html_url"]}
+        repo.issues[number] = issue
+        for label in issue["labels"]:
+            repo.labels.setdefault(label["name"], {"name": label["name"], "color": "ededed", "description": ""})
+        return issue
+
+    def _list_issues(self, owner: str, name: str, query: dict[str, str], base_url: str, **_: Any) -> Any:
+        repo = self._repo(owner, name)
+        state = query.get("state") or "open"
+        wanted = {x for x in (query.get("labels") or "").split(",") if x}
+        since = query.get("since") or ""
+        items = [
+            i
+            for i in repo.issues.values()
+            if (state == "all" or i["state"] == state)
+            and wanted <= {label["name"] for label in i["labels"]}
+            and (not since or i["updated_at"] >= since)
+        ]
+        key = "updated_at" if query.get("sort") == "updated" else "number"
+        items.sort(key=lambda i: (i[key], i["number"]), reverse=(query.get("direction") or "desc") == "desc")
+        return self._page(items, query, base_url, f"/repos/{repo.full_name}/issues")
+
+    def _create_issue(self, owner: str, name: str, payload: Any, now: float, **_: Any) -> tuple[int, Any]:
+        return 201, self._new_issue(self._repo(owner, name), payload, now)
+
+    def _get_issue(self, owner: str, name: str, n: str, **_: Any) -> tuple[int, Any]:
+        return 200, self._issue(self._repo(owner, name), n)
+
+    def _patch_issue(self, owner: str, name: str, n: str, payload: Any, now: float, **_: Any) -> tuple[int, Any]:
+        repo = self._repo(owner, name)
+        issue = self._issue(repo, n)
+        for key in ("title", "body"):
+            if key in payload:
+                issue[key] = str(payload[key] or "")
+        if "labels" in payload:
+            issue["labels"] = _labels_of(payload["labels"])
+        if "assignees" in payload:
+            issue["assignees"] = [{"login": str(a)} for a in payload["assignees"] or []]
+        if payload.get("state") in {"open", "closed"} and payload["state"] != issue["state"]:
+            if "pull_request" in issue:
+                self._check_reopen(repo, int(n), payload["state"])
+            issue["state"] = payload["state"]
+            issue["closed_at"] = _iso(now) if payload["state"] == "closed" else None
+        self._touch(issue, now)
+        return 200, issue
+
+    def _list_comments(self, owner: str, name: str, n: str, query: dict[str, str], base_url: str, **_: Any) -> Any:
+        repo = self._repo(owner, name)
+        self._issue(repo, n)
+        since = query.get("since") or ""
+        items = [c for c in repo.comments.get(int(n), []) if not since or c["updated_at"] >= since]
+        return self._page(items, query, base_url, f"/repos/{repo.full_name}/issues/{n}/comments")
+
+    def _create_comment(self, owner: str, name: str, n: str, payload: Any, now: float, **_: Any) -> tuple[int, Any]:
+        repo = self._repo(owner, name)
+        issue = self._issue(repo, n)
+        comment = {
+            "id": self._next_id(),
+            "body": str(payload.get("body") or ""),
+            "user": {"login": self.login},
+            "created_at": _iso(now),
+            "updated_at": _iso(now),
+        }
+        repo.comments.setdefault(int(n), []).append(comment)
+        issue["comments"] += 1
+        self._touch(issue, now)
+        return 201, comment
+
+    def _add_labels(self, owner: str, name: str, n: str, payload: Any, now: float, **_: Any) -> tuple[int, Any]:
+        issue = self._issue(self._repo(owner, name), n)
+        extra = payload.get("labels") if isinstance(payload, dict) else payload
+        issue["labels"] = _labels_of(issue["labels"] + _labels_of(extra))
+        self._touch(issue, now)
+        return 200, issue["labels"]
+
+    def _remove_label(self, owner: str, name: str, n: str, label: str, now: float, **_: Any) -> tuple[int, Any]:
+        issue = self._issue(self._repo(owner, name), n)
+        label = urllib.parse.unquote(label)
+        if label not in {x["name"] for x in issue["labels"]}:
+            raise FakeError(404, "Label does not exist")
+        issue["labels"] = [x for x in issue["labels"] if x["name"] != label]
+        self._touch(issue, now)
+        return 200, issue["labels"]
+
+    # -- pulls -----------------------------------------------------------
+
+    def _pull(self, repo: RepoState, n: str | int) -> dict[str, Any]:
+        pr = repo.pulls.get(int(n))
+        if pr is None:
+            raise FakeError(404, "Not Found")
+        return pr
+
+    def _pull_view(self, repo: RepoState, pr: dict[str, Any]) -> dict[str, Any]:
+        issue = repo.issues[pr["number"]]
+        return {**_public(pr), **{k: issue[k] for k in ("title", "body", "state", "labels", "updated_at", "closed_at", "html_url")}}
+
+    def _check_reopen(self, repo: RepoState, n: int, state: str) -> None:
+        pr = repo.pulls[n]
+        if pr["merged"] and state == "open":
+            raise FakeError(422, "Validation Failed: cannot reopen a merged pull request")
+        if state == "open" and pr["head"]["ref"] not in repo.refs:
+            raise FakeError(422, "Validation Failed: head branch was deleted")
+
+    def _start_checks(self, repo: RepoState, sha: str, now: float) -> None:
+        for check in self.checks:
+            repo.check_runs.setdefault(sha, []).append(
+                {
+                    "id": self._next_id(),
+                    "name": check,
+                    "head_sha": sha,
+                    "status": "in_progress" if self.check_delay > 0 else "completed",
+                    "conclusion": None if self.check_delay > 0 else "success",
+                    "started_at": _iso(now),
+                    "completed_at": None if self.check_delay > 0 else _iso(now),
+                    "_completes_at": now + self.check_delay,
+                }
+            )
+
+    def _runs(self, repo: RepoState, sha: str, now: float) -> list[dict[str, Any]]:
+        runs = repo.check_runs.get(sha, [])
+        for run in runs:
+            if run["status"] != "completed" and run.get("_completes_at", float("inf")) <= now:
+                run.update(status="completed", conclusion="success", completed_at=_iso(run["_completes_at"]))
+        return runs
+
+    def _list_pulls(self, owner: str, name: str, query: dict[str, str], base_url: str, **_: Any) -> Any:
+        repo = self._repo(owner, name)
+        state = query.get("state") or "open"
+        head = query.get("head") or ""
+        items = [
+            self._pull_view(repo, pr)
+            for pr in sorted(repo.pulls.values(), key=lambda p: p["number"], reverse=True)
+            if (state == "all" or repo.issues[pr["number"]]["state"] == state)
+            and (not head or pr["head"]["label"] == head)
+            and (not query.get("base") or pr["base"]["ref"] == query["base"])
+        ]
+        return self._page(items, query, base_url, f"/repos/{repo.full_name}/pulls")
+
+    def _create_pull(self, owner: str, name: str, payload: Any, now: float, **_: Any) -> tuple[int, Any]:
+        repo = self._repo(owner, name)
+        head = str(payload.get("head") or "").split(":")[-1]
+        base = str(payload.get("base") or "main")
+        if not head:
+            raise FakeError(422, "Validation Failed: head is missing")
+        for pr in repo.pulls.values():
+            if pr["head"]["ref"] == head and pr["base"]["ref"] == base and repo.issues[pr["number"]]["state"] == "open":
+                raise FakeError(422, f"Validation Failed: A pull request already exists for {owner}:{head}.")
+        issue = self._new_issue(repo, payload, now, pull=True)
+        sha = str(payload.get("head_sha") or "") or hashlib.sha1(f"{repo.full_name}:{head}:{issue['id']}".encode()).hexdigest()
+        repo.refs[head] = sha
+        repo.pulls[issue["number"]] = {
+            "id": issue["id"],
+            "number": issue["number"],
+            "user": {"login": self.login},
+            "head": {"ref": head, "sha": sha, "label": f"{owner}:{head}"},
+            "base": {"ref": base},
+            "draft": bool(payload.get("draft")),
+            "merged": False,
+            "merged_at": None,
+            "merge_commit_sha": None,
+            "mergeable": True,
+            "created_at": issue["created_at"],
+        }
+        self._start_checks(repo, sha, now)
+        return 201, self._pull_view(repo, repo.pulls[issue["number"]])
+
+    def _get_pull(self, owner: str, name: str, n: str, **_: Any) -> tuple[int, Any]:
+        repo = self._repo(owner, name)
+        return 200, self._pull_view(repo, self._pull(repo, n))
+
+    def _patch_pull(self, owner: str, name: str, n: str, payload: Any, now: float, **_: Any) -> tuple[int, Any]:
+        repo = self._repo(owner, name)
+        pr = self._pull(repo, n)
+        if "base" in payload:
+            pr["base"]["ref"] = str(payload["base"])
+        self._patch_issue(owner, name, n, {k: payload[k] for k in ("title", "body", "state") if k in payload}, now)
+        return 200, self._pull_view(repo, pr)
+
+    def _failing_required(self, repo: RepoState, sha: str, now: float) -> list[str]:
+        passed = {r["name"] for r in self._runs(repo, sha, now) if r["status"] == "completed" and r["conclusion"] in {"success", "neutral", "skipped"}}
+        passed |= {s["context"] for s in repo.statuses.get(sha, []) if s["state"] == "success"}
+        return [name for name in self.checks if name not in passed]
+
+    def _merge_pull(self, owner: str, name: str, n: str, payload: Any, now: float, **_: Any) -> tuple[int, Any]:
+        repo = self._repo(owner, name)
+        pr = self._pull(repo, n)
+        issue = repo.issues[pr["number"]]
+        if pr["merged"] or issue["state"] != "open":
+            raise FakeError(405, "Pull Request is not mergeable")
+        if payload.get("sha") and payload["sha"] != pr["head"]["sha"]:
+            raise FakeError(409, "Head branch was modified. Review and try the merge again.")
+        missing = self._failing_required(repo, pr["head"]["sha"], now) if self.require_checks else []
+        if missing:
+            raise FakeError(405, f"Required status check \"{missing[0]}\" is expected.")
+        merge_sha = hashlib.sha1(f"merge:{repo.full_name}:{pr['number']}:{now}".encode()).hexdigest()
+        pr.update(merged=True, merged_at=_iso(now), merge_commit_sha=merge_sha, mergeable=None)
+        issue.update(state="closed", closed_at=_iso(now))
+        self._touch(issue, now)
+        if pr["base"]["ref"] == "main":
+            # Like GitHub, a merge into the default branch closes the issues the PR body links.
+            for linked in CLOSING_RE.findall(issue["body"]):
+                target = repo.issues.get(int(linked))
+                if target is not None and target["state"] == "open" and "pull_request" not in target:
+                    target.update(state="closed", closed_at=_iso(now))
+                    self._touch(target, now)
+        return 200, {"sha": merge_sha, "merged": True, "message": "Pull Request successfully merged"}
+
+    def _list_reviews(self, owner: str, name: str, n: str, query: dict[str, str], base_url: str, **_: Any) -> Any:
+        repo = self._repo(owner, name)
+        self._pull(repo, n)
+        return self._page(repo.reviews.get(int(n), []), query, base_url, f"/repos/{repo.full_name}/pulls/{n}/reviews")
+
+    def _create_review(self, owner: str, name: str, n: str, payload: Any, now: float, **_: Any) -> tuple[int, Any]:
+        repo = self._repo(owner, name)
+        pr = self._pull(repo, n)
+        states = {"APPROVE": "APPROVED", "REQUEST_CHANGES": "CHANGES_REQUESTED", "COMMENT": "COMMENTED"}
+        review = {
+            "id": self._next_id(),
+            "user": {"login": str(payload.get("user") or self.login)},
+            "state": states.get(str(payload.get("event") or "COMMENT"), "PENDING"),
+            "body": str(payload.get("body") or ""),
+            "commit_id": pr["head"]["sha"],
+            "submitted_at": _iso(now),
+        }
+        repo.reviews.setdefault(int(n), []).append(review)
+        return 200, review
+
+    # -- checks, statuses and refs ---------------------------------------
+
+    def _list_check_runs(self, owner: str, name: str, sha: str, query: dict[str, str], now: float, **_: Any) -> tuple[int, Any]:
+        runs = [_public(r) for r in self._runs(self._repo(owner, name), sha, now)]
+        per_page = max(1, min(PER_PAGE_MAX, int(query.get("per_page") or PER_PAGE_DEFAULT)))
+        return 200, {"total_count": len(runs), "check_runs": runs[:per_page]}
+
+    def _create_check_run(self, owner: str, name: str, payload: Any, now: float, **_: Any) -> tuple[int, Any]:
+        repo = self._repo(owner, name)
+        if not payload.get("name") or not payload.get("head_sha"):
+            raise FakeError(422, "Validation Failed: name and head_sha are required")
+        status = str(payload.get("status") or ("completed" if payload.get("conclusion") else "queued"))
+        run = {
+            "id": self._next_id(),
+            "name": str(payload["name"]),
+            "head_sha": str(payload["head_sha"]),
+            "status": status,
+            "conclusion": payload.get("conclusion") if status == "completed" else None,
+            "started_at": _iso(now),
+            "completed_at": _iso(now) if status == "completed" else None,
+        }
+        repo.check_runs.setdefault(run["head_sha"], []).append(run)
+        return 201, run
+
+    def _patch_check_run(self, owner: str, name: str, id: str, payload: Any, now: float, **_: Any) -> tuple[int, Any]:
+        for run in (r for runs in self._repo(owner, name).check_runs.values() for r in runs):
+            if run["id"] == int(id):
+                run.pop("_completes_at", None)
+                for key in ("name", "status", "conclusion"):
+                    if key in payload:
+                        run[key] = payload[key]
+                if run.get("conclusion") and run["status"] != "completed":
+                    run["status"] = "completed"
+                if run["status"] == "completed" and not run.get("completed_at"):
+                    run["completed_at"] = _iso(now)
+                return 200, _public(run)
+        raise FakeError(404, "Not Found")
+
+    def _combined_status(self, owner: str, name: str, sha: str, **_: Any) -> tuple[int, Any]:
+        latest: dict[str, dict[str, Any]] = {}
+        for entry in self._repo(owner, name).statuses.get(sha, []):
+            latest[entry["context"]] = entry
+        statuses = list(latest.values())
+        states = {s["state"] for s in statuses}
+        state = "failure" if states & {"failure", "error"} else "pending" if "pending" in states or not statuses else "success"
+        return 200, {"state": state, "sha": sha, "total_count": len(statuses), "statuses": statuses}
+
+    def _create_status(self, owner: str, name: str, sha: str, payload: Any, now: float, **_: Any) -> tuple[int, Any]:
+        if payload.get("state") not in {"error", "failure", "pending", "success"}:
+            raise FakeError(422, "Validation Failed: state is invalid")
+        entry = {
+            "id": self._next_id(),
+            "state": payload["state"],
+            "context": str(payload.get("context") or "default"),
+            "description": payload.get("description"),
+            "target_url": payload.get("target_url"),
+            "created_at": _iso(now),
+            "updated_at": _iso(now),
+        }
+        self._repo(owner, name).statuses.setdefault(sha, []).append(entry)
+        return 201, entry
+
+    def _delete_ref(self, owner: str, name: str, ref: str, **_: Any) -> tuple[int, Any]:
+        repo = self._repo(owner, name)
+        ref = urllib.parse.unquote(ref)
+        if repo.refs.pop(ref, None) is None:
+            raise FakeError(422, "Reference does not exist")
+        return 204, None
+
+    # -- graphql ---------------------------------------------------------
+
+    def _graphql(self, payload: Any, **_: Any) -> tuple[int, Any]:
+        """Only the task snapshot query (`repository { issues(...) }`) is understood."""
+        query = str(payload.get("query") or "")
+        variables = payload.get("variables") or {}
+        if "repository(" not in query or "issues(" not in query:
+            return 200, {"errors": [{"message": "fake GitHub only supports the repository issues query"}]}
+        full_name = f"{variables.get('owner')}/{variables.get('name')}"
+        repo = self.repos.get(full_name)
+        if repo is None:
+            return 200, {"data": {"repository": None}, "errors": [{"type": "NOT_FOUND", "message": f"Could not resolve to a Repository with the name '{full_name}'."}]}
+        labels_match = re.search(r"labels:\s*\[([^\]]*)\]", query)
+        wanted = set(re.findall(r'"([^"]+)"', labels_match.group(1))) if labels_match else set()
+        states_match = re.search(r"states:\s*\[([^\]]*)\]", query)
+        states = {s.lower() for s in re.findall(r"\w+", states_match.group(1))} if states_match else {"open", "closed"}
+        since = str(variables.get("since") or "")
+        items = [
+            i
+            for i in sorted(repo.issues.values(), key=lambda i: i["number"])
+            if "pull_request" not in i
+            and i["state"] in states
+            and wanted <= {label["name"] for label in i["labels"]}
+            and (not since or i["updated_at"] >= since)
+        ]
+        cursor = variables.get("cursor")
+        start = int(base64.b64decode(cursor).decode().split(":")[1]) if cursor else 0
+        size = max(1, min(PER_PAGE_MAX, int(variables.get("pageSize") or PER_PAGE_DEFAULT)))
+        chunk = items[start : start + size]
+        comments = int(variables.get("comments") or 0)
+        nodes = [
+            {
+                "number": i["number"],
+                "title": i["title"],
+                "body": i["body"],
+                "state": i["state"].upper(),
+                "updatedAt": i["updated_at"],
+                "url": i["html_url"],
+                "labels": {"nodes": i["labels"]},
+                "comments": {"nodes": [{"body": c["body"]} for c in repo.comments.get(i["number"], [])[-comments:]] if comments else []},
+            }
+            for i in chunk
+        ]
+        end = start + len(chunk)
+        page_info = {"hasNextPage": end < len(items), "endCursor": base64.b64encode(f"cursor:{end}".encode()).decode()}
+        return 200, {"data": {"repository": {"issues": {"pageInfo": page_info, "nodes": nodes}}}}
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeServer
+
+    def _serve(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        status, headers, data = self.server.github.handle(
+            self.command,
+            self.path,
+            raw,
+            {k.lower(): v for k, v in self.headers.items()},
+            base_url=f"http://{self.headers.get('Host') or '%s:%d' % self.server.server_address[:2]}",
+        )
+        body = b"" if data is None or status in {204, 304} else json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if body:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _serve
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], github: FakeGitHub, latency: float = 0.0, verbose: bool = False) -> None:
+        super().__init__(address, _RequestHandler)
+        self.github = github
+        self.latency = latency
+        self.verbose = verbose
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def policy_checks(root: Path) -> list[str]:
+    data = yaml.safe_load((root / "config" / "policy.yaml").read_text(encoding="utf-8")) or {}
+    return [str(x) for x in data.get("required_checks") or []]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 picks a free port.")
+    parser.add_argument("--login", default="fake-user")
+    parser.add_argument("--token", default="", help="Reject requests without this bearer token.")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="Core requests per window; 0 is unlimited.")
+    parser.add_argument("--graphql-limit", type=int, default=5000, help="GraphQL queries per window; 0 is unlimited.")
+    parser.add_argument("--rate-window", type=float, default=3600.0, help="Seconds until a rate-limit bucket resets.")
+    parser.add_argument("--checks", default=None, help="Comma-separated check runs added to new PRs (default: config/policy.yaml).")
+    parser.add_argument("--check-delay", type=float, default=0.0, help="Seconds until those checks succeed.")
+    parser.add_argument("--no-require-checks", action="store_true", help="Allow merging before the checks pass.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every response.")
+    parser.add_argument("--verbose", action="store_true", help="Log every request to stderr.")
+    args = parser.parse_args()
+
+    checks = policy_checks(Path(__file__).resolve().parents[2]) if args.checks is None else [x for x in args.checks.split(",") if x]
+    github = FakeGitHub(
+        login=args.login,
+        token=args.token,
+        rate_limit=args.rate_limit,
+        graphql_limit=args.graphql_limit,
+        rate_window=args.rate_window,
+        checks=checks,
+        check_delay=args.check_delay,
+        require_checks=not args.no_require_checks,
+    )
+    server = FakeServer((args.host, args.port), github, args.latency_ms / 1000, args.verbose)
+    print(json.dumps({"ok": True, "url": server.url, "checks": checks}), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Seed a fake GitHub with a task dependency DAG and drive the PM flow over it until every task merges."""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import hashlib
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "pm"))
+
+from common import GitHubClient, HttpBackend, elapsed_ms, issue_labels
+from fake_github import FakeGitHub, FakeServer, policy_checks
+from frontmatter_codec import parse_frontmatter, render_frontmatter
+
+ROOT = Path(__file__).resolve().parents[2]
+PM_DIR = ROOT / "scripts" / "pm"
+TASK_TYPES = ["IMPL", "IMPL", "IMPL", "DEBUG", "REVIEW", "INTEGRATION"]
+
+
+def generate_dag(tasks: int, rng: random.Random, max_deps: int = 3, window: int = 50) -> list[dict[str, Any]]:
+    """Task specs in topological order; each depends on up to `max_deps` of the `window` tasks before it."""
+    specs: list[dict[str, Any]] = []
+    width = len(str(tasks))
+    for i in range(tasks):
+        task_id = f"TASK-{i + 1:0{max(3, width)}d}"
+        pool = range(max(0, i - window), i)
+        deps = sorted(rng.sample(pool, min(len(pool), rng.randint(0, max_deps))))
+        specs.append(
+            {
+                "task_id": task_id,
+                "task_type": rng.choice(TASK_TYPES),
+                "status": "blocked" if deps else "ready",
+                "depends_on": [specs[d]["task_id"] for d in deps],
+            }
+        )
+    return specs
+
+
+def critical_path(specs: list[dict[str, Any]]) -> int:
+    depth: dict[str, int] = {}
+    for spec in specs:
+        depth[spec["task_id"]] = 1 + max((depth[d] for d in spec["depends_on"]), default=0)
+    return max(depth.values(), default=0)
+
+
+def issue_payload(spec: dict[str, Any]) -> dict[str, Any]:
+    meta = {
+        "task_id": spec["task_id"],
+        "task_type": spec["task_type"],
+        "status": spec["status"],
+        "depends_on": spec["depends_on"],
+        "owner_worker": spec.get("owner_worker") or "",
+        "acceptance": [f"{spec['task_id']} acceptance passes"],
+    }
+    return {
+        "title": f"{spec['task_id']}: simulated {spec['task_type'].lower()} task",
+        "body": render_frontmatter(meta, "Generated by scripts/sim/load_gen.py."),
+        "labels": ["type/task", f"status/{spec['status']}"],
+    }
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50": round(statistics.median(ordered), 1),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "max": round(ordered[-1], 1),
+        "total": round(sum(ordered), 1),
+    }
+
+
+class Simulation:
+    """Plays the workers and the reviewer against `api_url` while the real PM scripts run as subprocesses.
+
+    Every round takes the open `status/in_progress` tasks in a seeded random
+    order, opens a PR that closes each one, merges it once its checks pass and
+    runs `on_pr_merged.py`, which closes the task, unlocks its dependents and
+    dispatches them for a later round.
+    """
+
+    def __init__(self, api_url: str, repo: str, token: str, run_id: str, rng: random.Random, loader: str = "graphql") -> None:
+        self.api_url = api_url
+        self.repo = repo
+        self.run_id = run_id
+        self.rng = rng
+        self.loader = loader
+        self.client = GitHubClient(HttpBackend(token, base_url=api_url))
+        self.cache_dir = tempfile.mkdtemp(prefix="load-gen-cache-")
+        self.env = dict(
+            os.environ,
+            GITHUB_API_URL=api_url,
+            GH_API_BACKEND="http",
+            GH_TOKEN=token,
+            GH_API_CACHE_DIR=self.cache_dir,
+        )
+        self.timings: dict[str, list[float]] = {"dispatch": [], "on_pr_merged": [], "pr": []}
+        self.errors: list[dict[str, Any]] = []
+        self.trace: list[str] = []
+
+    def api(self, method: str, path: str, payload: dict[str, Any] | None = None) -> Any:
+        return self.client.request(method, path, payload, cache=False).data
+
+    def seed(self, specs: list[dict[str, Any]], via: str = "bulk") -> list[int]:
+        payloads = [issue_payload(s) for s in specs]
+        if via == "bulk":
+            return list(self.api("POST", f"_fake/repos/{self.repo}/issues", {"issues": payloads})["numbers"])
+        return [int(self.api("POST", f"repos/{self.repo}/issues", p)["number"]) for p in payloads]
+
+    def tasks(self, state: str = "open", label: str = "") -> list[dict[str, Any]]:
+        labels = ",".join(x for x in ("type/task", label) if x)
+        out: list[dict[str, Any]] = []
+        page = 1
+        while True:
+            batch = self.api("GET", f"repos/{self.repo}/issues?state={state}&labels={labels}&per_page=100&page={page}")
+            out += [x for x in batch if "pull_request" not in x]
+            if len(batch) < 100:
+                return sorted(out, key=lambda x: x["number"])
+            page += 1
+
+    def run_pm(self, script: str, *args: str) -> dict[str, Any]:
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, str(PM_DIR / script), "--repo", self.repo, "--run-id", self.run_id, "--loader", self.loader, *args],
+            env=self.env,
+            text=True,
+            capture_output=True,
+            check=False,
+        )
+        self.timings[script.removesuffix(".py").replace("dispatch_tasks", "dispatch")].append(elapsed_ms(started))
+        lines = proc.stdout.strip().splitlines()
+        try:
+            result = json.loads(lines[-1])
+        except (IndexError, json.JSONDecodeError):
+            result = {"ok": False, "error": proc.stderr.strip()[-500:]}
+        if proc.returncode != 0 or not result.get("ok"):
+            self.errors.append({"script": script, "args": list(args), "error": result.get("error") or result.get("failed") or proc.stderr.strip()[-500:]})
+        return result
+
+    def merge_task(self, issue: dict[str, Any]) -> int:
+        meta, _ = parse_frontmatter(str(issue.get("body") or ""))
+        task_id = str(meta.get("task_id") or "")
+        worker = str(meta.get("owner_worker") or "worker")
+        branch = f"worker/{worker}/task-{task_id.lower()}"
+        started = time.perf_counter()
+        pr = self.api(
+            "POST",
+            f"repos/{self.repo}/pulls",
+            {"title": f"feat: {task_id} by {worker}", "head": branch, "base": "main", "body": f"Closes #{issue['number']}"},
+        )
+        self.api("PUT", f"repos/{self.repo}/pulls/{pr['number']}/merge", {"merge_method": "squash", "sha": pr["head"]["sha"]})
+        self.api("DELETE", f"repos/{self.repo}/git/refs/heads/{branch}")
+        self.timings["pr"].append(elapsed_ms(started))
+        return int(pr["number"])
+
+    def run(self, max_rounds: int) -> dict[str, Any]:
+        self.run_pm("dispatch_tasks.py", "--full-sync")
+        rounds: list[dict[str, Any]] = []
+        while len(rounds) < max_rounds:
+            active = self.tasks(label="status/in_progress")
+            if not active:
+                break
+            self.rng.shuffle(active)
+            started = time.perf_counter()
+            dispatched = 0
+            for issue in active:
+                pr = self.merge_task(issue)
+                result = self.run_pm("on_pr_merged.py", "--pr", str(pr))
+                dispatched += len(result.get("dispatched") or [])
+                meta, _ = parse_frontmatter(str(issue.get("body") or ""))
+                self.trace.append(f"{len(rounds) + 1}:{meta.get('task_id')}:{meta.get('owner_worker')}")
+            rounds.append({"merged": len(active), "dispatched": dispatched, "elapsed_ms": elapsed_ms(started)})
+        return {"rounds": rounds}
+
+    def stuck(self) -> list[dict[str, Any]]:
+        return [
+            {"issue": x["number"], "labels": [label for label in issue_labels(x) if label.startswith("status/")]}
+            for x in self.tasks()
+        ]
+
+    def close(self) -> None:
+        self.client.close()
+        subprocess.run(["rm", "-rf", self.cache_dir], check=False)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--api-url", default="", help="Running fake_github.py; by default one is started in-process.")
+    parser.add_argument("--repo", default="sim/load")
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-deps", type=int, default=3)
+    parser.add_argument("--window", type=int, default=50, help="Dependencies are drawn from this many preceding tasks.")
+    parser.add_argument("--seed-via", choices=["bulk", "api"], default="bulk", help="Create issues through the fake's bulk endpoint or the REST API.")
+    parser.add_argument("--loader", choices=["graphql", "rest"], default="graphql")
+    parser.add_argument("--max-rounds", type=int, default=0, help="Stop after this many rounds (default: one per task, since every round merges at least one).")
+    parser.add_argument("--seed-only", action="store_true", help="Create the tasks and exit.")
+    parser.add_argument("--rate-limit", type=int, default=0, help="In-process server: core requests per window (0 is unlimited).")
+    parser.add_argument("--rate-window", type=float, default=3600.0, help="In-process server: rate-limit window in seconds.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="In-process server: delay added to every response.")
+    parser.add_argument("--token", default=os.getenv("GH_TOKEN", "").strip() or "fake-token")
+    parser.add_argument("--out", default="", help="Also write the report JSON here.")
+    args = parser.parse_args()
+
+    server: FakeServer | None = None
+    api_url = args.api_url.rstrip("/")
+    if not api_url:
+        github = FakeGitHub(rate_limit=args.rate_limit, graphql_limit=args.rate_limit, rate_window=args.rate_window, checks=policy_checks(ROOT))
+        server = FakeServer(("127.0.0.1", 0), github, args.latency_ms / 1000)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        api_url = server.url
+
+    rng = random.Random(args.seed)
+    run_id = f"sim-{args.seed}-{dt.datetime.now(dt.timezone.utc).strftime('%Y%m%d-%H%M%S')}"
+    specs = generate_dag(args.tasks, rng, args.max_deps, args.window)
+    depth = critical_path(specs)
+    sim = Simulation(api_url, args.repo, args.token, run_id, rng, args.loader)
+    report: dict[str, Any] = {
+        "repo": args.repo,
+        "api_url": api_url,
+        "run_id": run_id,
+        "seed": args.seed,
+        "tasks": args.tasks,
+        "edges": sum(len(s["depends_on"]) for s in specs),
+        "critical_path": depth,
+    }
+    try:
+        started = time.perf_counter()
+        issues = sim.seed(specs, args.seed_via)
+        report["seed_ms"] = elapsed_ms(started)
+        report["issues"] = [issues[0], issues[-1]] if issues else []
+        if not args.seed_only:
+            started = time.perf_counter()
+            report.update(sim.run(args.max_rounds or args.tasks + 1))
+            report["simulate_ms"] = elapsed_ms(started)
+            report["stuck"] = sim.stuck()
+            report["timings_ms"] = {name: _percentiles(samples) for name, samples in sim.timings.items()}
+            # Same seed, same DAG and same merge order: the digest must match between runs.
+            report["digest"] = hashlib.sha256("\n".join(sim.trace).encode("utf-8")).hexdigest()[:16]
+        report["errors"] = sim.errors[:20]
+        report["api"] = sim.api("GET", "_fake/stats")
+    finally:
+        sim.close()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    report["ok"] = not sim.errors and not report.get("stuck")
+    text = json.dumps(report, ensure_ascii=False)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,18 +4,20 @@ set -euo pipefail
 REPO=""
 REAL_MODE="true"
 PHASE3_AI_MODE=""
+API_URL=""
 
 while [[ $# -gt 0 ]]; do
   case "$1" in
     --repo) REPO="$2"; shift 2 ;;
     --real-mode) REAL_MODE="$2"; shift 2 ;;
     --phase3-ai-mode) PHASE3_AI_MODE="$2"; shift 2 ;;
+    --api-url) API_URL="$2"; shift 2 ;;
     *) echo "Unknown arg: $1" >&2; exit 1 ;;
   esac
 done
 
 if [[ -z "$REPO" ]]; then
-  echo "Usage: run_e2e.sh --repo <owner/name> [--real-mode true|false] [--phase3-ai-mode mock|real|codex|skip]" >&2
+  echo "Usage: run_e2e.sh --repo <owner/name> [--real-mode true|false] [--phase3-ai-mode mock|real|codex|skip] [--api-url http://127.0.0.1:8765]" >&2
   exit 1
 fi
 
@@ -42,85 +44,58 @@ if [[ -z "$ROOT" ]]; then
 fi
 cd "$ROOT"
 
+if [[ -n "$API_URL" ]]; then
+  # Offline run against scripts/sim/fake_github.py: no Actions run there, so the
+  # post-merge hook is invoked here, and branches are pushed to the checkout's own origin.
+  export GITHUB_API_URL="$API_URL" GH_API_BACKEND=http GH_TOKEN="${GH_TOKEN:-fake-token}"
+  export GH_API_CACHE_DIR="${ROOT}/state/cache/http-offline"
+  rm -rf "$GH_API_CACHE_DIR"
+fi
+
 RUN_ID="$(date +%Y%m%d-%H%M%S)"
 REPORT="${ROOT}/reports/e2e-report.md"
 mkdir -p "${ROOT}/reports"
 
+api() {
+  python3 - "$@" <<'PY'
+import json
+import sys
+
+sys.path.insert(0, "scripts/pm")
+from common import gh_api
+
+method, path, *payload = sys.argv[1:]
+print(json.dumps(gh_api(path, method=method, payload=json.loads(payload[0]) if payload else None), ensure_ascii=False))
+PY
+}
+
+field() {
+  python3 -c 'import json,sys; print(json.loads(sys.stdin.read())[sys.argv[1]])' "$1"
+}
+
+merge_pr() {
+  local pr="$1"
+  local branch="$2"
+  api PUT "repos/${REPO}/pulls/${pr}/merge" '{"merge_method": "squash"}' >/dev/null
+  api DELETE "repos/${REPO}/git/refs/heads/${branch}" >/dev/null || true
+  if [[ -n "$API_URL" ]]; then
+    python3 scripts/pm/on_pr_merged.py --repo "$REPO" --pr "$pr" --run-id "$RUN_ID" >/dev/null
+  fi
+}
+
 wait_for_merge() {
   local pr="$1"
-  local tries=80
-  while [[ $tries -gt 0 ]]; do
-    state=$(gh pr view "$pr" --repo "$REPO" --json state,mergedAt -q '.state')
-    merged_at=$(gh pr view "$pr" --repo "$REPO" --json mergedAt -q '.mergedAt // ""')
-    if [[ "$state" == "MERGED" || -n "$merged_at" ]]; then
-      return 0
-    fi
-    sleep 10
-    tries=$((tries - 1))
-  done
-  return 1
+  python3 scripts/pm/pr_waiter.py --repo "$REPO" --pr "$pr" --until merged --timeout-sec 800 >/dev/null
 }
 
 wait_for_checks() {
   local pr="$1"
-  local sha
-  sha="$(gh pr view "$pr" --repo "$REPO" --json headRefOid -q '.headRefOid')"
-  local tries=60
-  while [[ $tries -gt 0 ]]; do
-    export CHECKS_JSON
-    CHECKS_JSON="$(gh api "repos/${REPO}/commits/${sha}/check-runs" 2>/dev/null || true)"
-    if [[ -z "$CHECKS_JSON" ]]; then
-      sleep 10
-      tries=$((tries - 1))
-      continue
-    fi
-
-    read -r total pending failed <<<"$(python3 - <<'PY'
-import json
-import os
-
-raw = os.environ.get("CHECKS_JSON", "")
-if not raw.strip():
-    print("0 0 0")
-    raise SystemExit(0)
-obj = json.loads(raw)
-runs = obj.get("check_runs", [])
-total = len(runs)
-pending = 0
-failed = 0
-ok_conclusions = {"success", "neutral", "skipped"}
-for run in runs:
-    status = str(run.get("status") or "")
-    conclusion = str(run.get("conclusion") or "")
-    if status != "completed":
-        pending += 1
-    elif conclusion not in ok_conclusions:
-        failed += 1
-print(f"{total} {pending} {failed}")
-PY
-)"
-
-    if [[ "$total" -eq 0 ]]; then
-      sleep 10
-      tries=$((tries - 1))
-      continue
-    fi
-    if [[ "$pending" -gt 0 ]]; then
-      sleep 10
-      tries=$((tries - 1))
-      continue
-    fi
-    if [[ "$failed" -gt 0 ]]; then
-      echo "Checks failed for PR #${pr}" >&2
-      gh pr checks "$pr" --repo "$REPO" || true
-      return 1
-    fi
-    return 0
-  done
-
-  echo "Timed out waiting for checks on PR #${pr}" >&2
-  gh pr checks "$pr" --repo "$REPO" || true
-  return 1
+  local out
+  if ! out=$(python3 scripts/pm/pr_waiter.py --repo "$REPO" --pr "$pr" --until checks --timeout-sec 600); then
+    echo "Checks failed or timed out for PR #${pr}" >&2
+    echo "$out" >&2
+    return 1
+  fi
 }
 
 create_task_issue() {
@@ -145,12 +120,15 @@ acceptance:
 ${title}
 BODY
 )
-  gh api -X POST "repos/${REPO}/issues" \
-    -f "title=${title}" \
-    -f "body=${body}" \
-    -f "labels[]=type/task" \
-    -f "labels[]=status/${status}" \
-    --jq '.number'
+  local payload
+  payload=$(python3 -c 'import json,sys; print(json.dumps({"title": sys.argv[1], "body": sys.argv[2], "labels": ["type/task", "status/" + sys.argv[3]]}))' "$title" "$body" "$status")
+  api POST "repos/${REPO}/issues" "$payload" | field number
+}
+
+issue_state() {
+  local state
+  state=$(api GET "repos/${REPO}/issues/$1" | field state)
+  echo "${state^^}"
 }
 
 TASK1_ISSUE=$(create_task_issue "TASK-001" "IMPL" "ready" "[]" "Task 001: Implement add" "add returns correct result")
@@ -163,14 +141,15 @@ python3 scripts/pm/dispatch_tasks.py --repo "$REPO" --run-id "$RUN_ID"
 
 OUT1_RAW=$(scripts/worker/run_task.sh --repo "$REPO" --issue "$TASK1_ISSUE" --worker worker-a --ai-mode mock)
 OUT1=$(echo "$OUT1_RAW" | tail -n 1)
-PR1=$(echo "$OUT1" | python3 -c 'import json,sys; print(json.loads(sys.stdin.read())["pr_number"])')
+PR1=$(echo "$OUT1" | field pr_number)
+BRANCH1=$(echo "$OUT1" | field branch)
 wait_for_checks "$PR1"
-gh pr merge "$PR1" --repo "$REPO" --squash --delete-branch
+merge_pr "$PR1" "$BRANCH1"
 wait_for_merge "$PR1"
 
 # wait for orchestrator to unlock TASK-002
 for _ in {1..30}; do
-  BODY2=$(gh issue view "$TASK2_ISSUE" --repo "$REPO" --json body -q '.body')
+  BODY2=$(api GET "repos/${REPO}/issues/${TASK2_ISSUE}" | field body)
   export BODY2
   STATUS2=$(python3 - <<'PY'
 import os
@@ -196,9 +175,10 @@ done
 python3 scripts/pm/dispatch_tasks.py --repo "$REPO" --run-id "$RUN_ID"
 OUT2_RAW=$(scripts/worker/run_task.sh --repo "$REPO" --issue "$TASK2_ISSUE" --worker worker-b --ai-mode mock)
 OUT2=$(echo "$OUT2_RAW" | tail -n 1)
-PR2=$(echo "$OUT2" | python3 -c 'import json,sys; print(json.loads(sys.stdin.read())["pr_number"])')
+PR2=$(echo "$OUT2" | field pr_number)
+BRANCH2=$(echo "$OUT2" | field branch)
 wait_for_checks "$PR2"
-gh pr merge "$PR2" --repo "$REPO" --squash --delete-branch
+merge_pr "$PR2" "$BRANCH2"
 wait_for_merge "$PR2"
 
 TASK3_ISSUE=""
@@ -209,19 +189,20 @@ if [[ "$PHASE3_AI_MODE" != "skip" ]]; then
   python3 scripts/pm/dispatch_tasks.py --repo "$REPO" --run-id "$RUN_ID"
   OUT3_RAW=$(scripts/worker/run_task.sh --repo "$REPO" --issue "$TASK3_ISSUE" --worker worker-a --ai-mode "$PHASE3_AI_MODE")
   OUT3=$(echo "$OUT3_RAW" | tail -n 1)
-  PR3=$(echo "$OUT3" | python3 -c 'import json,sys; print(json.loads(sys.stdin.read())["pr_number"])')
+  PR3=$(echo "$OUT3" | field pr_number)
+  BRANCH3=$(echo "$OUT3" | field branch)
   PHASE3_TASK_MODE=$(echo "$OUT3" | python3 -c 'import json,sys; print(str(json.loads(sys.stdin.read()).get("ai_mode","")))')
   wait_for_checks "$PR3"
-  gh pr merge "$PR3" --repo "$REPO" --squash --delete-branch
+  merge_pr "$PR3" "$BRANCH3"
   wait_for_merge "$PR3"
   PHASE3_NOTE="completed(ai_mode=${PHASE3_TASK_MODE})"
 fi
 
-ISSUE1_STATE=$(gh issue view "$TASK1_ISSUE" --repo "$REPO" --json state -q '.state')
-ISSUE2_STATE=$(gh issue view "$TASK2_ISSUE" --repo "$REPO" --json state -q '.state')
+ISSUE1_STATE=$(issue_state "$TASK1_ISSUE")
+ISSUE2_STATE=$(issue_state "$TASK2_ISSUE")
 ISSUE3_STATE="N/A"
 if [[ -n "$TASK3_ISSUE" ]]; then
-  ISSUE3_STATE=$(gh issue view "$TASK3_ISSUE" --repo "$REPO" --json state -q '.state')
+  ISSUE3_STATE=$(issue_state "$TASK3_ISSUE")
 fi
 
 cat > "$REPORT" <<MD
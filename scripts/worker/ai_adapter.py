@@ -124,6 +124,25 @@ def _codex_note(task_id: str, task_type: str, issue: str, summary: str) -> tuple
             pass
 
 
+def plan(mode: str, task_id: str, task_type: str, issue: str, summary: str = "") -> dict[str, Any]:
+    if mode == "mock":
+        note, used_fallback, reason = _mock_note(task_id, task_type), False, "mock"
+    elif mode == "real":
+        note, used_fallback, reason = _real_note(task_id, task_type)
+    else:
+        note, used_fallback, reason = _codex_note(task_id, task_type, issue, summary)
+    return {
+        "ok": True,
+        "mode": mode,
+        "task_id": task_id,
+        "task_type": task_type,
+        "issue": issue,
+        "used_fallback": used_fallback,
+        "reason": reason,
+        "note": note,
+    }
+
+
 def main() -> int:
     parser = argparse.ArgumentParser()
     parser.add_argument("--mode", choices=["mock", "real", "codex"], required=True)
@@ -133,34 +152,7 @@ def main() -> int:
     parser.add_argument("--summary", default="")
     args = parser.parse_args()
 
-    if args.mode == "mock":
-        payload = {
-            "ok": True,
-            "mode": "mock",
-            "task_id": args.task_id,
-            "task_type": args.task_type,
-            "issue": args.issue,
-            "used_fallback": False,
-            "reason": "mock",
-            "note": _mock_note(args.task_id, args.task_type),
-        }
-        print(json.dumps(payload, ensure_ascii=False))
-        return 0
-
-    if args.mode == "real":
-        note, used_fallback, reason = _real_note(args.task_id, args.task_type)
-    else:
-        note, used_fallback, reason = _codex_note(args.task_id, args.task_type, args.issue, args.summary)
-    payload = {
-        "ok": True,
-        "mode": args.mode,
-        "task_id": args.task_id,
-        "task_type": args.task_type,
-        "issue": args.issue,
-        "used_fallback": used_fallback,
-        "reason": reason,
-        "note": note,
-    }
+    payload = plan(args.mode, args.task_id, args.task_type, args.issue, args.summary)
     print(json.dumps(payload, ensure_ascii=False))
     return 0
 
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""Long-running worker: poll the inbox and run leased tasks in parallel git worktrees."""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "pm"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from common import append_event, elapsed_ms, flush_events, iter_task_issues, load_workers, now_iso
+from frontmatter_codec import parse_frontmatter
+from repo_cache import RepoCache, gc_worktrees
+
+HEARTBEAT_INTERVAL = 15.0
+LEASE_TTL = 300.0
+RETRY_BACKOFF = 300.0
+
+
+class Lease:
+    """Exclusive claim on an issue for daemons sharing one worker workspace.
+
+    The lease file is refreshed by the heartbeat; one older than `LEASE_TTL`
+    belongs to a dead daemon and may be taken over.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def acquire(self) -> bool:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                try:
+                    if time.time() - self.path.stat().st_mtime < LEASE_TTL:
+                        return False
+                    self.path.unlink()
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"pid": os.getpid(), "host": socket.gethostname(), "leased_at": now_iso()}, f)
+            return True
+        return False
+
+    def touch(self) -> None:
+        try:
+            os.utime(self.path)
+        except FileNotFoundError:
+            pass
+
+    def release(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+class WorkerDaemon:
+    """Runs `run_task.py --no-sync` for each in-progress issue owned by `worker`.
+
+    Every poll does one incremental fetch into the shared mirror (see
+    `repo_cache`), copies `main` from it locally, leases new issues up to
+    `concurrency` running tasks and starts each in a detached worktree there.
+    State (leases, heartbeat, per-task logs, finished issues) lives under
+    `state/worker/<worker>/`.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        repo: str,
+        worker: str,
+        *,
+        concurrency: int,
+        poll_interval: float,
+        ai_mode: str,
+        run_id: str,
+        cache_dir: Path | None = None,
+    ) -> None:
+        self.root = root
+        self.repo = repo
+        self.worker = worker
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.ai_mode = ai_mode
+        self.run_id = run_id
+        self.home = root / "state" / "worker" / worker
+        self.cache = RepoCache(self._git("remote", "get-url", "origin").stdout.strip(), cache_dir)
+        self.done_path = self.home / "done.json"
+        self.done: dict[str, dict[str, Any]] = self._load_done()
+        self.running: dict[int, tuple[Lease, Future[dict[str, Any]]]] = {}
+        self.running_keys: dict[int, str] = {}
+        self.failures: dict[int, float] = {}
+        self.procs: dict[int, subprocess.Popen[bytes]] = {}
+        self.stopping = threading.Event()
+        self.aborting = False
+        self._git_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="task")
+
+    def _load_done(self) -> dict[str, dict[str, Any]]:
+        try:
+            data = json.loads(self.done_path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _save_done(self) -> None:
+        self.home.mkdir(parents=True, exist_ok=True)
+        tmp = self.done_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.done, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.done_path)
+
+    def _git(self, *args: str) -> subprocess.CompletedProcess[str]:
+        return subprocess.run(["git", "-C", str(self.root), *args], text=True, capture_output=True, check=False)
+
+    def inbox(self) -> list[dict[str, Any]]:
+        items: list[dict[str, Any]] = []
+        for issue in iter_task_issues(self.repo, state="open"):
+            meta, _ = parse_frontmatter(str(issue.get("body") or ""))
+            if str(meta.get("status") or "") != "in_progress":
+                continue
+            if str(meta.get("owner_worker") or "") != self.worker:
+                continue
+            items.append(issue)
+        return items
+
+    @staticmethod
+    def done_key(issue: dict[str, Any]) -> str:
+        """`<issue>:<dispatch_id>` of the current assignment, so a new dispatch of the same issue runs again."""
+        meta, _ = parse_frontmatter(str(issue.get("body") or ""))
+        dispatch_id = str(meta.get("dispatch_id") or "")
+        return f"{issue['number']}:{dispatch_id}" if dispatch_id else str(issue["number"])
+
+    def _eligible(self, issue: dict[str, Any]) -> bool:
+        number = int(issue["number"])
+        if number in self.running or self.done_key(issue) in self.done:
+            return False
+        return time.time() >= self.failures.get(number, 0.0)
+
+    def _forget_done(self, inbox: list[dict[str, Any]]) -> None:
+        """Drop finished entries of issues that left the inbox (merged, closed or reassigned)."""
+        open_numbers = {str(x["number"]) for x in inbox}
+        stale = [key for key in self.done if key.split(":", 1)[0] not in open_numbers]
+        for key in stale:
+            del self.done[key]
+        if stale:
+            self._save_done()
+
+    def poll_once(self) -> int:
+        """Start tasks for newly leased issues; return how many were started."""
+        self._reap()
+        free = self.concurrency - len(self.running)
+        if free <= 0:
+            return 0
+        inbox = self.inbox()
+        self._forget_done(inbox)
+        candidates = [x for x in inbox if self._eligible(x)]
+        if not candidates:
+            return 0
+        self.cache.update()
+        self.cache.sync_workspace(self.root, ["main"])
+        started = 0
+        for issue in candidates[:free]:
+            number = int(issue["number"])
+            lease = Lease(self.home / "leases" / f"{number}.lease")
+            if not lease.acquire():
+                continue
+            self.running[number] = (lease, self._pool.submit(self._run_task, issue))
+            self.running_keys[number] = self.done_key(issue)
+            started += 1
+        return started
+
+    def gc(self) -> list[str]:
+        """Drop worktrees left behind by crashed runs; leased ones are kept."""
+        leases = self.home / "leases"
+        keep = {self.home / "worktrees" / f"issue-{n}" for n in self.running}
+        if leases.is_dir():
+            for lease in leases.glob("*.lease"):
+                if time.time() - lease.stat().st_mtime < LEASE_TTL:
+                    keep.add(self.home / "worktrees" / f"issue-{lease.stem}")
+        with self._git_lock:
+            return gc_worktrees(self.root, self.home / "worktrees", keep, max_age=0)
+
+    def _reap(self) -> None:
+        for number, (lease, future) in list(self.running.items()):
+            if not future.done():
+                continue
+            del self.running[number]
+            key = self.running_keys.pop(number, str(number))
+            lease.release()
+            result = future.result() if future.exception() is None else {"ok": False, "error": str(future.exception())}
+            if result.get("ok"):
+                self.done[key] = {"pr_number": result.get("pr_number"), "finished_at": now_iso()}
+                self.failures.pop(number, None)
+                self._save_done()
+            else:
+                self.failures[number] = time.time() + RETRY_BACKOFF
+
+    def _worktree(self, number: int) -> Path:
+        path = self.home / "worktrees" / f"issue-{number}"
+        with self._git_lock:
+            if path.exists():
+                self._git("worktree", "remove", "--force", str(path))
+            self._git("worktree", "prune")
+            add = self._git("worktree", "add", "--force", "--detach", str(path), "origin/main")
+        if add.returncode != 0:
+            raise RuntimeError(f"git worktree add failed: {add.stderr.strip()}")
+        return path
+
+    def _remove_worktree(self, path: Path) -> None:
+        with self._git_lock:
+            self._git("worktree", "remove", "--force", str(path))
+
+    def _run_task(self, issue: dict[str, Any]) -> dict[str, Any]:
+        number = int(issue["number"])
+        started = time.perf_counter()
+        stamp = dt.datetime.now(dt.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        log_path = self.home / "logs" / f"issue-{number}-{stamp}.log"
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        result: dict[str, Any] = {"ok": False, "issue": number}
+        path: Path | None = None
+        try:
+            path = self._worktree(number)
+            cmd = [
+                sys.executable,
+                str(path / "scripts" / "worker" / "run_task.py"),
+                "--repo", self.repo,
+                "--issue", str(number),
+                "--worker", self.worker,
+                "--ai-mode", self.ai_mode,
+                "--no-sync",
+            ]
+            with log_path.open("wb") as log:
+                proc = subprocess.Popen(cmd, cwd=path, stdout=subprocess.PIPE, stderr=log, start_new_session=True)
+                with self._lock:
+                    self.procs[number] = proc
+                assert proc.stdout is not None
+                last = b""
+                for line in proc.stdout:
+                    log.write(line)
+                    if line.strip():
+                        last = line
+                code = proc.wait()
+            with self._lock:
+                self.procs.pop(number, None)
+            try:
+                parsed = json.loads(last)
+            except json.JSONDecodeError:
+                parsed = {}
+            if isinstance(parsed, dict):
+                result.update(parsed)
+            result["ok"] = code == 0 and bool(result.get("ok"))
+            if code != 0:
+                result["error"] = f"run_task.py exited with {code}"
+        except (OSError, RuntimeError) as exc:
+            result["error"] = str(exc)
+        finally:
+            if path is not None:
+                self._remove_worktree(path)
+        result["log"] = str(log_path.relative_to(self.root))
+        result["elapsed_ms"] = elapsed_ms(started)
+        append_event(
+            self.root,
+            self.run_id,
+            {
+                "type": "task_run",
+                "repo": self.repo,
+                "entity": "issue",
+                "id": number,
+                "action": self.worker,
+                "result": "ok" if result["ok"] else "failed",
+                "details": {k: result.get(k) for k in ("pr_number", "branch", "error", "log", "elapsed_ms") if k in result},
+            },
+        )
+        flush_events()
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+        return result
+
+    def heartbeat(self) -> None:
+        self.home.mkdir(parents=True, exist_ok=True)
+        for lease, _ in list(self.running.values()):
+            lease.touch()
+        data = {
+            "worker": self.worker,
+            "pid": os.getpid(),
+            "host": socket.gethostname(),
+            "running": sorted(self.running),
+            "finished": len(self.done),
+            "concurrency": self.concurrency,
+            "stopping": self.stopping.is_set(),
+            "updated_at": now_iso(),
+        }
+        tmp = self.home / "heartbeat.json.tmp"
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, self.home / "heartbeat.json")
+
+    def _heartbeat_loop(self) -> None:
+        while not self.stopping.wait(HEARTBEAT_INTERVAL):
+            self.heartbeat()
+
+    def request_stop(self, signum: int, _frame: Any) -> None:
+        if self.stopping.is_set():
+            # Second signal: stop waiting for running tasks.
+            self.aborting = True
+            with self._lock:
+                for proc in self.procs.values():
+                    try:
+                        os.killpg(proc.pid, signal.SIGTERM)
+                    except ProcessLookupError:
+                        pass
+            return
+        print(json.dumps({"ok": True, "event": "stopping", "signal": signum, "running": sorted(self.running)}), flush=True)
+        self.stopping.set()
+
+    def run(self, once: bool = False) -> int:
+        self.heartbeat()
+        self.gc()
+        beat = threading.Thread(target=self._heartbeat_loop, name="heartbeat", daemon=True)
+        beat.start()
+        try:
+            while not self.stopping.is_set():
+                try:
+                    self.poll_once()
+                except RuntimeError as exc:
+                    print(json.dumps({"ok": False, "event": "poll_failed", "error": str(exc)}), flush=True)
+                if once:
+                    break
+                self.stopping.wait(self.poll_interval)
+            while self.running:
+                self._reap()
+                time.sleep(0.5)
+        finally:
+            self.stopping.set()
+            self._pool.shutdown(wait=not self.aborting)
+            for lease, _ in self.running.values():
+                lease.release()
+            self.heartbeat()
+        return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repo", required=True)
+    parser.add_argument("--worker", required=True)
+    parser.add_argument("--concurrency", type=int, default=0, help="Tasks run in parallel (default: the worker's max_concurrency in config/workers.yaml, else CPU count).")
+    parser.add_argument("--poll-interval", type=float, default=60.0, help="Seconds between inbox polls.")
+    parser.add_argument("--ai-mode", choices=["mock", "real", "codex"], default="mock")
+    parser.add_argument("--run-id", default="", help="Run id for task_run events (default: worker-<worker>).")
+    parser.add_argument("--cache-dir", default="", help="Mirror cache directory (default: $REPO_CACHE_DIR or ~/ai-factory-workspaces/.mirrors).")
+    parser.add_argument("--once", action="store_true", help="Poll once, wait for the started tasks and exit.")
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parents[2]
+    configured = (load_workers(root).get(args.worker) or {}).get("max_concurrency")
+    daemon = WorkerDaemon(
+        root,
+        args.repo,
+        args.worker,
+        concurrency=args.concurrency or int(configured or 0) or os.cpu_count() or 1,
+        poll_interval=args.poll_interval,
+        ai_mode=args.ai_mode,
+        run_id=args.run_id or f"worker-{args.worker}",
+        cache_dir=Path(args.cache_dir) if args.cache_dir else None,
+    )
+    signal.signal(signal.SIGTERM, daemon.request_stop)
+    signal.signal(signal.SIGINT, daemon.request_stop)
+    return daemon.run(once=args.once)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,101 @@
+"""pytest plugin recording which src/ and scripts/ files each test touches (loaded by impact_select.py)."""
+
+from __future__ import annotations
+
+import ast
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+RECORD_ENV = "TEST_IMPACT_RECORD"
+TRACKED_DIRS = ("src", "scripts")
+SELF = os.path.abspath(__file__)
+
+
+class ImpactRecorder:
+    """Collects `nodeid -> [source files]` from Python-level calls made while each test runs.
+
+    Only `call` events are traced (the trace function returns None, so no line
+    events), which keeps the overhead to one dict lookup per function call.
+    Modules imported at collection time are attributed to a test through the
+    static imports of its test file.
+    """
+
+    def __init__(self, root: Path, out: Path) -> None:
+        self.root = root
+        self.src = tuple(str(root / d) + os.sep for d in TRACKED_DIRS)
+        self.out = out
+        self.tests: dict[str, list[str]] = {}
+        self.markers: dict[str, list[str]] = {}
+        self._files: dict[str, str] = {}
+        self._imports: dict[str, set[str]] = {}
+        self._seen: set[str] = set()
+
+    def _trace(self, frame: Any, event: str, arg: Any) -> None:
+        filename = frame.f_code.co_filename
+        rel = self._files.get(filename)
+        if rel is None:
+            path = os.path.abspath(filename)
+            rel = self._files[filename] = os.path.relpath(path, self.root) if path.startswith(self.src) and path != SELF else ""
+        if rel:
+            self._seen.add(rel)
+        return None
+
+    def _module_file(self, name: str) -> str:
+        # Flat imports resolve through sys.path entries inside the tracked dirs (e.g. scripts/pm).
+        roots = [self.root] + [Path(p) for p in sys.path if (p + os.sep).startswith(self.src)]
+        for root in roots:
+            base = root.joinpath(*name.split("."))
+            for candidate in (base.with_suffix(".py"), base / "__init__.py"):
+                if candidate.is_file() and str(candidate).startswith(self.src):
+                    return candidate.relative_to(self.root).as_posix()
+        return ""
+
+    def _static_imports(self, path: str) -> set[str]:
+        if path not in self._imports:
+            found: set[str] = set()
+            try:
+                tree = ast.parse(Path(path).read_text(encoding="utf-8"))
+            except (OSError, SyntaxError):
+                tree = ast.Module(body=[], type_ignores=[])
+            for node in ast.walk(tree):
+                names: list[str] = []
+                if isinstance(node, ast.Import):
+                    names = [alias.name for alias in node.names]
+                elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                    names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+                found.update(f for f in map(self._module_file, names) if f)
+            self._imports[path] = found
+        return self._imports[path]
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item: pytest.Item, nextitem: pytest.Item | None) -> Any:
+        self._seen = set(self._static_imports(str(item.path)))
+        sys.settrace(self._trace)
+        threading.settrace(self._trace)
+        try:
+            yield
+        finally:
+            sys.settrace(None)
+            threading.settrace(None)  # type: ignore[arg-type]
+        self.tests[item.nodeid] = sorted(self._seen)
+        self.markers[item.nodeid] = sorted({m.name for m in item.iter_markers()})
+
+    def pytest_sessionfinish(self, session: pytest.Session, exitstatus: int) -> None:
+        if exitstatus not in (0, 1) or not self.tests:
+            return
+        self.out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.out.with_name(f"{self.out.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"tests": self.tests, "markers": self.markers}), encoding="utf-8")
+        os.replace(tmp, self.out)
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    out = os.getenv(RECORD_ENV, "").strip()
+    if out:
+        config.pluginmanager.register(ImpactRecorder(Path(str(config.rootpath)), Path(out)), "impact-recorder")
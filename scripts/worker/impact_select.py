@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Select and run only the tests affected by a change, from a recorded per-test coverage map."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from result_cache import run_pytest
+
+TEST_IMPACT = os.getenv("TEST_IMPACT", "true").strip().lower() not in {"0", "false", "no", "off"}
+TEST_IMPACT_DIR = os.getenv("TEST_IMPACT_DIR", "").strip()
+# Older maps, or maps separated from HEAD by bigger changes, are treated as stale.
+TEST_IMPACT_MAX_COMMITS = int(os.getenv("TEST_IMPACT_MAX_COMMITS", "100"))
+TEST_IMPACT_MAX_CHANGED = int(os.getenv("TEST_IMPACT_MAX_CHANGED", "50"))
+MAP_VERSION = 2
+MAPS_KEPT = 8
+# Changes to these can affect any test, so they always force a full run.
+CONFIG_FILES = {"conftest.py", "pytest.ini", "pyproject.toml", "setup.cfg", "tox.ini", "requirements.txt"}
+
+
+def _git(root: Path, *args: str, check: bool = True) -> str:
+    proc = subprocess.run(["git", *args], cwd=root, text=True, capture_output=True, check=False)
+    if check and proc.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {proc.stderr.strip()}")
+    return proc.stdout.strip()
+
+
+def maps_dir(root: Path) -> Path:
+    """Shared by all worktrees of a checkout: maps live next to the common git dir."""
+    if TEST_IMPACT_DIR:
+        return Path(TEST_IMPACT_DIR).expanduser()
+    common = Path(_git(root, "rev-parse", "--git-common-dir"))
+    return (common if common.is_absolute() else root / common) / "test-impact"
+
+
+def _changed_since(root: Path, commit: str) -> set[str]:
+    """Paths that differ between `commit` and the working tree, untracked files included."""
+    changed = set(_git(root, "diff", "--name-only", commit).splitlines())
+    changed.update(_git(root, "ls-files", "--others", "--exclude-standard").splitlines())
+    return {p for p in changed if p}
+
+
+def load_map(root: Path) -> tuple[dict[str, Any] | None, str]:
+    """Newest map recorded on an ancestor of HEAD, or None and the reason it is unusable."""
+    directory = maps_dir(root)
+    candidates = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True) if directory.is_dir() else []
+    for path in candidates:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            continue
+        if not isinstance(data, dict) or data.get("version") != MAP_VERSION:
+            continue
+        commit = str(data.get("commit") or "")
+        if subprocess.run(["git", "merge-base", "--is-ancestor", commit, "HEAD"], cwd=root, capture_output=True).returncode == 0:
+            return data, ""
+    return None, "no coverage map for an ancestor of HEAD"
+
+
+def select(root: Path, scope: str = "tests/unit", marker: str = "") -> dict[str, Any]:
+    """Decide which tests under `scope` must run.
+
+    Tests run when the src/ or scripts/ files they touched, or their own test
+    file, changed since the map was recorded; tests carrying `marker` always
+    run. The result has `mode` "full" (with a `reason`) whenever the map cannot
+    be trusted.
+    """
+    report: dict[str, Any] = {"mode": "full", "reason": "", "scope": scope, "selected": [], "skipped": [], "changed": []}
+    if not TEST_IMPACT:
+        report["reason"] = "TEST_IMPACT disabled"
+        return report
+    data, reason = load_map(root)
+    if data is None:
+        report["reason"] = reason
+        return report
+    commit = str(data["commit"])
+    report["map_commit"] = commit
+    distance = int(_git(root, "rev-list", "--count", f"{commit}..HEAD") or 0)
+    changed = sorted(_changed_since(root, commit) | set(data.get("dirty") or []))
+    report["changed"] = changed
+    config = [p for p in changed if Path(p).name in CONFIG_FILES]
+    if distance > TEST_IMPACT_MAX_COMMITS:
+        report["reason"] = f"map is {distance} commits behind HEAD"
+    elif len(changed) > TEST_IMPACT_MAX_CHANGED:
+        report["reason"] = f"{len(changed)} files changed since the map"
+    elif config:
+        report["reason"] = f"test configuration changed: {', '.join(config)}"
+    if report["reason"]:
+        return report
+
+    prefix = scope.rstrip("/") + "/"
+    tests: dict[str, list[str]] = {k: v for k, v in data["tests"].items() if k.startswith(prefix)}
+    markers: dict[str, list[str]] = data.get("markers") or {}
+    changed_set = set(changed)
+    changed_tests = sorted(p for p in changed if p.startswith(prefix) and p.endswith(".py") and (root / p).is_file())
+    selected: list[str] = list(changed_tests)
+    skipped: list[str] = []
+    covered: set[str] = set()
+    for nodeid, files in sorted(tests.items()):
+        covered.update(files)
+        test_file = nodeid.split("::", 1)[0]
+        if test_file in changed_tests or not (root / test_file).is_file():
+            continue
+        if changed_set.intersection(files) or (marker and marker in markers.get(nodeid, [])):
+            selected.append(nodeid)
+        else:
+            skipped.append(nodeid)
+    report.update(
+        {
+            "mode": "impact",
+            "selected": selected,
+            "skipped": skipped,
+            "uncovered": sorted(p for p in changed if p.startswith(("src/", "scripts/")) and p.endswith(".py") and p not in covered),
+        }
+    )
+    return report
+
+
+def _pytest(python: str, root: Path, args: list[str], record: Path | None = None, cache_mode: str = "use") -> dict[str, Any]:
+    if record is None:
+        return run_pytest(root, python, args, cache_mode)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(Path(__file__).resolve().parent), env.get("PYTHONPATH", "")]))
+    env["TEST_IMPACT_RECORD"] = str(record)
+    return run_pytest(root, python, args, cache_mode, extra=["-p", "impact_plugin"], env=env)
+
+
+def record(root: Path, python: str, scope: str = "tests/unit", cache_mode: str = "use") -> dict[str, Any]:
+    """Run every test under `scope` with coverage tracing and store the map for HEAD.
+
+    A cached result for the same tree skips the run, and with it the map refresh.
+    """
+    directory = maps_dir(root)
+    commit = _git(root, "rev-parse", "HEAD")
+    tmp = directory / f".{commit}.{os.getpid()}.partial"
+    result = _pytest(python, root, [scope], record=tmp, cache_mode=cache_mode)
+    if not tmp.exists():
+        return result
+    try:
+        data = json.loads(tmp.read_text(encoding="utf-8"))
+    finally:
+        tmp.unlink(missing_ok=True)
+    data.update(
+        {
+            "version": MAP_VERSION,
+            "commit": commit,
+            # Uncommitted edits are not part of `commit`; they count as changed for later selections.
+            "dirty": sorted(_changed_since(root, commit)),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+    )
+    out = directory / f"{commit}.json"
+    staged = directory / f".{commit}.{os.getpid()}.tmp"
+    staged.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(staged, out)
+    for stale in sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)[MAPS_KEPT:]:
+        stale.unlink(missing_ok=True)
+    return result
+
+
+def run_impacted(root: Path, python: str, scope: str = "tests/unit", marker: str = "", cache_mode: str = "use") -> dict[str, Any]:
+    """Run the affected tests, or everything (re-recording the map) when selection falls back.
+
+    Raises RuntimeError when the tests fail; returns the selection report otherwise.
+    """
+    report = select(root, scope, marker)
+    if report["mode"] == "full":
+        run = record(root, python, scope, cache_mode) if TEST_IMPACT else _pytest(python, root, [scope], cache_mode=cache_mode)
+    elif report["selected"]:
+        run = _pytest(python, root, report["selected"], cache_mode=cache_mode)
+    else:
+        run = {"code": 0, "cached": False}
+    report["cached"] = bool(run["cached"])
+    code = int(run["code"])
+    if code != 0:
+        raise RuntimeError(f"pytest {scope} exited with {code}")
+    return report
+
+
+def summarize(report: dict[str, Any]) -> dict[str, Any]:
+    """Compact form of a selection report for task output and PR bodies."""
+    out = {"mode": report["mode"], "selected": len(report["selected"]), "skipped": len(report["skipped"]), "cached": report.get("cached", False)}
+    if report.get("reason"):
+        out["reason"] = report["reason"]
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["select", "run", "record"])
+    parser.add_argument("--scope", default="tests/unit", help="Test directory eligible for selection.")
+    parser.add_argument("--marker", default="", help="Tests with this marker always run.")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter that runs pytest.")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore cached test results for this tree.")
+    args = parser.parse_args()
+
+    root = Path(_git(Path.cwd(), "rev-parse", "--show-toplevel"))
+    if args.command == "select":
+        print(json.dumps({"ok": True, **select(root, args.scope, args.marker)}, ensure_ascii=False))
+        return 0
+    cache_mode = "off" if args.no_cache else "use"
+    if args.command == "record":
+        return int(record(root, args.python, args.scope, "off")["code"])
+    try:
+        report = run_impacted(root, args.python, args.scope, args.marker, cache_mode)
+    except RuntimeError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+    print(json.dumps({"ok": True, **report}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
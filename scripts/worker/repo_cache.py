@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Shared bare-mirror object cache for worker workspaces and worktrees."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None  # type: ignore[assignment]
+
+REPO_CACHE_DIR = os.getenv("REPO_CACHE_DIR", "").strip()
+WORKTREE_MAX_AGE = 24 * 3600.0
+
+
+def default_cache_dir() -> Path:
+    if REPO_CACHE_DIR:
+        return Path(REPO_CACHE_DIR).expanduser()
+    return Path.home() / "ai-factory-workspaces" / ".mirrors"
+
+
+def _git(*args: str, cwd: Path | None = None, check: bool = True) -> str:
+    proc = subprocess.run(["git", *args], cwd=cwd, text=True, capture_output=True, check=False)
+    if check and proc.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {proc.stderr.strip()}")
+    return proc.stdout.strip()
+
+
+class RepoCache:
+    """Bare mirror of one remote under the cache directory.
+
+    Workspaces borrow its objects through `objects/info/alternates`, so bringing
+    them up to date is a local ref copy. The mirror never prunes objects, since
+    borrowers may still reference commits that were force-pushed away.
+    """
+
+    def __init__(self, url: str, cache_dir: Path | None = None) -> None:
+        self.url = url
+        name = url.rstrip("/").removesuffix(".git").replace(":", "/").split("/")[-2:]
+        self.path = (cache_dir or default_cache_dir()) / ("__".join(name) + ".git")
+
+    def _locked(self) -> int:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path.parent / f"{self.path.name}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        return fd
+
+    def update(self) -> None:
+        """Create the mirror or fetch incrementally; the only step that uses the network."""
+        fd = self._locked()
+        try:
+            if not (self.path / "HEAD").exists():
+                tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                shutil.rmtree(tmp, ignore_errors=True)
+                _git("init", "--quiet", "--bare", str(tmp))
+                for key, value in (
+                    ("remote.origin.url", self.url),
+                    ("remote.origin.fetch", "+refs/heads/*:refs/heads/*"),
+                    ("gc.pruneExpire", "never"),
+                    ("gc.reflogExpireUnreachable", "never"),
+                ):
+                    _git("--git-dir", str(tmp), "config", key, value)
+                _git("--git-dir", str(tmp), "fetch", "--quiet", "origin")
+                os.replace(tmp, self.path)
+            else:
+                _git("--git-dir", str(self.path), "fetch", "--quiet", "--prune", "origin")
+        finally:
+            os.close(fd)
+
+    def attach(self, workspace: Path) -> None:
+        """Make `workspace` borrow objects from the mirror."""
+        git_dir = Path(_git("rev-parse", "--git-common-dir", cwd=workspace))
+        if not git_dir.is_absolute():
+            git_dir = workspace / git_dir
+        alternates = git_dir / "objects" / "info" / "alternates"
+        objects = str((self.path / "objects").resolve())
+        existing = alternates.read_text(encoding="utf-8").splitlines() if alternates.exists() else []
+        if objects not in {str(Path(x).resolve()) for x in existing if x.strip()}:
+            alternates.parent.mkdir(parents=True, exist_ok=True)
+            alternates.write_text("\n".join(existing + [objects]) + "\n", encoding="utf-8")
+
+    def sync_workspace(self, workspace: Path, branches: list[str] | None = None) -> None:
+        """Copy mirror refs into `refs/remotes/origin/*` of `workspace` without network access."""
+        self.attach(workspace)
+        refspecs = [f"+refs/heads/{b}:refs/remotes/origin/{b}" for b in branches] if branches else ["+refs/heads/*:refs/remotes/origin/*"]
+        _git("fetch", "--quiet", "--no-tags", str(self.path), *refspecs, cwd=workspace)
+
+    def clone(self, target: Path, branch: str) -> None:
+        """New workspace sharing the mirror's objects, with `origin` pointing at the real remote."""
+        _git("clone", "--quiet", "--shared", "--branch", branch, str(self.path), str(target))
+        _git("remote", "set-url", "origin", self.url, cwd=target)
+        self.sync_workspace(target)
+
+
+def gc_worktrees(workspace: Path, directory: Path, keep: set[Path], max_age: float = WORKTREE_MAX_AGE) -> list[str]:
+    """Remove worktrees under `directory` that are not in `keep`, then prune stale registrations.
+
+    Worktrees younger than `max_age` are kept unless `max_age` is 0.
+    """
+    removed: list[str] = []
+    if directory.is_dir():
+        now = time.time()
+        for path in sorted(directory.iterdir()):
+            if path in keep or not path.is_dir():
+                continue
+            if max_age and now - path.stat().st_mtime < max_age:
+                continue
+            _git("worktree", "remove", "--force", str(path), cwd=workspace, check=False)
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path.name)
+    _git("worktree", "prune", cwd=workspace, check=False)
+    return removed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["update", "sync"])
+    parser.add_argument("--url", required=True, help="Remote URL mirrored by the cache.")
+    parser.add_argument("--workspace", default="", help="Workspace to clone or refresh (sync).")
+    parser.add_argument("--branch", default="main")
+    parser.add_argument("--cache-dir", default="")
+    args = parser.parse_args()
+
+    cache = RepoCache(args.url, Path(args.cache_dir) if args.cache_dir else None)
+    started = time.perf_counter()
+    cache.update()
+    out: dict[str, object] = {"ok": True, "mirror": str(cache.path)}
+    if args.command == "sync":
+        if not args.workspace:
+            parser.error("sync requires --workspace")
+        target = Path(args.workspace)
+        if (target / ".git").exists():
+            cache.sync_workspace(target)
+            _git("checkout", "--quiet", args.branch, cwd=target)
+            _git("merge", "--quiet", "--ff-only", f"origin/{args.branch}", cwd=target)
+        else:
+            cache.clone(target, args.branch)
+        out.update({"workspace": str(target), "branch": args.branch, "head": _git("rev-parse", "HEAD", cwd=target)})
+    out["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    print(json.dumps(out, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
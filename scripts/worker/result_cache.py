@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""Test result cache keyed by git tree, test selection and environment, shared with CI through git refs."""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import hashlib
+import hmac
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any
+
+TEST_CACHE = os.getenv("TEST_CACHE", "true").strip().lower() not in {"0", "false", "no", "off"}
+TEST_CACHE_DIR = os.getenv("TEST_CACHE_DIR", "").strip()
+TEST_CACHE_SECRET = os.getenv("TEST_CACHE_SECRET", "").strip()
+REF_PREFIX = "refs/test-cache"
+
+TEST_CACHE_MAX_AGE_DAYS = float(os.getenv("TEST_CACHE_MAX_AGE_DAYS", "14"))
+REQUIREMENT_NAME = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+_ENV_PROBE = """
+import importlib.metadata as md, json, platform, sys
+def version(name):
+    try:
+        return md.version(name)
+    except md.PackageNotFoundError:
+        return None
+print(json.dumps([platform.python_implementation(), "%d.%d" % sys.version_info[:2], {n: version(n) for n in sys.argv[1:]}]))
+"""
+
+
+def default_cache_dir() -> Path:
+    if TEST_CACHE_DIR:
+        return Path(TEST_CACHE_DIR).expanduser()
+    return Path.home() / "ai-factory-workspaces" / ".test-results"
+
+
+def _git(root: Path, *args: str, env: dict[str, str] | None = None, check: bool = True) -> str:
+    proc = subprocess.run(["git", *args], cwd=root, text=True, capture_output=True, env=env, check=False)
+    if check and proc.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {proc.stderr.strip()}")
+    return proc.stdout.strip()
+
+
+def tree_hash(root: Path) -> str:
+    """Tree id of the working tree as it would be committed, untracked (non-ignored) files included."""
+    if not _git(root, "status", "--porcelain"):
+        return _git(root, "rev-parse", "HEAD^{tree}")
+    index = Path(_git(root, "rev-parse", "--git-path", "index"))
+    index = index if index.is_absolute() else root / index
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, GIT_INDEX_FILE=str(Path(tmp) / "index"))
+        if index.exists():
+            shutil.copyfile(index, env["GIT_INDEX_FILE"])
+        _git(root, "add", "-A", env=env)
+        return _git(root, "write-tree", env=env)
+
+
+def declared_requirements(path: Path) -> list[str]:
+    """Normalized distribution names listed in a requirements file (options and includes skipped)."""
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return []
+    names: set[str] = set()
+    for line in lines:
+        match = REQUIREMENT_NAME.match(line.split("#", 1)[0])
+        if match:
+            names.add(re.sub(r"[-_.]+", "-", match.group(1)).lower())
+    return sorted(names)
+
+
+@functools.lru_cache(maxsize=None)
+def env_hash(python: str, requirements: Path) -> str:
+    """Interpreter (implementation, major.minor) plus the installed versions of the declared requirements.
+
+    Tooling outside `requirements` (pip, setuptools, runner extras) is left out,
+    so a worker venv and a CI environment that resolve the same versions match.
+    """
+    names = declared_requirements(requirements)
+    out = subprocess.run([python, "-c", _ENV_PROBE, *names], text=True, capture_output=True, check=True).stdout
+    return hashlib.sha256(out.encode("utf-8")).hexdigest()[:16]
+
+
+def selection_key(args: list[str], env: str) -> str:
+    return hashlib.sha256(json.dumps([args, env]).encode("utf-8")).hexdigest()[:16]
+
+
+def _payload(summary: dict[str, Any]) -> bytes:
+    return json.dumps({k: v for k, v in summary.items() if k != "signature"}, sort_keys=True).encode("utf-8")
+
+
+def sign(summary: dict[str, Any], secret: str) -> str:
+    return hmac.new(secret.encode("utf-8"), _payload(summary), hashlib.sha256).hexdigest()
+
+
+def junit_counts(path: Path) -> dict[str, int]:
+    counts = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    try:
+        root = ET.parse(path).getroot()
+    except (OSError, ET.ParseError):
+        return counts
+    for suite in root.iter("testsuite"):
+        for name in counts:
+            counts[name] += int(suite.get(name) or 0)
+    return counts
+
+
+class ResultCache:
+    """Signed pass/fail summaries and JUnit reports under `directory/<tree>/<selection>/`.
+
+    Entries are published to the remote as `refs/test-cache/<tree>/<selection>`
+    commits holding the same two files, so CI can reuse a worker's result for
+    an identical tree and environment. With a secret configured, only entries
+    whose HMAC verifies are trusted; without one, remote entries are ignored.
+    """
+
+    def __init__(self, root: Path, directory: Path | None = None, secret: str = TEST_CACHE_SECRET, remote: str = "origin") -> None:
+        self.root = root
+        self.directory = directory or default_cache_dir()
+        self.secret = secret
+        self.remote = remote
+
+    def _trusted(self, summary: dict[str, Any], remote: bool) -> bool:
+        if not self.secret:
+            return not remote
+        return hmac.compare_digest(str(summary.get("signature") or ""), sign(summary, self.secret))
+
+    def _fetch(self, tree: str, sel: str) -> tuple[dict[str, Any], bytes] | None:
+        if not self.secret:
+            return None
+        ref = f"{REF_PREFIX}/{tree}/{sel}"
+        if subprocess.run(["git", "fetch", "--quiet", self.remote, f"+{ref}:{ref}"], cwd=self.root, capture_output=True).returncode != 0:
+            return None
+        try:
+            summary = json.loads(_git(self.root, "show", f"{ref}:summary.json"))
+            junit = subprocess.run(["git", "show", f"{ref}:junit.xml"], cwd=self.root, capture_output=True, check=True).stdout
+        except (RuntimeError, subprocess.CalledProcessError, json.JSONDecodeError):
+            return None
+        return summary, junit
+
+    def lookup(self, tree: str, sel: str) -> tuple[dict[str, Any], Path] | None:
+        entry = self.directory / tree / sel
+        try:
+            summary = json.loads((entry / "summary.json").read_text(encoding="utf-8"))
+            if self._trusted(summary, remote=False):
+                return summary, entry / "junit.xml"
+        except (OSError, json.JSONDecodeError):
+            pass
+        fetched = self._fetch(tree, sel)
+        if fetched is None or not self._trusted(fetched[0], remote=True):
+            return None
+        return fetched[0], self._write(entry, fetched[0], fetched[1])
+
+    def _write(self, entry: Path, summary: dict[str, Any], junit: bytes) -> Path:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=entry.parent, prefix=f".{entry.name}."))
+        (tmp / "junit.xml").write_bytes(junit)
+        (tmp / "summary.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        return entry / "junit.xml"
+
+    def store(self, summary: dict[str, Any], junit: Path) -> None:
+        if self.secret:
+            summary["signature"] = sign(summary, self.secret)
+        data = junit.read_bytes() if junit.exists() else b""
+        self._write(self.directory / summary["tree"] / summary["selection"], summary, data)
+
+    def publish(self, tree: str) -> list[str]:
+        """Push every signed local entry for `tree` to the remote; returns the refs pushed."""
+        base = self.directory / tree
+        if not self.secret or not base.is_dir():
+            return []
+        refs: list[str] = []
+        for entry in sorted(p for p in base.iterdir() if (p / "summary.json").exists()):
+            blobs = [_git(self.root, "hash-object", "-w", str(entry / name)) for name in ("junit.xml", "summary.json")]
+            listing = f"100644 blob {blobs[0]}\tjunit.xml\n100644 blob {blobs[1]}\tsummary.json\n"
+            mktree = subprocess.run(["git", "mktree"], cwd=self.root, input=listing, text=True, capture_output=True, check=True)
+            commit = _git(
+                self.root,
+                "-c", "user.name=test-cache", "-c", "user.email=test-cache@local.invalid",
+                "commit-tree", mktree.stdout.strip(), "-m", f"test results {entry.name}",
+            )
+            ref = f"{REF_PREFIX}/{tree}/{entry.name}"
+            _git(self.root, "update-ref", ref, commit)
+            refs.append(f"+{ref}:{ref}")
+        if refs:
+            _git(self.root, "push", "--quiet", self.remote, *refs)
+        return [r.split(":", 1)[1] for r in refs]
+
+    def prune(self, max_age_days: float = TEST_CACHE_MAX_AGE_DAYS) -> dict[str, list[str]]:
+        """Delete local entries and remote `refs/test-cache/*` refs older than `max_age_days`."""
+        cutoff = time.time() - max_age_days * 86400
+        removed: dict[str, list[str]] = {"local": [], "remote": []}
+        if self.directory.is_dir():
+            for entry in sorted(self.directory.glob("*/*")):
+                summary = entry / "summary.json"
+                if summary.exists() and summary.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry, ignore_errors=True)
+                    removed["local"].append(f"{entry.parent.name}/{entry.name}")
+            for tree in self.directory.iterdir():
+                if tree.is_dir() and not any(tree.iterdir()):
+                    tree.rmdir()
+        _git(self.root, "fetch", "--quiet", "--prune", self.remote, f"+{REF_PREFIX}/*:{REF_PREFIX}/*")
+        listing = _git(self.root, "for-each-ref", "--format=%(refname) %(committerdate:unix)", REF_PREFIX)
+        stale = [ref for ref, stamp in (line.split() for line in listing.splitlines()) if int(stamp) < cutoff]
+        for start in range(0, len(stale), 100):
+            chunk = stale[start : start + 100]
+            _git(self.root, "push", "--quiet", self.remote, *(f":{ref}" for ref in chunk))
+            for ref in chunk:
+                _git(self.root, "update-ref", "-d", ref)
+        removed["remote"] = stale
+        return removed
+
+
+def run_pytest(
+    root: Path,
+    python: str,
+    args: list[str],
+    mode: str = "use",
+    cache: ResultCache | None = None,
+    extra: list[str] | None = None,
+    env: dict[str, str] | None = None,
+    junitxml: Path | None = None,
+) -> dict[str, Any]:
+    """Run `python -m pytest <args> -v`, or replay a passing cached run of the same tree and environment.
+
+    `mode` is "use" (skip on a hit), "verify" (run anyway and compare with the
+    recorded outcome) or "off" (ignore the cache for reading). Every fresh run is
+    stored. `extra` arguments (e.g. plugins) are passed to pytest but not keyed.
+    """
+    cache = cache or ResultCache(root)
+    tree = tree_hash(root)
+    env_key = env_hash(python, root / "requirements.txt")
+    sel = selection_key(args, env_key)
+    result: dict[str, Any] = {"args": args, "tree": tree, "selection": sel, "cached": False}
+    recorded = cache.lookup(tree, sel) if TEST_CACHE and mode != "off" else None
+    if recorded is not None and mode == "use" and recorded[0].get("outcome") == "passed":
+        summary, junit = recorded
+        print(f"test cache hit: {' '.join(args)} passed on tree {tree[:12]} at {summary.get('created_at')}", file=sys.stderr)
+        if junitxml is not None:
+            shutil.copyfile(junit, junitxml)
+        result.update({"cached": True, "code": int(summary.get("exit_code") or 0), "counts": summary.get("counts")})
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp:
+        junit = Path(tmp) / "junit.xml"
+        started = time.perf_counter()
+        sys.stdout.flush()
+        code = subprocess.run(
+            [python, "-m", "pytest", *args, *(extra or []), "-v", f"--junitxml={junit}"], cwd=root, env=env, check=False
+        ).returncode
+        summary = {
+            "tree": tree,
+            "selection": sel,
+            "args": args,
+            "env": env_key,
+            "outcome": "passed" if code == 0 else "failed",
+            "exit_code": code,
+            "counts": junit_counts(junit),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        if junitxml is not None and junit.exists():
+            shutil.copyfile(junit, junitxml)
+        if TEST_CACHE:
+            cache.store(summary, junit)
+    result.update({"code": code, "counts": summary["counts"]})
+    if recorded is not None and mode == "verify":
+        result["verified"] = recorded[0].get("outcome") == summary["outcome"]
+        if not result["verified"]:
+            print(f"test cache mismatch: recorded {recorded[0].get('outcome')}, now {summary['outcome']}", file=sys.stderr)
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(usage="%(prog)s {run,lookup,publish,prune} [options] [-- pytest args]")
+    parser.add_argument("command", choices=["run", "lookup", "publish", "prune"])
+    parser.add_argument("--python", default=sys.executable, help="Interpreter that runs pytest.")
+    parser.add_argument("--junitxml", default="", help="Also write the (possibly cached) JUnit report here.")
+    parser.add_argument("--no-cache", action="store_true", help="Always run; the fresh result still replaces the cached one.")
+    parser.add_argument("--verify", action="store_true", help="Run and compare with the recorded result.")
+    parser.add_argument("--cache-dir", default="")
+    parser.add_argument("--max-age-days", type=float, default=TEST_CACHE_MAX_AGE_DAYS, help="prune: drop entries and refs older than this.")
+    argv = sys.argv[1:]
+    pytest_args = argv[argv.index("--") + 1 :] if "--" in argv else []
+    args = parser.parse_args(argv[: argv.index("--")] if "--" in argv else argv)
+
+    root = Path(_git(Path.cwd(), "rev-parse", "--show-toplevel"))
+    cache = ResultCache(root, Path(args.cache_dir) if args.cache_dir else None)
+    if args.command == "publish":
+        print(json.dumps({"ok": True, "refs": cache.publish(_git(root, "rev-parse", "HEAD^{tree}"))}, ensure_ascii=False))
+        return 0
+    if args.command == "prune":
+        print(json.dumps({"ok": True, **cache.prune(args.max_age_days)}, ensure_ascii=False))
+        return 0
+    if args.command == "lookup":
+        tree = tree_hash(root)
+        recorded = cache.lookup(tree, selection_key(pytest_args, env_hash(args.python, root / "requirements.txt")))
+        print(json.dumps({"ok": recorded is not None, "tree": tree, "summary": recorded[0] if recorded else None}, ensure_ascii=False))
+        return 0 if recorded is not None else 1
+
+    mode = "off" if args.no_cache else "verify" if args.verify else "use"
+    result = run_pytest(root, args.python, pytest_args, mode, cache, junitxml=Path(args.junitxml) if args.junitxml else None)
+    print(json.dumps({"ok": result["code"] == 0, **result}, ensure_ascii=False))
+    return int(result["code"])
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""Run one task issue end to end: branch, implement, test, push and open/update the PR."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "pm"))
+
+from ai_adapter import plan
+from common import elapsed_ms, gh_api, marker_from_task_id, now_iso
+from frontmatter_codec import parse_frontmatter
+from impact_select import run_impacted, summarize
+from result_cache import ResultCache, run_pytest, tree_hash
+from venv_cache import VenvCache
+
+_HEADER = '''"""Small module used by the MVP worker flow."""
+
+
+def add(a, b):
+    return a + b
+
+
+'''
+_MULTIPLY_PENDING = '''def multiply(a, b):
+    raise NotImplementedError("TASK-002 pending")
+
+
+'''
+_MULTIPLY = '''def multiply(a, b):
+    return a * b
+
+
+'''
+_DIVIDE_PENDING = '''def safe_divide(a, b):
+    raise NotImplementedError("TASK-003 pending")
+'''
+_DIVIDE = '''def safe_divide(a, b):
+    if b == 0:
+        raise ValueError("division by zero")
+    return a / b
+'''
+MATH_OPS = {
+    "TASK-001": _HEADER + _MULTIPLY_PENDING + _DIVIDE_PENDING,
+    "TASK-002": _HEADER + _MULTIPLY + _DIVIDE_PENDING,
+}
+MATH_OPS_DEFAULT = _HEADER + _MULTIPLY + _DIVIDE
+
+
+class TaskError(RuntimeError):
+    pass
+
+
+def _run(*argv: str, cwd: Path) -> None:
+    """Run a command with output passed through, as the shell runner did."""
+    sys.stdout.flush()
+    proc = subprocess.run(list(argv), cwd=cwd, check=False)
+    if proc.returncode != 0:
+        raise TaskError(f"{' '.join(argv)} exited with {proc.returncode}")
+
+
+def task_meta(issue: dict[str, Any]) -> dict[str, str]:
+    meta, _ = parse_frontmatter(str(issue.get("body") or ""))
+    task_id = str(meta.get("task_id") or "").strip()
+    if not task_id:
+        raise TaskError("task_id missing")
+    marker = marker_from_task_id(task_id)
+    if not marker:
+        raise TaskError(f"invalid task_id: {task_id}")
+    return {
+        "task_id": task_id,
+        "task_type": str(meta.get("task_type") or "").strip(),
+        "status": str(meta.get("status") or "").strip(),
+        "marker": marker,
+        "title": str(issue.get("title") or ""),
+    }
+
+
+def write_files(root: Path, task_id: str, worker: str, ai_result: dict[str, Any]) -> list[str]:
+    (root / "src/mvp_app/math_ops.py").write_text(MATH_OPS.get(task_id, MATH_OPS_DEFAULT), encoding="utf-8")
+    (root / "docs/STATUS.md").write_text(
+        "\n".join(
+            [
+                "# STATUS",
+                "",
+                "- phase: IMPLEMENT_TEST",
+                f"- task_id: {task_id}",
+                f"- worker: {worker}",
+                f"- ai_mode: {ai_result.get('mode')}",
+                f"- ai_note: {ai_result.get('note')}",
+                f"- updated_at: {now_iso()}",
+                "",
+            ]
+        ),
+        encoding="utf-8",
+    )
+    return ["src/mvp_app/math_ops.py", "docs/STATUS.md"]
+
+
+def pr_body(
+    worker: str, issue: int, meta: dict[str, str], ai_mode: str, ai_result: dict[str, Any], selection: dict[str, Any]
+) -> str:
+    unit = "- [x] pytest tests/unit -v"
+    if selection["mode"] == "impact":
+        unit = f"- [x] pytest tests/unit (impact selection: {len(selection['selected'])} run, {len(selection['skipped'])} skipped)"
+    return "\n".join(
+        [
+            "## Summary",
+            f"- Worker {worker} implemented {meta['task_id']} ({meta['task_type']})",
+            "",
+            "## Task Link",
+            f"Closes #{issue}",
+            "",
+            "## Tests",
+            unit,
+            f"- [x] pytest tests/acceptance -m {meta['marker']} -v",
+            "",
+            "## AI",
+            f"- mode: {ai_mode}",
+            f"- payload: {json.dumps(ai_result, ensure_ascii=False)}",
+        ]
+    )
+
+
+def upsert_pr(repo: str, branch: str, title: str, body: str) -> int:
+    owner = repo.split("/", 1)[0]
+    existing = gh_api(f"repos/{repo}/pulls?state=open&head={owner}:{branch}&per_page=1")
+    if isinstance(existing, list) and existing:
+        number = int(existing[0]["number"])
+        gh_api(f"repos/{repo}/pulls/{number}", method="PATCH", payload={"title": title, "body": body})
+        return number
+    created = gh_api(
+        f"repos/{repo}/pulls",
+        method="POST",
+        payload={"title": title, "head": branch, "base": "main", "body": body},
+    )
+    if not isinstance(created, dict) or not created.get("number"):
+        raise TaskError(f"Failed to resolve PR number after creation for branch {branch}")
+    return int(created["number"])
+
+
+def run_task(
+    repo: str, issue: int, worker: str, ai_mode: str, sync: bool, root: Path, cache_mode: str = "use"
+) -> dict[str, Any]:
+    timings: dict[str, float] = {}
+
+    started = time.perf_counter()
+    meta = task_meta(gh_api(f"repos/{repo}/issues/{issue}"))
+    branch_suffix = re.sub(r"[^a-z0-9-]", "", meta["task_id"].lower())
+    branch = f"worker/{worker}/task-{branch_suffix}"
+    if sync:
+        # Without --no-sync, bring the checkout to the latest main in place.
+        _run("git", "fetch", "origin", "main", cwd=root)
+        _run("git", "checkout", "main", cwd=root)
+        _run("git", "pull", "--ff-only", "origin", "main", cwd=root)
+    _run("git", "checkout", "-B", branch, cwd=root)
+    timings["fetch"] = elapsed_ms(started)
+
+    started = time.perf_counter()
+    ai_result = plan(ai_mode, meta["task_id"], meta["task_type"], str(issue), meta["title"])
+    timings["ai"] = elapsed_ms(started)
+
+    started = time.perf_counter()
+    paths = write_files(root, meta["task_id"], worker, ai_result)
+    timings["files"] = elapsed_ms(started)
+
+    started = time.perf_counter()
+    python = VenvCache().ensure(root / "requirements.txt")["python"]
+    timings["deps"] = elapsed_ms(started)
+
+    started = time.perf_counter()
+    # Unit tests go through impact selection; the task's acceptance marker always runs in full.
+    selection = run_impacted(root, python, "tests/unit", meta["marker"], cache_mode)
+    acceptance = run_pytest(root, python, ["tests/acceptance", "-m", meta["marker"]], cache_mode)
+    if acceptance["code"] != 0:
+        raise TaskError(f"pytest tests/acceptance -m {meta['marker']} exited with {acceptance['code']}")
+    timings["tests"] = elapsed_ms(started)
+
+    started = time.perf_counter()
+    _run("git", "add", *paths, cwd=root)
+    if subprocess.run(["git", "diff", "--cached", "--quiet"], cwd=root, check=False).returncode == 0:
+        raise TaskError(f"No changes to commit for {meta['task_id']}")
+    # Identity is passed per command: concurrent worktrees share one .git/config.
+    _run(
+        "git", "-c", f"user.name={worker}", "-c", f"user.email={worker}@local.invalid",
+        "commit", "-m", f"feat({meta['task_id']}): implement by {worker} [{ai_mode}]",
+        cwd=root,
+    )
+    _run("git", "push", "-u", "origin", branch, "--force", cwd=root)
+    # Signed results for the pushed tree let the PR checks skip identical runs.
+    try:
+        published = ResultCache(root).publish(tree_hash(root))
+    except (RuntimeError, subprocess.CalledProcessError) as exc:
+        print(f"publishing test results failed: {exc}", file=sys.stderr)
+        published = []
+    timings["push"] = elapsed_ms(started)
+
+    started = time.perf_counter()
+    body = pr_body(worker, issue, meta, ai_mode, ai_result, selection)
+    pr_number = upsert_pr(repo, branch, f"feat: {meta['task_id']} by {worker}", body)
+    timings["pr"] = elapsed_ms(started)
+
+    return {
+        "ok": True,
+        "repo": repo,
+        "issue": issue,
+        "task_id": meta["task_id"],
+        "worker": worker,
+        "ai_mode": ai_mode,
+        "marker": meta["marker"],
+        "branch": branch,
+        "pr_number": pr_number,
+        "pr_url": f"https://github.com/{repo}/pull/{pr_number}",
+        "tests": {**summarize(selection), "acceptance_cached": acceptance["cached"], "published": len(published)},
+        "timings_ms": timings,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repo", required=True)
+    parser.add_argument("--issue", type=int, required=True)
+    parser.add_argument("--worker", required=True)
+    parser.add_argument("--ai-mode", choices=["mock", "real", "codex"], default="mock")
+    parser.add_argument("--no-sync", action="store_true", help="HEAD is already on an up-to-date main (e.g. a fresh worktree).")
+    parser.add_argument("--no-cache", action="store_true", help="Run all tests even if results for this tree are cached.")
+    args = parser.parse_args()
+
+    top = subprocess.run(["git", "rev-parse", "--show-toplevel"], text=True, capture_output=True, check=False)
+    if top.returncode != 0:
+        print("Must run inside a git repo", file=sys.stderr)
+        return 1
+    try:
+        result = run_task(
+            args.repo, args.issue, args.worker, args.ai_mode, not args.no_sync, Path(top.stdout.strip()),
+            "off" if args.no_cache else "use",
+        )
+    except (TaskError, RuntimeError) as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+    print(json.dumps(result, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
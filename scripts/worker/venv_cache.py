@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Content-addressed virtualenv cache keyed by requirements and interpreter."""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None  # type: ignore[assignment]
+
+VENV_CACHE_DIR = os.getenv("VENV_CACHE_DIR", "").strip()
+VENV_CACHE_MAX_MB = float(os.getenv("VENV_CACHE_MAX_MB", "2048"))
+# Environments used this recently are never evicted: a task may still be running in them.
+IN_USE_GRACE = 3600.0
+MARKER = ".venv-cache.json"
+
+
+def default_cache_dir() -> Path:
+    if VENV_CACHE_DIR:
+        return Path(VENV_CACHE_DIR).expanduser()
+    return Path.home() / "ai-factory-workspaces" / ".venvs"
+
+
+def _interpreter_tag(python: str) -> str:
+    if python == sys.executable:
+        return f"{platform.python_implementation()}-{platform.python_version()}-{platform.machine()}"
+    out = subprocess.run(
+        [python, "-c", "import platform; print(platform.python_implementation(), platform.python_version(), platform.machine(), sep='-')"],
+        text=True,
+        capture_output=True,
+        check=True,
+    )
+    return out.stdout.strip()
+
+
+def env_key(requirements: Path, python: str = sys.executable) -> str:
+    digest = hashlib.sha256()
+    digest.update(_interpreter_tag(python).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(requirements.read_bytes())
+    return digest.hexdigest()[:20]
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for dirpath, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _touch(marker: Path) -> bool:
+    try:
+        os.utime(marker)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+class VenvCache:
+    """Virtualenvs under `directory/<key>`, one per requirements+interpreter hash.
+
+    An environment is usable once its marker file exists; it is written last,
+    under a per-key lock, so concurrent callers either wait for the builder or
+    reuse the finished env. The marker's mtime records the last use for LRU
+    eviction under `max_bytes`.
+    """
+
+    def __init__(self, directory: Path | None = None, max_bytes: int = int(VENV_CACHE_MAX_MB * 1024 * 1024)) -> None:
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def python_of(env: Path) -> Path:
+        return env / "bin" / "python"
+
+    def _lock(self, key: str) -> int:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.directory / f"{key}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        return fd
+
+    def ensure(self, requirements: Path, python: str = sys.executable) -> dict[str, Any]:
+        key = env_key(requirements, python)
+        env = self.directory / key
+        marker = env / MARKER
+        if _touch(marker):
+            return {"key": key, "env": str(env), "python": str(self.python_of(env)), "hit": True}
+        fd = self._lock(key)
+        try:
+            if _touch(marker):
+                return {"key": key, "env": str(env), "python": str(self.python_of(env)), "hit": True}
+            shutil.rmtree(env, ignore_errors=True)
+            subprocess.run([python, "-m", "venv", str(env)], check=True)
+            subprocess.run(
+                [str(self.python_of(env)), "-m", "pip", "install", "-q", "--disable-pip-version-check", "-r", str(requirements)],
+                check=True,
+            )
+            info = {"key": key, "requirements": requirements.read_text(encoding="utf-8"), "created_at": time.time()}
+            info["size"] = _dir_size(env)
+            tmp = env / f"{MARKER}.tmp"
+            tmp.write_text(json.dumps(info), encoding="utf-8")
+            os.replace(tmp, marker)
+        except subprocess.CalledProcessError as exc:
+            shutil.rmtree(env, ignore_errors=True)
+            raise RuntimeError(f"building venv {key} failed: {exc}") from exc
+        finally:
+            os.close(fd)
+        self.evict(keep=key)
+        return {"key": key, "env": str(env), "python": str(self.python_of(env)), "hit": False}
+
+    def entries(self) -> list[tuple[float, int, Path]]:
+        """`(last_used, size, env)` for every finished environment, least recently used first."""
+        out: list[tuple[float, int, Path]] = []
+        if not self.directory.is_dir():
+            return out
+        for env in self.directory.iterdir():
+            marker = env / MARKER
+            try:
+                size = int(json.loads(marker.read_text(encoding="utf-8")).get("size") or 0)
+                out.append((marker.stat().st_mtime, size, env))
+            except (OSError, ValueError):
+                continue
+        return sorted(out)
+
+    def evict(self, keep: str = "") -> list[str]:
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        evicted: list[str] = []
+        now = time.time()
+        for last_used, size, env in entries:
+            if total <= self.max_bytes:
+                break
+            if env.name == keep or now - last_used < IN_USE_GRACE:
+                continue
+            fd = self._lock(env.name)
+            try:
+                (env / MARKER).unlink(missing_ok=True)
+                shutil.rmtree(env, ignore_errors=True)
+            finally:
+                os.close(fd)
+            total -= size
+            evicted.append(env.name)
+        return evicted
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["ensure", "gc"])
+    parser.add_argument("--requirements", default="requirements.txt")
+    parser.add_argument("--python", default=sys.executable, help="Base interpreter for new environments.")
+    parser.add_argument("--cache-dir", default="")
+    parser.add_argument("--print-python", action="store_true", help="Print only the env interpreter path (ensure).")
+    args = parser.parse_args()
+
+    cache = VenvCache(Path(args.cache_dir) if args.cache_dir else None)
+    if args.command == "gc":
+        print(json.dumps({"ok": True, "evicted": cache.evict()}, ensure_ascii=False))
+        return 0
+
+    started = time.perf_counter()
+    # pip and venv output goes to stderr so stdout stays machine-readable.
+    stdout = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        result = cache.ensure(Path(args.requirements), args.python)
+    finally:
+        os.dup2(stdout, 1)
+        os.close(stdout)
+    if args.print_python:
+        print(result["python"])
+    else:
+        print(json.dumps({"ok": True, **result, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
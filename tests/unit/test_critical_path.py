@@ -0,0 +1,133 @@
+from typing import Any
+
+import pytest
+
+from create_task import _issue_payload
+from scheduler import predict_makespan
+from task_graph import TaskGraph, task_estimate
+
+
+def issue(number: int, task_id: str, depends_on: list[str] | None = None, **meta: Any) -> dict[str, Any]:
+    lines = ["---", f"task_id: {task_id}", "task_type: IMPL", f"depends_on: [{', '.join(depends_on or [])}]"]
+    lines += [f"{key}: {value}" for key, value in meta.items()]
+    lines += ["---", "", "body"]
+    return {"number": number, "state": "open", "labels": [], "body": "\n".join(lines)}
+
+
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [(None, 1.0), ("", 1.0), (3, 3.0), ("2.5", 2.5), (0, 1.0), (-2, 1.0), ("abc", 1.0), (float("inf"), 1.0), (float("nan"), 1.0)],
+)
+def test_task_estimate_falls_back_to_one(raw: Any, expected: float) -> None:
+    assert task_estimate({"estimate": raw}) == expected
+
+
+def test_critical_paths_take_deepest_and_heaviest_chains() -> None:
+    graph = TaskGraph.from_issues(
+        [
+            issue(1, "TASK-001"),
+            issue(2, "TASK-002", ["TASK-001"]),
+            issue(3, "TASK-003", ["TASK-002"]),
+            issue(4, "TASK-004", ["TASK-001"], estimate=5),
+            issue(5, "TASK-005"),
+        ]
+    )
+    paths = graph.critical_paths()
+    assert paths["TASK-001"] == (3, 6.0)
+    assert paths["TASK-002"] == (2, 2.0)
+    assert paths["TASK-004"] == (1, 5.0)
+    assert paths["TASK-005"] == (1, 1.0)
+
+
+def test_critical_paths_skip_done_tasks_and_cycles() -> None:
+    graph = TaskGraph.from_issues(
+        [
+            issue(1, "TASK-001"),
+            issue(2, "TASK-002", ["TASK-001"]),
+            issue(3, "TASK-003", ["TASK-004"]),
+            issue(4, "TASK-004", ["TASK-003"]),
+            issue(5, "TASK-005", ["TASK-003"]),
+        ]
+    )
+    graph.mark_done("TASK-001")
+    paths = graph.critical_paths()
+    assert "TASK-001" not in paths
+    assert paths["TASK-002"] == (1, 1.0)
+    assert paths["TASK-003"] == paths["TASK-004"] == paths["TASK-005"] == (1, 1.0)
+
+
+def test_priority_key_orders_by_priority_then_weight_then_depth() -> None:
+    graph = TaskGraph.from_issues(
+        [
+            issue(1, "TASK-001"),
+            issue(2, "TASK-002", ["TASK-001"]),
+            issue(3, "TASK-003", estimate=2),
+            issue(4, "TASK-004", priority=1),
+            issue(5, "TASK-005", estimate=4),
+        ]
+    )
+    paths = graph.critical_paths()
+    ready = [tid for tid in graph.nodes if graph.is_unblocked(tid)]
+    assert sorted(ready, key=lambda tid: graph.priority_key(tid, paths)) == ["TASK-004", "TASK-005", "TASK-001", "TASK-003"]
+    assert graph.priority_key("TASK-404", paths) == (0, -1.0, -1)
+
+
+def test_critical_path_order_beats_issue_order() -> None:
+    issues = [issue(n, f"TASK-{n:03d}") for n in range(1, 4)]
+    issues += [issue(4, "TASK-004"), issue(5, "TASK-005", ["TASK-004"]), issue(6, "TASK-006", ["TASK-005"])]
+    graph = TaskGraph.from_issues(issues)
+    workers = {"a": {"task_types": ["IMPL"], "max_concurrency": 1}}
+    paths = graph.critical_paths()
+    by_path = predict_makespan(graph, workers, lambda tid: graph.priority_key(tid, paths))
+    by_issue = predict_makespan(graph, workers, lambda tid: 0)
+    assert by_path["makespan"] == by_issue["makespan"] == 6.0
+    assert by_path["first_wave"] == [{"task_id": "TASK-004", "issue": 4, "worker": "a"}]
+    assert by_issue["first_wave"] == [{"task_id": "TASK-001", "issue": 1, "worker": "a"}]
+
+    workers = {"a": {"task_types": ["IMPL"], "max_concurrency": 2}}
+    assert predict_makespan(graph, workers, lambda tid: graph.priority_key(tid, paths))["makespan"] == 3.0
+    assert predict_makespan(graph, workers, lambda tid: 0)["makespan"] == 4.0
+
+
+def test_predict_makespan_reports_unschedulable_tasks() -> None:
+    graph = TaskGraph.from_issues(
+        [
+            issue(1, "TASK-001", status="in_progress", owner_worker="a", estimate=2),
+            issue(2, "TASK-002", ["TASK-001"]),
+            issue(3, "TASK-003", ["TASK-404"]),
+            issue(4, "TASK-004", ["TASK-005"]),
+            issue(5, "TASK-005", ["TASK-004"]),
+        ]
+    )
+    plan = predict_makespan(graph, {"a": {"task_types": ["IMPL"], "max_concurrency": 1}}, lambda tid: 0)
+    assert plan["makespan"] == 3.0
+    assert plan["tasks"] == 2
+    assert plan["unschedulable"] == ["TASK-003", "TASK-004", "TASK-005"]
+    assert plan["first_wave"] == []
+
+
+def spec(**extra: Any) -> dict[str, Any]:
+    return {"task_id": "TASK-001", "task_type": "IMPL", "title": "Do it", "acceptance": ["works"], **extra}
+
+
+@pytest.mark.parametrize(
+    ("extra", "message"),
+    [
+        ({"estimate": "soon"}, "estimate must be a number"),
+        ({"estimate": [1]}, "estimate must be a number"),
+        ({"estimate": "inf"}, "estimate must be a positive finite number"),
+        ({"estimate": "nan"}, "estimate must be a positive finite number"),
+        ({"estimate": 0}, "estimate must be a positive finite number"),
+        ({"priority": "high"}, "priority must be an integer"),
+    ],
+)
+def test_issue_payload_rejects_bad_scheduling_fields(extra: dict[str, Any], message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        _issue_payload(spec(**extra))
+
+
+def test_issue_payload_records_scheduling_fields() -> None:
+    payload = _issue_payload(spec(estimate="2.5", priority="3"))
+    graph = TaskGraph.from_issues([{"number": 1, "state": "open", "labels": [], "body": payload["body"]}])
+    meta = graph.nodes["TASK-001"].meta
+    assert meta["estimate"] == 2.5 and meta["priority"] == 3
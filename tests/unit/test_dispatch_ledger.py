@@ -0,0 +1,93 @@
+import json
+from pathlib import Path
+
+from common import EventSink
+from dispatch_ledger import DispatchLedger
+
+
+def dispatch_event(n: int) -> dict:
+    return {"type": "dispatch", "id": n, "timestamp": "2026-01-01T00:00:00Z", "details": {"dispatch_id": f"d-{n}", "run_id": "r"}}
+
+
+def ledger_ids(root: Path) -> list[str]:
+    path = root / "state" / "ledger" / "dispatch.jsonl"
+    return [json.loads(line)["dispatch_id"] for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_scan_resumes_from_saved_offset(tmp_path: Path) -> None:
+    sink = EventSink(tmp_path / "state" / "runs" / "run-1" / "events.jsonl", batch=1, flush_seconds=0)
+    sink.append(dispatch_event(1))
+    sink.append({"type": "note", "id": 1})
+    sink.flush()
+    assert "d-1" in DispatchLedger.open(tmp_path)
+    sink.append(dispatch_event(2))
+    sink.close()
+    ledger = DispatchLedger.open(tmp_path)
+    assert "d-1" in ledger and "d-2" in ledger
+    assert ledger_ids(tmp_path) == ["d-1", "d-2"]
+    index = json.loads((tmp_path / "state" / "ledger" / "index.json").read_text(encoding="utf-8"))
+    live = tmp_path / "state" / "runs" / "run-1" / "events.jsonl"
+    assert index["offsets"] == {"state/runs/run-1/events.jsonl": live.stat().st_size}
+
+
+def test_partial_trailing_line_is_read_once_complete(tmp_path: Path) -> None:
+    live = tmp_path / "state" / "runs" / "run-1" / "events.jsonl"
+    live.parent.mkdir(parents=True)
+    line = json.dumps(dispatch_event(1)) + "\n"
+    live.write_text(line[:10], encoding="utf-8")
+    assert "d-1" not in DispatchLedger.open(tmp_path)
+    live.write_text(line, encoding="utf-8")
+    assert "d-1" in DispatchLedger.open(tmp_path)
+
+
+def test_rotation_indexes_every_dispatch_once(tmp_path: Path) -> None:
+    run_dir = tmp_path / "state" / "runs" / "run-1"
+    sink = EventSink(run_dir / "events.jsonl", batch=1, flush_seconds=0, max_bytes=300)
+    for n in range(1, 10):
+        sink.append(dispatch_event(n))
+        sink.flush()
+        DispatchLedger.open(tmp_path)
+    sink.close()
+    assert list(run_dir.glob("events-*.jsonl.gz"))
+    ledger = DispatchLedger.open(tmp_path)
+    assert len(ledger) == 9
+    assert ledger_ids(tmp_path) == [f"d-{n}" for n in range(1, 10)]
+
+
+def test_replaced_live_file_restarts_at_zero_even_when_longer(tmp_path: Path) -> None:
+    live = tmp_path / "state" / "runs" / "run-1" / "events.jsonl"
+    live.parent.mkdir(parents=True)
+    live.write_text(json.dumps(dispatch_event(1)) + "\n", encoding="utf-8")
+    DispatchLedger.open(tmp_path)
+    replacement = live.with_name("events.tmp")
+    replacement.write_text("".join(json.dumps(dispatch_event(n)) + "\n" for n in (2, 3)), encoding="utf-8")
+    replacement.replace(live)
+    ledger = DispatchLedger.open(tmp_path)
+    assert all(f"d-{n}" in ledger for n in (1, 2, 3))
+
+
+def test_offsets_of_removed_runs_are_dropped(tmp_path: Path) -> None:
+    live = tmp_path / "state" / "runs" / "run-1" / "events.jsonl"
+    live.parent.mkdir(parents=True)
+    live.write_text(json.dumps(dispatch_event(1)) + "\n", encoding="utf-8")
+    DispatchLedger.open(tmp_path)
+    live.unlink()
+    ledger = DispatchLedger.open(tmp_path)
+    assert "d-1" in ledger
+    index = json.loads((tmp_path / "state" / "ledger" / "index.json").read_text(encoding="utf-8"))
+    assert index["offsets"] == {} and index["identities"] == {}
+
+
+def test_add_is_idempotent_and_compact_drops_duplicates(tmp_path: Path) -> None:
+    ledger = DispatchLedger.open(tmp_path)
+    ledger.add("d-1", 1)
+    ledger.add("d-1", 1)
+    ledger.add("d-2", 2)
+    assert ledger_ids(tmp_path) == ["d-1", "d-2"]
+    path = tmp_path / "state" / "ledger" / "dispatch.jsonl"
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps({"dispatch_id": "d-1", "issue": 1, "recorded_at": "2000-01-01T00:00:00Z"}) + "\n")
+    reopened = DispatchLedger.open(tmp_path)
+    reopened.compact()
+    assert ledger_ids(tmp_path) == ["d-2"]
+    assert "d-1" not in reopened
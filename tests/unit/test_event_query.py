@@ -0,0 +1,106 @@
+import gzip
+import json
+from pathlib import Path
+from typing import Any
+
+from event_query import EventFilter, EventIndex, compute_metrics, render_prometheus
+
+
+def event(kind: str, number: int, minute: int, repo: str = "o/r", **details: Any) -> dict[str, Any]:
+    return {
+        "type": kind,
+        "id": number,
+        "repo": repo,
+        "entity": "issue",
+        "timestamp": f"2026-01-01T00:{minute:02d}:00Z",
+        "details": details,
+    }
+
+
+def lines(events: list[dict[str, Any]]) -> bytes:
+    return b"".join(json.dumps(e).encode("utf-8") + b"\n" for e in events)
+
+
+def write_run(root: Path) -> Path:
+    run_dir = root / "state" / "runs" / "run-1"
+    run_dir.mkdir(parents=True)
+    with gzip.open(run_dir / "events-1.jsonl.gz", "wb") as f:
+        f.write(lines([event("dispatch", 1, 0, worker="worker/a"), event("pr_merged", 7, 10, issue=1)]))
+    live = run_dir / "events.jsonl"
+    live.write_bytes(
+        lines(
+            [
+                event("unlock", 2, 11),
+                event("unlock", 3, 12),
+                event("note", 9, 12, repo="o/other"),
+                event("dispatch", 2, 13, worker="worker/a"),
+                event("dispatch", 3, 15, worker="worker/b"),
+            ]
+        )
+    )
+    return live
+
+
+def test_refresh_indexes_segments_and_live_tail(tmp_path: Path) -> None:
+    live = write_run(tmp_path)
+    index = EventIndex.open(tmp_path)
+    segment = dict(index.files["state/runs/run-1/events-1.jsonl.gz"])
+    assert segment["count"] == 2
+    assert index.files["state/runs/run-1/events.jsonl"]["count"] == 5
+    assert index.files["state/runs/run-1/events.jsonl"]["types"]["unlock"] == [0, len(lines([event("unlock", 2, 11)]))]
+
+    with live.open("ab") as f:
+        f.write(lines([event("pr_merged", 8, 20, issue=2)]) + b'{"type": "partial"')
+    index = EventIndex.open(tmp_path)
+    assert index.files["state/runs/run-1/events-1.jsonl.gz"] == segment
+    assert index.files["state/runs/run-1/events.jsonl"]["count"] == 6
+    assert index.events_per_run(EventFilter()) == {"run-1": 8}
+    saved = json.loads((tmp_path / "state" / "cache" / "events" / "index.json").read_text(encoding="utf-8"))
+    assert saved["files"] == index.files
+
+
+def test_query_filters_by_type_repo_and_run(tmp_path: Path) -> None:
+    write_run(tmp_path)
+    index = EventIndex.open(tmp_path)
+    dispatched = [(run, e["id"]) for run, e in index.query(EventFilter(types={"dispatch"}))]
+    assert dispatched == [("run-1", 1), ("run-1", 2), ("run-1", 3)]
+    assert [e["type"] for _, e in index.query(EventFilter(repo="o/other"))] == ["note"]
+    assert [e["id"] for _, e in index.query(EventFilter(types={"unlock"}, since="2026-01-01T00:12:00Z"))] == [3]
+    assert list(index.query(EventFilter(runs={"run-2"}))) == []
+    assert list(index.query(EventFilter(types={"missing"}))) == []
+
+
+def test_replaced_live_file_on_same_inode_is_reindexed(tmp_path: Path) -> None:
+    live = write_run(tmp_path)
+    index = EventIndex.open(tmp_path)
+    inode = live.stat().st_ino
+    with live.open("wb") as f:
+        f.write(lines([event("dispatch", n, 30 + n, worker="worker/c") for n in range(10, 20)]))
+    assert live.stat().st_ino == inode
+    index = EventIndex.open(tmp_path)
+    assert index.files["state/runs/run-1/events.jsonl"]["count"] == 10
+    assert [e["id"] for _, e in index.query(EventFilter(types={"dispatch"}))] == [1] + list(range(10, 20))
+
+
+def test_metrics_pair_unlock_with_dispatch_and_count_fanout(tmp_path: Path) -> None:
+    live = write_run(tmp_path)
+    with live.open("ab") as f:
+        f.write(lines([event("pr_merged", 8, 20, issue=2)]))
+    metrics = compute_metrics(EventIndex.open(tmp_path), EventFilter())
+    assert metrics["runs"] == 1
+    assert metrics["events_total"] == 8
+    assert metrics["lead_time_seconds"]["count"] == 2
+    assert metrics["lead_time_seconds"]["sum"] == 600.0 + 420.0
+    assert metrics["queue_wait_seconds"]["worker/a"]["sum"] == 120.0
+    assert metrics["queue_wait_seconds"]["worker/b"]["sum"] == 180.0
+    assert metrics["unlock_fanout"]["count"] == 2
+    assert metrics["unlock_fanout"]["max"] == 2.0
+    assert metrics["unlock_fanout"]["sum"] == 2.0
+
+    text = render_prometheus(metrics)
+    assert 'orchestrator_events_total{run="run-1"} 8\n' in text
+    assert 'orchestrator_queue_wait_seconds{worker="worker/a",quantile="0.5"} 120.0\n' in text
+    assert 'orchestrator_queue_wait_seconds_sum{worker="worker/a"} 120.0\n' in text
+    assert 'orchestrator_queue_wait_seconds_count{worker="worker/a"} 1\n' in text
+    assert "# TYPE orchestrator_queue_wait_seconds summary\n" in text
+    assert "orchestrator_dispatch_lead_time_seconds_count 2\n" in text
@@ -0,0 +1,127 @@
+from typing import Any
+
+import pytest
+import yaml
+
+from frontmatter_codec import _fast_decode, parse_frontmatter, render_frontmatter, split_frontmatter
+
+SCALARS = [
+    "TASK-001",
+    "hello world",
+    "yes",
+    "No",
+    "on",
+    "null",
+    "~",
+    "1",
+    "-1",
+    "1.5",
+    "1e3",
+    ".inf",
+    "0x1F",
+    "0o17",
+    "1_000",
+    "2024-01-01",
+    "12:30:00",
+    "'quoted'",
+    "'it''s'",
+    '"double"',
+    '"esc\\n"',
+    "a: b",
+    "a:",
+    "#comment",
+    "x #y",
+    "x#y",
+    "[a, b]",
+    "{a: 1}",
+    "*alias",
+    "&anchor",
+    "!tag",
+    "|",
+    ">",
+    "-",
+    "- item",
+    "?",
+    "%",
+    "@at",
+    "`tick",
+    "=",
+    "<<",
+]
+
+BLOCKS = [
+    "key: value",
+    "a: 1\nb: two",
+    "depends_on: []",
+    "depends_on:\n- TASK-001\n- TASK-002",
+    "depends_on:\n  - TASK-001\n  - 'TASK-002'",
+    "depends_on:\n- 1\n- TASK-002",
+    "empty:",
+    "empty:\nnext: x",
+    "nested:\n  key: value",
+    "flow: [a, b]",
+    "dup: 1\ndup: 2",
+    "folded: first\n  second",
+    "- orphan",
+    "key: value # comment",
+    "# comment only",
+    "1key: v",
+    "key:value",
+    "ke y: v",
+    "key : v",
+    "k\u00e9y: v",
+    "key:",
+    "a: x\nb:\n- 1.0\n- y",
+]
+
+
+@pytest.mark.parametrize("raw", BLOCKS + [f"key: {value}" for value in SCALARS] + [f"items:\n- {value}" for value in SCALARS])
+def test_fast_decode_agrees_with_safe_load(raw: str) -> None:
+    fast = _fast_decode(raw)
+    if fast is None:
+        return
+    assert fast == yaml.safe_load(raw)
+
+
+def test_scalar_memo_does_not_leak_between_bodies() -> None:
+    assert _fast_decode("a: TASK-001\nb:\n- TASK-001") == {"a": "TASK-001", "b": ["TASK-001"]}
+    assert _fast_decode("a: 'TASK-001'") == {"a": "TASK-001"}
+    assert _fast_decode("a: 1") is None
+
+
+def test_fast_decode_handles_rendered_string_meta() -> None:
+    raw, _ = split_frontmatter(render_frontmatter({"task_id": "TASK-001", "depends_on": ["TASK-000"], "title": "it's: tricky"}, ""))
+    assert raw is not None
+    assert _fast_decode(raw) == {"task_id": "TASK-001", "depends_on": ["TASK-000"], "title": "it's: tricky"}
+
+
+@pytest.mark.parametrize(
+    "meta",
+    [
+        {"task_id": "TASK-001", "depends_on": [], "status": "open"},
+        {"task_id": "TASK-002", "depends_on": ["TASK-001"], "estimate": 2.5, "priority": 3},
+        {"title": "yes", "flag": True, "none": None, "date": "2024-01-01", "num": "007"},
+        {"nested": {"a": [1, {"b": "c"}]}, "text": "multi\nline"},
+        {"quote": "'single'", "dquote": '"double"', "colon": "a: b", "hash": "x #y"},
+    ],
+)
+def test_render_then_parse_round_trips(meta: dict[str, Any]) -> None:
+    parsed, body = parse_frontmatter(render_frontmatter(meta, "Body text"))
+    assert parsed == meta
+    assert body == "Body text"
+
+
+def test_parse_returns_private_copies_of_memoized_meta() -> None:
+    text = render_frontmatter({"task_id": "TASK-003", "depends_on": ["TASK-001"], "nested": {"k": ["v"]}}, "")
+    first, _ = parse_frontmatter(text)
+    first["depends_on"].append("TASK-002")
+    first["nested"]["k"].append("w")
+    first["task_id"] = "changed"
+    second, _ = parse_frontmatter(text)
+    assert second == {"task_id": "TASK-003", "depends_on": ["TASK-001"], "nested": {"k": ["v"]}}
+
+
+def test_split_frontmatter_without_block() -> None:
+    assert split_frontmatter("no frontmatter") == (None, "no frontmatter")
+    assert split_frontmatter("---\nunterminated: yes\n") == (None, "---\nunterminated: yes\n")
+    assert parse_frontmatter("---\n- a list\n---\nbody") == ({}, "body")
@@ -0,0 +1,122 @@
+import http.client
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator
+
+import pytest
+
+from common import HttpBackend, TransportError
+
+
+class FakeResponse:
+    status = 200
+    will_close = False
+
+    def read(self) -> bytes:
+        return b'{"ok": true}'
+
+    def getheaders(self) -> list[tuple[str, str]]:
+        return [("ETag", '"x"')]
+
+
+class FakeConnection:
+    """Fails `request` or `getresponse` the way a connection closed by the server does."""
+
+    def __init__(self, fail_on: str = "") -> None:
+        self.fail_on = fail_on
+        self.requests: list[str] = []
+        self.closed = False
+
+    def request(self, method: str, url: str, body: Any = None, headers: Any = None) -> None:
+        self.requests.append(method)
+        if self.fail_on == "request":
+            raise BrokenPipeError("broken pipe")
+
+    def getresponse(self) -> FakeResponse:
+        if self.fail_on == "response":
+            raise http.client.RemoteDisconnected("closed")
+        return FakeResponse()
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def backend_with(idle: FakeConnection, fresh: list[FakeConnection]) -> HttpBackend:
+    backend = HttpBackend("token", base_url="http://127.0.0.1:1")
+    backend._idle = [idle]  # type: ignore[list-item]
+    backend._connect = lambda: fresh.pop(0)  # type: ignore[method-assign]
+    return backend
+
+
+@pytest.mark.parametrize(
+    ("method", "fail_on"),
+    [("GET", "response"), ("GET", "request"), ("POST", "request"), ("PATCH", "request")],
+)
+def test_stale_pooled_connection_is_retried_when_safe(method: str, fail_on: str) -> None:
+    stale, fresh = FakeConnection(fail_on), FakeConnection()
+    backend = backend_with(stale, [fresh])
+    status, headers, text = backend.send(method, "/x", None, {})
+    assert (status, headers, text) == (200, {"etag": '"x"'}, '{"ok": true}')
+    assert stale.closed and stale.requests == [method]
+    assert fresh.requests == [method]
+    assert backend._idle == [fresh]
+
+
+@pytest.mark.parametrize("method", ["POST", "PATCH", "PUT", "DELETE"])
+def test_sent_write_on_pooled_connection_is_not_resent(method: str) -> None:
+    stale, fresh = FakeConnection("response"), FakeConnection()
+    backend = backend_with(stale, [fresh])
+    with pytest.raises(TransportError) as info:
+        backend.send(method, "/x", '{"a": 1}', {})
+    assert info.value.sent and info.value.method == method
+    assert fresh.requests == []
+
+
+def test_fresh_connection_failure_is_not_retried() -> None:
+    fresh = FakeConnection("request")
+    backend = HttpBackend("token", base_url="http://127.0.0.1:1")
+    backend._connect = lambda: fresh  # type: ignore[method-assign]
+    with pytest.raises(TransportError) as info:
+        backend.send("GET", "/x", None, {})
+    assert not info.value.sent
+    assert fresh.requests == ["GET"]
+
+
+@pytest.fixture
+def server() -> Iterator[tuple[str, list[tuple[int, str]]]]:
+    seen: list[tuple[int, str]] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            seen.append((self.client_address[1], self.headers["Authorization"]))
+            body = b'{"path": "%s"}' % self.path.encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            return None
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_address[1]}/api", seen
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_keep_alive_connection_is_reused(server: tuple[str, list[tuple[int, str]]]) -> None:
+    url, seen = server
+    backend = HttpBackend("secret", base_url=url)
+    try:
+        assert backend.send("GET", "/one", None, {})[2] == '{"path": "/api/one"}'
+        assert backend.send("GET", "/two", None, {})[2] == '{"path": "/api/two"}'
+    finally:
+        backend.close()
+    assert len(seen) == 2 and seen[0][0] == seen[1][0]
+    assert seen[0][1] == "Bearer secret"
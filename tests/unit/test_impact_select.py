@@ -0,0 +1,147 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+import impact_select
+import result_cache
+from impact_select import MAP_VERSION, record, select
+
+
+def git(root: Path, *args: str) -> str:
+    return subprocess.run(["git", *args], cwd=root, text=True, capture_output=True, check=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    for key in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{key}_NAME", "test")
+        monkeypatch.setenv(f"GIT_{key}_EMAIL", "test@local.invalid")
+    monkeypatch.setattr(impact_select, "TEST_IMPACT", True)
+    monkeypatch.setattr(impact_select, "TEST_IMPACT_DIR", str(tmp_path / "maps"))
+    root = tmp_path / "repo"
+    files = {
+        "src/a.py": "def a() -> int:\n    return 1\n",
+        "src/b.py": "def b() -> int:\n    return 2\n",
+        "tests/unit/test_a.py": "from src.a import a\n\n\ndef test_a() -> None:\n    assert a() == 1\n",
+        "tests/unit/test_b.py": "from src.b import b\n\n\ndef test_b() -> None:\n    assert b() == 2\n",
+        "pytest.ini": "[pytest]\n",
+        "README.md": "readme\n",
+    }
+    for name, text in files.items():
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(text, encoding="utf-8")
+    git(root.parent, "init", "--quiet", str(root))
+    git(root, "add", "-A")
+    git(root, "commit", "--quiet", "-m", "base")
+    return root
+
+
+def write_map(root: Path, **overrides: Any) -> None:
+    data = {
+        "version": MAP_VERSION,
+        "commit": git(root, "rev-parse", "HEAD"),
+        "dirty": [],
+        "tests": {
+            "tests/unit/test_a.py::test_a": ["src/a.py"],
+            "tests/unit/test_b.py::test_b": ["src/b.py"],
+        },
+        "markers": {"tests/unit/test_b.py::test_b": ["task_001"]},
+        **overrides,
+    }
+    directory = impact_select.maps_dir(root)
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{data['commit']}.json").write_text(json.dumps(data), encoding="utf-8")
+
+
+def edit(root: Path, name: str, text: str = "# changed\n") -> None:
+    with (root / name).open("a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_without_a_map_everything_runs(repo: Path) -> None:
+    report = select(repo)
+    assert report["mode"] == "full" and report["reason"] == "no coverage map for an ancestor of HEAD"
+
+
+def test_map_with_another_version_is_ignored(repo: Path) -> None:
+    write_map(repo, version=MAP_VERSION - 1)
+    assert select(repo)["reason"] == "no coverage map for an ancestor of HEAD"
+
+
+def test_map_of_a_commit_outside_history_is_ignored(repo: Path) -> None:
+    write_map(repo, commit="0" * 40)
+    assert select(repo)["mode"] == "full"
+
+
+def test_disabled_selection_runs_everything(repo: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    write_map(repo)
+    monkeypatch.setattr(impact_select, "TEST_IMPACT", False)
+    assert select(repo)["reason"] == "TEST_IMPACT disabled"
+
+
+def test_changed_source_selects_the_tests_that_touched_it(repo: Path) -> None:
+    write_map(repo)
+    edit(repo, "src/a.py")
+    report = select(repo)
+    assert report["mode"] == "impact"
+    assert report["selected"] == ["tests/unit/test_a.py::test_a"]
+    assert report["skipped"] == ["tests/unit/test_b.py::test_b"]
+    assert report["changed"] == ["src/a.py"]
+
+
+def test_committed_changes_since_the_map_count(repo: Path) -> None:
+    write_map(repo)
+    edit(repo, "src/b.py")
+    git(repo, "commit", "--quiet", "-am", "change b")
+    assert select(repo)["selected"] == ["tests/unit/test_b.py::test_b"]
+
+
+def test_changes_outside_mapped_paths_select_nothing(repo: Path) -> None:
+    write_map(repo)
+    edit(repo, "README.md")
+    (repo / "src" / "c.py").write_text("def c() -> int:\n    return 3\n", encoding="utf-8")
+    report = select(repo)
+    assert report["mode"] == "impact"
+    assert report["selected"] == []
+    assert report["uncovered"] == ["src/c.py"]
+
+
+def test_changed_test_file_and_marked_tests_always_run(repo: Path) -> None:
+    write_map(repo)
+    edit(repo, "tests/unit/test_a.py")
+    report = select(repo, marker="task_001")
+    assert report["selected"] == ["tests/unit/test_a.py", "tests/unit/test_b.py::test_b"]
+
+
+def test_configuration_change_forces_a_full_run(repo: Path) -> None:
+    write_map(repo)
+    edit(repo, "pytest.ini")
+    report = select(repo)
+    assert report["mode"] == "full" and report["reason"] == "test configuration changed: pytest.ini"
+
+
+def test_large_or_old_changes_force_a_full_run(repo: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    write_map(repo)
+    edit(repo, "src/a.py")
+    edit(repo, "src/b.py")
+    monkeypatch.setattr(impact_select, "TEST_IMPACT_MAX_CHANGED", 1)
+    assert select(repo)["reason"] == "2 files changed since the map"
+    monkeypatch.setattr(impact_select, "TEST_IMPACT_MAX_CHANGED", 50)
+    monkeypatch.setattr(impact_select, "TEST_IMPACT_MAX_COMMITS", 0)
+    git(repo, "commit", "--quiet", "-am", "change a and b")
+    assert select(repo)["reason"] == "map is 1 commits behind HEAD"
+
+
+def test_record_maps_each_test_to_the_sources_it_touched(repo: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(result_cache, "TEST_CACHE", False)
+    assert record(repo, sys.executable, cache_mode="off")["code"] == 0
+    [path] = impact_select.maps_dir(repo).glob("*.json")
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["version"] == MAP_VERSION and data["commit"] == git(repo, "rev-parse", "HEAD")
+    assert data["tests"] == {"tests/unit/test_a.py::test_a": ["src/a.py"], "tests/unit/test_b.py::test_b": ["src/b.py"]}
+    edit(repo, "src/b.py")
+    assert select(repo)["selected"] == ["tests/unit/test_b.py::test_b"]
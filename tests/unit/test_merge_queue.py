@@ -0,0 +1,106 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import merge_queue
+from merge_queue import Candidate, MergeQueue, QueuedPR
+
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "test",
+    "GIT_AUTHOR_EMAIL": "test@local.invalid",
+    "GIT_COMMITTER_NAME": "test",
+    "GIT_COMMITTER_EMAIL": "test@local.invalid",
+}
+
+
+def git(cwd: Path, *args: str) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, text=True, capture_output=True, check=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    for key, value in GIT_ENV.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.setattr(merge_queue, "add_issue_comment", lambda repo, number, body: None)
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "--quiet", "--bare", "-b", "main", str(remote))
+    clone = tmp_path / "clone"
+    git(tmp_path, "clone", "--quiet", str(remote), str(clone))
+    (clone / "README.md").write_text("base\n", encoding="utf-8")
+    git(clone, "add", "README.md")
+    git(clone, "commit", "--quiet", "-m", "base")
+    git(clone, "push", "--quiet", "origin", "HEAD:main")
+    return clone
+
+
+def open_pr(clone: Path, number: int, files: dict[str, str]) -> QueuedPR:
+    git(clone, "checkout", "--quiet", "--detach", "origin/main")
+    for name, text in files.items():
+        (clone / name).write_text(text, encoding="utf-8")
+        git(clone, "add", name)
+    git(clone, "commit", "--quiet", "-m", f"TASK-{number:03d}")
+    sha = git(clone, "rev-parse", "HEAD")
+    git(clone, "push", "--quiet", "origin", f"{sha}:refs/pull/{number}/head")
+    return QueuedPR(number=number, title=f"TASK-{number:03d}", head_ref=f"worker/task-{number}", head_sha=sha)
+
+
+def run_queue(clone: Path, prs: list[QueuedPR]) -> tuple[MergeQueue, list[list[int]]]:
+    checked: list[list[int]] = []
+
+    def check(candidate: Candidate) -> tuple[str, list[str]]:
+        checked.append(candidate.prs)
+        names = git(clone, "ls-tree", "--name-only", candidate.sha).split()
+        failing = [name for name in names if name.startswith("BAD")]
+        return ("failed" if failing else "passed"), failing
+
+    queue = MergeQueue("owner/repo", clone, "b1", check)
+    try:
+        queue.fetch(prs)
+        queue.process(prs)
+    finally:
+        queue.close()
+    return queue, checked
+
+
+def test_passing_batch_merges_in_one_candidate(repo: Path) -> None:
+    prs = [open_pr(repo, n, {f"f{n}.txt": str(n)}) for n in (1, 2, 3)]
+    queue, checked = run_queue(repo, prs)
+    assert queue.merged == [1, 2, 3]
+    assert checked == [[1, 2, 3]]
+    git(repo, "fetch", "--quiet", "origin")
+    log = git(repo, "log", "--first-parent", "--format=%s", "origin/main").splitlines()
+    assert log[:3] == [f"Merge PR #{n} from worker/task-{n}: TASK-{n:03d}" for n in (3, 2, 1)]
+    for pr in prs:
+        git(repo, "merge-base", "--is-ancestor", pr.head_sha, "origin/main")
+    assert git(repo, "for-each-ref", "refs/merge-queue/") == ""
+    assert git(repo, "ls-remote", "origin", "refs/heads/merge-queue/*") == ""
+
+
+def test_failing_batch_is_bisected_to_the_culprit(repo: Path) -> None:
+    prs = [open_pr(repo, n, {"BAD3" if n == 3 else f"f{n}.txt": str(n)}) for n in (1, 2, 3, 4)]
+    queue, checked = run_queue(repo, prs)
+    assert sorted(queue.merged) == [1, 2, 4]
+    assert queue.rejected == [{"pr": 3, "reason": "checks failed on candidate `merge-queue/b1-4` (BAD3)"}]
+    assert checked == [[1, 2, 3, 4], [1, 2], [3, 4], [3], [4]]
+
+
+def test_conflicting_pr_is_left_out_of_the_candidate(repo: Path) -> None:
+    prs = [open_pr(repo, 1, {"shared.txt": "one"}), open_pr(repo, 2, {"shared.txt": "two"}), open_pr(repo, 3, {"f3.txt": "3"})]
+    queue, checked = run_queue(repo, prs)
+    assert queue.merged == [1, 3]
+    assert [r["pr"] for r in queue.rejected] == [2]
+    assert checked == [[1, 3]]
+
+
+def test_timeout_rejects_without_bisecting(repo: Path) -> None:
+    prs = [open_pr(repo, n, {f"f{n}.txt": str(n)}) for n in (1, 2)]
+    queue = MergeQueue("owner/repo", repo, "b1", lambda candidate: ("timeout", []))
+    try:
+        queue.fetch(prs)
+        queue.process(prs)
+    finally:
+        queue.close()
+    assert queue.merged == []
+    assert [r["pr"] for r in queue.rejected] == [1, 2]
+    assert len(queue.candidates) == 1
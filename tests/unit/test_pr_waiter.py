@@ -0,0 +1,143 @@
+import json
+import random
+from typing import Any
+
+import pytest
+
+import pr_waiter
+from common import ApiResponse
+from pr_waiter import ConditionalFetcher, PRStatus, PRWaiter, classify
+
+REPO = "o/r"
+
+
+class FakeClient:
+    """Serves scripted GitHub payloads with ETags, answering 304 when the ETag still matches."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {}
+        self.calls: list[tuple[str, dict[str, str]]] = []
+
+    def request(self, method: str, path: str, payload: Any = None, headers: dict[str, str] | None = None, cache: bool = True) -> ApiResponse:
+        headers = headers or {}
+        self.calls.append((path, headers))
+        data = self.data[path]
+        etag = f'"{hash(json.dumps(data, sort_keys=True))}"'
+        if headers.get("If-None-Match") == etag:
+            return ApiResponse(status=304, headers={"etag": etag})
+        return ApiResponse(status=200, headers={"etag": etag}, data=data)
+
+    def pr(self, number: int, sha: str, runs: list[dict[str, Any]], state: str = "open", merged: bool = False) -> None:
+        self.data[f"repos/{REPO}/pulls/{number}"] = {"number": number, "state": state, "merged": merged, "head": {"sha": sha}}
+        self.data[f"repos/{REPO}/commits/{sha}/check-runs?per_page=100"] = {"check_runs": runs}
+        self.data[f"repos/{REPO}/commits/{sha}/status"] = {"statuses": []}
+
+
+class FakeTime:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def run(name: str, conclusion: str | None = "success") -> dict[str, Any]:
+    if conclusion is None:
+        return {"name": name, "status": "in_progress", "conclusion": None}
+    return {"name": name, "status": "completed", "conclusion": conclusion}
+
+
+def test_classify_states() -> None:
+    status = PRStatus(1)
+    classify({"state": "open"}, [run("unit"), run("lint", "skipped")], {"statuses": [{"context": "ci", "state": "success"}]}, status)
+    assert (status.state, status.total, status.pending, status.failed) == ("passed", 3, 0, 0)
+    classify({"state": "open"}, [run("unit", "failure"), run("lint", None)], {}, status)
+    assert (status.state, status.failing, status.pending) == ("failed", ["unit"], 1)
+    classify({"state": "open"}, [], {"statuses": [{"context": "ci", "state": "error"}]}, status)
+    assert (status.state, status.failing) == ("failed", ["ci"])
+    classify({"state": "open"}, [run("unit", None)], {}, status)
+    assert status.state == "pending"
+    classify({"state": "open"}, [], {}, status)
+    assert status.state == "pending"
+    classify({"state": "open"}, [run("unit")], {}, status, required=frozenset({"unit", "acceptance"}))
+    assert status.state == "pending"
+    classify({"state": "closed", "merged_at": "2026-01-01T00:00:00Z"}, [], {}, status)
+    assert status.state == "merged"
+    classify({"state": "closed"}, [], {}, status)
+    assert status.state == "closed"
+
+
+def test_conditional_fetcher_revalidates_with_etag() -> None:
+    client = FakeClient()
+    client.data["x"] = {"v": 1}
+    fetcher = ConditionalFetcher(client)
+    assert fetcher.get("x") == ({"v": 1}, True)
+    assert fetcher.get("x") == ({"v": 1}, False)
+    assert client.calls[0][1] == {}
+    assert client.calls[1][1]["If-None-Match"]
+    client.data["x"] = {"v": 2}
+    assert fetcher.get("x") == ({"v": 2}, True)
+    assert (fetcher.requests, fetcher.not_modified) == (3, 1)
+
+
+def waiter(client: FakeClient, prs: list[int], fake: FakeTime, **kwargs: Any) -> PRWaiter:
+    return PRWaiter(REPO, prs, client=client, rng=random.Random(1), clock=fake.clock, sleep=fake.sleep, **kwargs)
+
+
+def test_watch_yields_green_and_failing_prs() -> None:
+    client = FakeClient()
+    client.pr(1, "a1", [run("unit"), run("lint")])
+    client.pr(2, "b2", [run("unit", "failure"), run("lint")])
+    fake = FakeTime()
+    done = {s.number: s for s in waiter(client, [1, 2], fake).watch(60)}
+    assert done[1].state == "passed"
+    assert done[2].state == "failed" and done[2].failing == ["unit"]
+    assert fake.sleeps == []
+
+
+def test_pending_pr_backs_off_until_timeout_with_304s() -> None:
+    client = FakeClient()
+    client.pr(1, "a1", [run("unit", None)])
+    fake = FakeTime()
+    w = waiter(client, [1], fake, min_interval=1.0, max_interval=8.0)
+    assert list(w.watch(60)) == []
+    assert w.status[1].state == "pending"
+    assert fake.now == pytest.approx(60.0)
+    assert w._interval[1] == 8.0
+    assert w.status[1].polls < 20
+    assert w.stats()["not_modified"] == w.stats()["requests"] - 3
+
+
+def test_change_resets_the_poll_interval() -> None:
+    client = FakeClient()
+    client.pr(1, "a1", [run("unit", None)])
+    fake = FakeTime()
+    w = waiter(client, [1], fake, min_interval=1.0, max_interval=8.0)
+    for _ in range(4):
+        w._next_interval(1, w.poll(1))
+    assert w._interval[1] == 8.0
+    client.pr(1, "a1", [run("unit", None), run("lint", None)])
+    w._next_interval(1, w.poll(1))
+    assert w._interval[1] == 1.0
+
+
+@pytest.mark.parametrize(
+    ("runs", "code", "state"),
+    [([run("unit")], 0, "passed"), ([run("unit", "failure")], 1, "failed"), ([run("unit", None)], 2, "pending")],
+)
+def test_main_exit_codes(runs: list[dict[str, Any]], code: int, state: str, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]) -> None:
+    client = FakeClient()
+    client.pr(5, "c5", runs)
+    monkeypatch.setattr(pr_waiter, "get_client", lambda: client)
+    argv = ["pr_waiter.py", "--repo", REPO, "--pr", "5", "--timeout-sec", "0.05", "--min-interval", "0.01", "--max-interval", "0.02"]
+    monkeypatch.setattr("sys.argv", argv)
+    assert pr_waiter.main() == code
+    out = json.loads(capsys.readouterr().out)
+    assert out["ok"] is (code == 0)
+    assert out["timed_out"] is (code == 2)
+    assert [s["state"] for s in out["done"] + out["pending"]] == [state]
@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from common import GitHubClient, RateGovernor
+
+
+def headers(remaining: int, limit: int = 5000, reset_in: float = 600.0) -> dict[str, str]:
+    return {
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-limit": str(limit),
+        "x-ratelimit-reset": str(int(time.time() + reset_in)),
+    }
+
+
+class RecordingGovernor(RateGovernor):
+    """Records waits instead of sleeping, as if each one elapsed; `refill` headers are observed after a wait."""
+
+    def __init__(self, refill: dict[str, str] | None = None, **kwargs: float) -> None:
+        super().__init__(**kwargs)  # type: ignore[arg-type]
+        self.sleeps: list[float] = []
+        self.refill = refill
+
+    def _sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self._blocked_until = 0.0
+        if self.refill is not None:
+            self.observe("core", 200, self.refill, "")
+
+
+def test_observe_tracks_rate_limit_headers() -> None:
+    governor = RateGovernor()
+    assert governor.observe("core", 200, headers(4321), "") is None
+    budget = governor.budget()
+    assert budget["core"]["remaining"] == 4321 and budget["core"]["limit"] == 5000
+    assert budget["core"]["reset"]
+    assert budget["throttled"] == 0
+
+
+def test_acquire_spends_budget_without_waiting() -> None:
+    governor = RecordingGovernor()
+    governor.observe("core", 200, headers(4000), "")
+    governor.acquire("core", write=False)
+    governor.acquire("core", write=True)
+    assert governor.sleeps == []
+    assert governor.budget()["core"]["remaining"] == 3998
+
+
+def test_reads_block_at_the_reserve_until_reset() -> None:
+    governor = RecordingGovernor(refill=headers(5000), read_reserve=100)
+    governor.observe("core", 200, headers(100, reset_in=30), "")
+    governor.acquire("core", write=True)
+    assert governor.sleeps == []
+    governor.acquire("core", write=False)
+    assert len(governor.sleeps) == 1 and 29 <= governor.sleeps[0] <= 32
+
+
+def test_wait_beyond_max_wait_raises() -> None:
+    governor = RecordingGovernor(read_reserve=100, max_wait=10)
+    governor.observe("core", 200, headers(50, reset_in=600), "")
+    with pytest.raises(RuntimeError, match="rate limit exhausted"):
+        governor.acquire("core", write=False)
+
+
+def test_low_budget_is_spread_until_reset() -> None:
+    governor = RecordingGovernor(read_reserve=100, pace_below=0.1)
+    governor.observe("core", 200, headers(200, reset_in=100), "")
+    for _ in range(3):
+        governor.acquire("core", write=False)
+    assert len(governor.sleeps) == 2
+    assert governor.sleeps[0] == pytest.approx(1.0, abs=0.1)
+    assert governor.sleeps[1] == pytest.approx(2.0, abs=0.1)
+
+
+def test_throttled_replies_return_a_wait() -> None:
+    governor = RateGovernor()
+    assert governor.observe("core", 429, {"retry-after": "7"}, "") == 7.0
+    wait = governor.observe("core", 403, headers(0, reset_in=20), "API rate limit exceeded")
+    assert wait is not None and 19 <= wait <= 22
+    assert governor.observe("core", 403, {}, "You have exceeded a secondary rate limit") == 60.0
+    assert governor.observe("core", 403, {}, "You have exceeded a secondary rate limit") == 120.0
+    assert governor.observe("core", 200, {}, "") is None
+    assert governor.observe("core", 403, {}, "secondary rate limit") == 60.0
+    assert governor.observe("core", 403, {}, "Resource not accessible by integration") is None
+    assert governor.budget()["throttled"] == 5
+
+
+def test_client_retries_after_a_throttled_reply() -> None:
+    class Backend:
+        name = "scripted"
+
+        def __init__(self) -> None:
+            self.replies = [(429, {"retry-after": "3"}, ""), (200, headers(4999), '{"ok": true}')]
+
+        def send(self, method: str, path: str, body: str | None, req_headers: dict[str, str]) -> tuple[int, dict[str, str], str]:
+            return self.replies.pop(0)
+
+        def close(self) -> None:
+            return None
+
+    governor = RecordingGovernor()
+    client = GitHubClient(Backend(), None, governor)
+    assert client.request("GET", "repos/o/r").data == {"ok": True}
+    assert governor.sleeps == [3.0]
@@ -0,0 +1,93 @@
+import json
+from pathlib import Path
+from typing import Any
+
+from common import GitHubClient, ResponseCache
+
+
+class ScriptedBackend:
+    """Answers GETs from `bodies`, with a 304 when the request carries the current ETag."""
+
+    name = "scripted"
+
+    def __init__(self) -> None:
+        self.bodies: dict[str, Any] = {}
+        self.sent: list[tuple[str, dict[str, str]]] = []
+
+    def send(self, method: str, path: str, body: str | None, headers: dict[str, str]) -> tuple[int, dict[str, str], str]:
+        self.sent.append((path, dict(headers)))
+        data = self.bodies[path]
+        etag = f'"{len(json.dumps(data))}-{hash(json.dumps(data))}"'
+        if headers.get("If-None-Match") == etag:
+            return 304, {"etag": etag}, ""
+        return 200, {"etag": etag, "x-other": "dropped"}, json.dumps(data)
+
+    def close(self) -> None:
+        return None
+
+
+def test_not_modified_serves_the_cached_body(tmp_path: Path) -> None:
+    backend = ScriptedBackend()
+    backend.bodies["/repos/o/r/issues/1"] = {"number": 1, "title": "first"}
+    client = GitHubClient(backend, ResponseCache(tmp_path, 1 << 20))
+    first = client.request("GET", "repos/o/r/issues/1")
+    assert first.status == 200 and "If-None-Match" not in backend.sent[0][1]
+    second = client.request("GET", "repos/o/r/issues/1")
+    assert second.status == 304
+    assert second.data == {"number": 1, "title": "first"}
+    assert backend.sent[1][1]["If-None-Match"] == first.headers["etag"]
+    assert client.cache_stats() == {"hits": 1, "misses": 1, "evictions": 0}
+
+    backend.bodies["/repos/o/r/issues/1"] = {"number": 1, "title": "edited"}
+    assert client.request("GET", "repos/o/r/issues/1").data == {"number": 1, "title": "edited"}
+    assert client.request("GET", "repos/o/r/issues/1").data == {"number": 1, "title": "edited"}
+    stored = json.loads(next(tmp_path.glob("*.json")).read_text(encoding="utf-8"))
+    assert set(stored["headers"]) == {"etag"}
+
+
+def test_cache_false_and_writes_bypass_the_cache(tmp_path: Path) -> None:
+    backend = ScriptedBackend()
+    backend.bodies["/repos/o/r/issues/1"] = {"number": 1}
+    client = GitHubClient(backend, ResponseCache(tmp_path, 1 << 20))
+    client.request("GET", "repos/o/r/issues/1", cache=False)
+    assert list(tmp_path.glob("*.json")) == []
+    client.request("GET", "repos/o/r/issues/1")
+    client.request("GET", "repos/o/r/issues/1", cache=False)
+    assert "If-None-Match" not in backend.sent[-1][1]
+
+
+def test_excluded_paths_are_never_cached(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path, 1 << 20, exclude=["repos/*/*/commits/*/check-runs", "rate_limit"])
+    assert not cache.enabled_for("/repos/o/r/commits/abc/check-runs?per_page=100")
+    assert not cache.enabled_for("/rate_limit")
+    assert cache.enabled_for("/repos/o/r/commits/abc/status")
+    backend = ScriptedBackend()
+    backend.bodies["/rate_limit"] = {"resources": {}}
+    client = GitHubClient(backend, cache)
+    client.request("GET", "rate_limit")
+    client.request("GET", "rate_limit")
+    assert all("If-None-Match" not in headers for _, headers in backend.sent)
+    assert list(tmp_path.glob("*.json")) == []
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path) -> None:
+    size = len(json.dumps({"url": "/x/1", "headers": {"etag": '"e"'}, "data": "v" * 50}))
+    cache = ResponseCache(tmp_path, size * 3)
+    for n in (1, 2, 3):
+        cache.store(f"/x/{n}", {"etag": '"e"'}, "v" * 50)
+    cache.hit("/x/1")
+    cache.store("/x/4", {"etag": '"e"'}, "v" * 50)
+    assert cache.lookup("/x/2") is None
+    assert [cache.lookup(f"/x/{n}") is not None for n in (1, 3, 4)] == [True, True, True]
+    assert cache.stats()["evictions"] == 1
+    assert len(list(tmp_path.glob("*.json"))) == 3
+
+
+def test_responses_without_validators_are_not_stored(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path, 1 << 20)
+    cache.store("/x/1", {"link": "<next>"}, [1])
+    assert cache.lookup("/x/1") is None
+    cache.store("/x/2", {"last-modified": "Thu, 01 Jan 2026 00:00:00 GMT"}, [2])
+    entry = cache.lookup("/x/2")
+    assert entry is not None
+    assert ResponseCache.validators(entry) == {"If-Modified-Since": "Thu, 01 Jan 2026 00:00:00 GMT"}
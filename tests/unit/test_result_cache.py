@@ -0,0 +1,107 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from result_cache import REF_PREFIX, ResultCache, env_hash, sign, tree_hash
+
+
+def git(root: Path, *args: str) -> str:
+    return subprocess.run(["git", *args], cwd=root, text=True, capture_output=True, check=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    for key in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{key}_NAME", "test")
+        monkeypatch.setenv(f"GIT_{key}_EMAIL", "test@local.invalid")
+    root = tmp_path / "repo"
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "a.py").write_text("A = 1\n", encoding="utf-8")
+    (root / ".gitignore").write_text("*.log\n", encoding="utf-8")
+    git(tmp_path, "init", "--quiet", str(root))
+    git(root, "add", "-A")
+    git(root, "commit", "--quiet", "-m", "base")
+    return root
+
+
+def test_tree_hash_follows_the_working_tree(repo: Path) -> None:
+    clean = tree_hash(repo)
+    assert clean == git(repo, "rev-parse", "HEAD^{tree}")
+    (repo / "debug.log").write_text("ignored\n", encoding="utf-8")
+    assert tree_hash(repo) == clean
+    (repo / "src" / "a.py").write_text("A = 2\n", encoding="utf-8")
+    edited = tree_hash(repo)
+    assert edited != clean and tree_hash(repo) == edited
+    (repo / "src" / "b.py").write_text("B = 1\n", encoding="utf-8")
+    assert tree_hash(repo) not in (clean, edited)
+    (repo / "src" / "b.py").unlink()
+    (repo / "src" / "a.py").write_text("A = 1\n", encoding="utf-8")
+    assert tree_hash(repo) == clean
+    assert git(repo, "status", "--porcelain") == ""
+
+
+def test_env_hash_depends_only_on_declared_requirements(tmp_path: Path) -> None:
+    first = tmp_path / "a" / "requirements.txt"
+    second = tmp_path / "b" / "requirements.txt"
+    other = tmp_path / "c" / "requirements.txt"
+    for path, text in (
+        (first, "PyYAML>=6\npytest>=8\n"),
+        (second, "# comment\n--index-url https://example.invalid\npytest==8.*  # pinned\npyyaml\n"),
+        (other, "pytest>=8\n"),
+    ):
+        path.parent.mkdir()
+        path.write_text(text, encoding="utf-8")
+    env_hash.cache_clear()
+    assert env_hash(sys.executable, first) == env_hash(sys.executable, second)
+    assert env_hash(sys.executable, first) != env_hash(sys.executable, other)
+    assert len(env_hash(sys.executable, first)) == 16
+
+
+def summary(tree: str = "t" * 40, sel: str = "s" * 16, outcome: str = "passed") -> dict:
+    return {"tree": tree, "selection": sel, "outcome": outcome, "exit_code": 0}
+
+
+def test_signed_local_entry_round_trips(repo: Path, tmp_path: Path) -> None:
+    cache = ResultCache(repo, tmp_path / "cache", secret="k")
+    junit = tmp_path / "junit.xml"
+    junit.write_text("<testsuite tests='1'/>", encoding="utf-8")
+    cache.store(summary(), junit)
+    found = cache.lookup("t" * 40, "s" * 16)
+    assert found is not None
+    assert found[0]["signature"] == sign(summary(), "k")
+    assert found[1].read_text(encoding="utf-8") == "<testsuite tests='1'/>"
+    assert cache.lookup("t" * 40, "x" * 16) is None
+
+
+def test_tampered_local_entry_is_rejected(repo: Path, tmp_path: Path) -> None:
+    cache = ResultCache(repo, tmp_path / "cache", secret="k")
+    cache.store(summary(outcome="failed"), tmp_path / "missing.xml")
+    path = tmp_path / "cache" / ("t" * 40) / ("s" * 16) / "summary.json"
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["outcome"] = "passed"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    assert cache.lookup("t" * 40, "s" * 16) is None
+    assert ResultCache(repo, tmp_path / "cache", secret="other").lookup("t" * 40, "s" * 16) is None
+
+
+def test_remote_entries_need_a_valid_signature(repo: Path, tmp_path: Path) -> None:
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "--quiet", "--bare", str(remote))
+    git(repo, "remote", "add", "origin", str(remote))
+    tree = tree_hash(repo)
+    publisher = ResultCache(repo, tmp_path / "worker-cache", secret="k")
+    publisher.store(summary(tree), tmp_path / "missing.xml")
+    assert publisher.publish(tree) == [f"{REF_PREFIX}/{tree}/{'s' * 16}"]
+
+    found = ResultCache(repo, tmp_path / "ci-cache", secret="k").lookup(tree, "s" * 16)
+    assert found is not None and found[0]["outcome"] == "passed"
+    assert ResultCache(repo, tmp_path / "no-secret", secret="").lookup(tree, "s" * 16) is None
+
+    forger = ResultCache(repo, tmp_path / "forger", secret="wrong")
+    forger.store(summary(tree, sel="f" * 16), tmp_path / "missing.xml")
+    forger.publish(tree)
+    assert ResultCache(repo, tmp_path / "ci-cache", secret="k").lookup(tree, "f" * 16) is None
+    assert not (tmp_path / "ci-cache" / tree / ("f" * 16)).exists()
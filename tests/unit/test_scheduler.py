@@ -0,0 +1,82 @@
+import pytest
+
+from scheduler import WorkerScheduler, WorkerSlot
+
+
+def test_capacity_limits_assignments() -> None:
+    scheduler = WorkerScheduler(
+        {
+            "a": {"task_types": ["impl"], "max_concurrency": 2},
+            "b": {"task_types": ["impl"], "max_concurrency": 1},
+        }
+    )
+    names = [slot.name for slot in iter(lambda: scheduler.assign("impl"), None)]
+    assert sorted(names) == ["a", "a", "b"]
+    assert scheduler.assign("impl") is None
+    assert scheduler.report() == {"a": {"load": 2.0, "capacity": 2.0}, "b": {"load": 1.0, "capacity": 1.0}}
+
+
+def test_lowest_utilization_wins_and_ties_break_on_name() -> None:
+    scheduler = WorkerScheduler(
+        {
+            "b": {"task_types": ["impl"], "max_concurrency": 4},
+            "a": {"task_types": ["impl"], "max_concurrency": 4},
+            "c": {"task_types": ["impl"], "max_concurrency": 4, "weight": 2},
+        }
+    )
+    assert [scheduler.assign("impl").name for _ in range(4)] == ["c", "a", "b", "c"]
+
+
+def test_costs_consume_capacity_per_task_type() -> None:
+    scheduler = WorkerScheduler({"a": {"task_types": ["impl", "review"], "max_concurrency": 3, "costs": {"impl": 2}}})
+    assert scheduler.assign("impl") is not None
+    assert scheduler.assign("impl") is None
+    assert scheduler.assign("review") is not None
+    assert scheduler.assign("review") is None
+
+
+def test_occupy_and_release_adjust_capacity() -> None:
+    scheduler = WorkerScheduler({"a": {"task_types": ["impl"], "max_concurrency": 1}})
+    scheduler.occupy("a", "impl")
+    scheduler.occupy("unknown", "impl")
+    assert scheduler.assign("impl") is None
+    scheduler.release("a", "impl")
+    slot = scheduler.assign("impl")
+    assert slot is not None and slot.name == "a"
+    scheduler.release("a", "impl")
+    scheduler.release("a", "impl")
+    assert scheduler.slots["a"].load == 0.0
+
+
+def test_task_types_without_workers_are_not_eligible() -> None:
+    scheduler = WorkerScheduler({"a": {"task_types": ["impl"]}, "b": {}})
+    assert scheduler.eligible("impl")
+    assert not scheduler.eligible("docs")
+    assert scheduler.assign("docs") is None
+    assert scheduler.report()["a"]["capacity"] is None
+    assert scheduler.slots["b"].label == "worker/b"
+
+
+@pytest.mark.parametrize(
+    "conf",
+    [
+        {"weight": 0},
+        {"weight": -1},
+        {"weight": float("nan")},
+        {"weight": "heavy"},
+        {"max_concurrency": 0},
+        {"max_concurrency": -1},
+        {"max_concurrency": [2]},
+        {"costs": {"impl": 0}},
+        {"costs": {"impl": None}},
+        {"costs": ["impl"]},
+    ],
+)
+def test_invalid_worker_config_is_rejected(conf: dict) -> None:
+    with pytest.raises(ValueError, match="^workers.yaml: bad: "):
+        WorkerSlot.from_config("bad", conf)
+
+
+def test_null_fields_fall_back_to_defaults() -> None:
+    slot = WorkerSlot.from_config("w", {"weight": None, "max_concurrency": None, "costs": None, "task_types": None})
+    assert (slot.weight, slot.capacity, slot.costs, slot.task_types) == (1.0, float("inf"), {}, frozenset())
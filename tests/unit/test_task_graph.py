@@ -0,0 +1,73 @@
+from typing import Any
+
+from task_graph import TaskGraph
+
+
+def issue(number: int, task_id: str, depends_on: list[str] | None = None, state: str = "open", **meta: Any) -> dict[str, Any]:
+    lines = ["---", f"task_id: {task_id}", f"depends_on: [{', '.join(depends_on or [])}]"]
+    lines += [f"{key}: {value}" for key, value in meta.items()]
+    lines += ["---", "", "body"]
+    return {"number": number, "state": state, "labels": [], "body": "\n".join(lines)}
+
+
+def test_unmet_counts_open_and_missing_dependencies() -> None:
+    graph = TaskGraph.from_issues(
+        [
+            issue(1, "TASK-001"),
+            issue(2, "TASK-002", ["TASK-001"], state="closed"),
+            issue(3, "TASK-003", ["TASK-001", "TASK-002"]),
+            issue(4, "TASK-004", ["TASK-999"]),
+        ]
+    )
+    assert graph.unmet == {"TASK-001": 0, "TASK-002": 1, "TASK-003": 1, "TASK-004": 1}
+    assert graph.missing == {"TASK-004": ["TASK-999"]}
+    assert graph.is_unblocked("TASK-001")
+    assert not graph.is_unblocked("TASK-003")
+    assert not graph.is_unblocked("TASK-404")
+
+
+def test_mark_done_unblocks_direct_dependents_once() -> None:
+    graph = TaskGraph.from_issues(
+        [
+            issue(1, "TASK-001"),
+            issue(2, "TASK-002"),
+            issue(3, "TASK-003", ["TASK-001", "TASK-002"]),
+            issue(4, "TASK-004", ["TASK-003"]),
+        ]
+    )
+    assert graph.mark_done("TASK-001") == []
+    assert graph.mark_done("TASK-002") == ["TASK-003"]
+    assert graph.mark_done("TASK-002") == []
+    assert graph.unmet["TASK-003"] == 0
+    assert graph.unmet["TASK-004"] == 1
+    assert graph.mark_done("TASK-404") == []
+
+
+def test_find_cycles_reports_each_strongly_connected_component() -> None:
+    graph = TaskGraph.from_issues(
+        [
+            issue(1, "TASK-001", ["TASK-003"]),
+            issue(2, "TASK-002", ["TASK-001"]),
+            issue(3, "TASK-003", ["TASK-002"]),
+            issue(4, "TASK-004", ["TASK-004"]),
+            issue(5, "TASK-005", ["TASK-001", "TASK-006"]),
+            issue(6, "TASK-006", ["TASK-404"]),
+        ]
+    )
+    assert sorted(graph.find_cycles()) == [["TASK-001", "TASK-002", "TASK-003"], ["TASK-004"]]
+    assert graph.report()["missing_dependencies"] == {"TASK-006": ["TASK-404"]}
+
+
+def test_find_cycles_handles_long_chains_without_recursion() -> None:
+    count = 5000
+    issues = [issue(1, "TASK-00000")] + [issue(n + 1, f"TASK-{n:05d}", [f"TASK-{n - 1:05d}"]) for n in range(1, count)]
+    assert TaskGraph.from_issues(issues).find_cycles() == []
+    issues[0] = issue(1, "TASK-00000", [f"TASK-{count - 1:05d}"])
+    cycles = TaskGraph.from_issues(issues).find_cycles()
+    assert len(cycles) == 1 and len(cycles[0]) == count
+
+
+def test_issue_meta_covers_issues_without_task_id() -> None:
+    graph = TaskGraph.from_issues([issue(1, "TASK-001"), {"number": 2, "state": "open", "labels": [], "body": "plain"}])
+    assert set(graph.issue_meta) == {1, 2}
+    assert list(graph.nodes) == ["TASK-001"]
@@ -0,0 +1,141 @@
+import datetime as dt
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+import task_snapshot
+from task_graph import TaskGraph
+from task_snapshot import FULL_SYNC_INTERVAL, TaskSnapshotStore, _rest_shape
+
+REPO = "o/r"
+
+
+class FakeGraphQL:
+    """Serves TASK_ISSUES_QUERY pages of at most `page_size` nodes, honouring `since` and the cursor."""
+
+    def __init__(self, page_size: int = 2) -> None:
+        self.page_size = page_size
+        self.nodes: dict[int, dict[str, Any]] = {}
+        self.calls: list[dict[str, Any]] = []
+
+    def issue(self, number: int, updated: str, state: str = "OPEN", depends_on: str = "[]", labels: tuple[str, ...] = ("type/task",)) -> None:
+        self.nodes[number] = {
+            "number": number,
+            "title": f"Task {number}",
+            "body": f"---\ntask_id: TASK-{number:03d}\ndepends_on: {depends_on}\n---\n",
+            "state": state,
+            "updatedAt": updated,
+            "url": f"https://github.com/{REPO}/issues/{number}",
+            "labels": {"nodes": [{"name": name} for name in labels]},
+            "comments": {"nodes": [{"body": "dispatched"}]},
+        }
+
+    def __call__(self, path: str, method: str = "GET", payload: dict[str, Any] | None = None) -> Any:
+        assert path == "graphql" and method == "POST" and payload is not None
+        variables = payload["variables"]
+        self.calls.append(variables)
+        since = variables["since"] or ""
+        matching = [
+            node for _, node in sorted(self.nodes.items())
+            if "type/task" in [x["name"] for x in node["labels"]["nodes"]] and node["updatedAt"] >= since
+        ]
+        start = int(variables["cursor"] or 0)
+        page = matching[start : start + min(variables["pageSize"], self.page_size)]
+        end = start + len(page)
+        return {
+            "data": {
+                "repository": {
+                    "issues": {"pageInfo": {"hasNextPage": end < len(matching), "endCursor": str(end)}, "nodes": page}
+                }
+            }
+        }
+
+
+@pytest.fixture
+def github(monkeypatch: pytest.MonkeyPatch) -> FakeGraphQL:
+    fake = FakeGraphQL()
+    monkeypatch.setattr(task_snapshot, "gh_api", fake)
+    return fake
+
+
+def test_rest_shape_maps_graphql_fields() -> None:
+    github = FakeGraphQL()
+    github.issue(3, "2026-01-01T00:00:00Z", state="CLOSED", labels=("type/task", "status/done"))
+    assert _rest_shape(github.nodes[3]) == {
+        "number": 3,
+        "title": "Task 3",
+        "body": github.nodes[3]["body"],
+        "state": "closed",
+        "updated_at": "2026-01-01T00:00:00Z",
+        "html_url": f"https://github.com/{REPO}/issues/3",
+        "labels": [{"name": "type/task"}, {"name": "status/done"}],
+        "recent_comments": [{"body": "dispatched"}],
+    }
+    assert _rest_shape({"number": "4", "labels": None, "comments": {"nodes": None}})["labels"] == []
+
+
+def test_first_sync_is_full_and_pages_through_everything(tmp_path: Path, github: FakeGraphQL) -> None:
+    for n in range(1, 6):
+        github.issue(n, f"2026-01-01T00:0{n}:00Z")
+    store = TaskSnapshotStore(tmp_path, REPO)
+    issues = store.sync()
+    assert [x["number"] for x in issues] == [1, 2, 3, 4, 5]
+    assert store.stats == {"mode": "full", "fetched": 5, "total": 5, "watermark": "2026-01-01T00:05:00Z"}
+    assert [call["cursor"] for call in github.calls] == [None, "2", "4"]
+    assert all(call["since"] is None for call in github.calls)
+
+
+def test_incremental_sync_fetches_since_watermark(tmp_path: Path, github: FakeGraphQL) -> None:
+    github.issue(1, "2026-01-01T00:01:00Z")
+    github.issue(2, "2026-01-01T00:02:00Z", depends_on="[TASK-001]")
+    TaskSnapshotStore(tmp_path, REPO).sync()
+    github.calls.clear()
+
+    github.issue(1, "2026-01-01T00:10:00Z", state="CLOSED")
+    store = TaskSnapshotStore(tmp_path, REPO)
+    issues = store.sync()
+    assert github.calls[0]["since"] == "2026-01-01T00:02:00Z"
+    # `since` is inclusive, so the issue at the old watermark is fetched again.
+    assert store.stats == {"mode": "incremental", "fetched": 2, "total": 2, "watermark": "2026-01-01T00:10:00Z"}
+    assert [x["state"] for x in issues] == ["closed", "open"]
+    graph = TaskGraph.from_issues(issues)
+    assert graph.nodes["TASK-001"].done and graph.is_unblocked("TASK-002")
+
+    github.calls.clear()
+    assert TaskSnapshotStore(tmp_path, REPO).sync() == issues
+    assert github.calls[0]["since"] == "2026-01-01T00:10:00Z"
+
+
+def test_full_sync_after_interval_drops_issues_that_left_the_query(tmp_path: Path, github: FakeGraphQL) -> None:
+    github.issue(1, "2026-01-01T00:01:00Z")
+    github.issue(2, "2026-01-01T00:02:00Z")
+    TaskSnapshotStore(tmp_path, REPO).sync()
+    github.issue(2, "2026-01-01T00:03:00Z", labels=("question",))
+    store = TaskSnapshotStore(tmp_path, REPO)
+    assert [x["number"] for x in store.sync()] == [1, 2]
+    assert store.stats["mode"] == "incremental"
+
+    saved = json.loads(store.path.read_text(encoding="utf-8"))
+    stale = dt.datetime.now(dt.timezone.utc) - FULL_SYNC_INTERVAL - dt.timedelta(minutes=1)
+    saved["full_sync_at"] = stale.isoformat().replace("+00:00", "Z")
+    store.path.write_text(json.dumps(saved), encoding="utf-8")
+    store = TaskSnapshotStore(tmp_path, REPO)
+    assert [x["number"] for x in store.sync()] == [1]
+    assert store.stats["mode"] == "full"
+    assert store.watermark == "2026-01-01T00:01:00Z"
+
+
+def test_apply_keeps_watermark_and_comments(tmp_path: Path, github: FakeGraphQL) -> None:
+    github.issue(1, "2026-01-01T00:01:00Z")
+    github.issue(2, "2026-01-01T00:02:00Z")
+    store = TaskSnapshotStore(tmp_path, REPO)
+    store.sync()
+    rest_issue = {"number": 1, "state": "open", "updated_at": "2026-01-01T00:30:00Z", "labels": [{"name": "type/task"}], "body": "x"}
+    store.apply(rest_issue, comment="claimed")
+    assert store.issues[1]["recent_comments"] == [{"body": "dispatched"}, {"body": "claimed"}]
+    assert store.issues[1]["updated_at"] == "2026-01-01T00:30:00Z"
+    assert store.watermark == "2026-01-01T00:02:00Z"
+    store.apply({"number": 2, "state": "open", "labels": [{"name": "question"}]})
+    assert [x["number"] for x in store.task_issues()] == [1]
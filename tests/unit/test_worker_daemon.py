@@ -0,0 +1,117 @@
+import os
+import subprocess
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+import daemon
+from daemon import LEASE_TTL, Lease, WorkerDaemon
+
+
+def test_lease_is_exclusive_until_it_expires(tmp_path: Path) -> None:
+    path = tmp_path / "leases" / "7.lease"
+    first, second = Lease(path), Lease(path)
+    assert first.acquire()
+    assert not second.acquire()
+    first.touch()
+    assert not second.acquire()
+    old = time.time() - LEASE_TTL - 1
+    os.utime(path, (old, old))
+    assert second.acquire()
+    assert path.stat().st_mtime > old
+    second.release()
+    assert not path.exists()
+    second.release()
+    assert first.acquire()
+
+
+def issue(number: int, dispatch_id: str) -> dict[str, Any]:
+    body = f"---\ntask_id: TASK-{number:03d}\nstatus: in_progress\nowner_worker: w1\ndispatch_id: {dispatch_id}\n---\n"
+    return {"number": number, "state": "open", "body": body}
+
+
+class ScriptedDaemon(WorkerDaemon):
+    """Records started issues instead of running `run_task.py` and returns `outcome`."""
+
+    started: list[int]
+    outcome: dict[str, Any]
+
+    def _run_task(self, item: dict[str, Any]) -> dict[str, Any]:
+        self.started.append(int(item["number"]))
+        return self.outcome
+
+
+def make_daemon(root: Path, cache_dir: Path) -> ScriptedDaemon:
+    w = ScriptedDaemon(root, "o/r", "w1", concurrency=2, poll_interval=0, ai_mode="mock", run_id="test", cache_dir=cache_dir)
+    w.started = []
+    w.outcome = {"ok": True, "pr_number": 11}
+    return w
+
+
+@pytest.fixture
+def worker(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> ScriptedDaemon:
+    root = tmp_path / "repo"
+    subprocess.run(["git", "init", "--quiet", str(root)], check=True)
+    subprocess.run(["git", "-C", str(root), "remote", "add", "origin", "https://github.com/o/r.git"], check=True)
+    w = make_daemon(root, tmp_path / "cache")
+    monkeypatch.setattr(w.cache, "update", lambda: None)
+    monkeypatch.setattr(w.cache, "sync_workspace", lambda root, refs: None)
+    return w
+
+
+def settle(w: WorkerDaemon) -> None:
+    for _, future in list(w.running.values()):
+        future.result(timeout=5)
+    w._reap()
+
+
+def test_finished_dispatch_is_not_run_again(worker: ScriptedDaemon, monkeypatch: pytest.MonkeyPatch) -> None:
+    inbox = [issue(7, "d-1")]
+    monkeypatch.setattr(worker, "inbox", lambda: inbox)
+    assert worker.poll_once() == 1
+    settle(worker)
+    assert set(worker.done) == {"7:d-1"}
+    assert worker.poll_once() == 0
+    assert worker.started == [7]
+    assert not (worker.home / "leases" / "7.lease").exists()
+
+
+def test_redispatched_issue_runs_again(worker: ScriptedDaemon, monkeypatch: pytest.MonkeyPatch) -> None:
+    inbox = [issue(7, "d-1")]
+    monkeypatch.setattr(worker, "inbox", lambda: inbox)
+    worker.poll_once()
+    settle(worker)
+    inbox[0] = issue(7, "d-2")
+    assert worker.poll_once() == 1
+    settle(worker)
+    assert worker.started == [7, 7]
+    assert set(worker.done) == {"7:d-1", "7:d-2"}
+    reloaded = make_daemon(worker.root, worker.cache.path.parent)
+    assert set(reloaded.done) == {"7:d-1", "7:d-2"}
+
+
+def test_done_entries_are_forgotten_when_issue_leaves_inbox(worker: ScriptedDaemon, monkeypatch: pytest.MonkeyPatch) -> None:
+    inbox = [issue(7, "d-1"), issue(8, "d-1")]
+    monkeypatch.setattr(worker, "inbox", lambda: inbox)
+    worker.poll_once()
+    settle(worker)
+    assert set(worker.done) == {"7:d-1", "8:d-1"}
+    del inbox[0]
+    worker.poll_once()
+    assert set(worker.done) == {"8:d-1"}
+
+
+def test_failed_task_backs_off_and_leased_issue_is_skipped(worker: ScriptedDaemon, monkeypatch: pytest.MonkeyPatch) -> None:
+    worker.outcome = {"ok": False, "error": "boom"}
+    inbox = [issue(7, "d-1"), issue(8, "d-1")]
+    monkeypatch.setattr(worker, "inbox", lambda: inbox)
+    assert Lease(worker.home / "leases" / "8.lease").acquire()
+    assert worker.poll_once() == 1
+    settle(worker)
+    assert worker.done == {}
+    assert worker.failures[7] >= time.time() + daemon.RETRY_BACKOFF - 5
+    assert worker.poll_once() == 0
+    worker.failures[7] = 0.0
+    assert worker.poll_once() == 1
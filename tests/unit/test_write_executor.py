@@ -0,0 +1,122 @@
+import threading
+import time
+from typing import Any, Callable
+
+from common import GitHubAPIError, TransportError, WriteExecutor, _retryable, chain_error, chain_ok
+
+
+def flaky(failures: list[RuntimeError], value: Any = "ok") -> tuple[Callable[[], Any], list[int]]:
+    calls: list[int] = []
+
+    def func() -> Any:
+        calls.append(1)
+        if failures:
+            raise failures.pop(0)
+        return value
+
+    return func, calls
+
+
+def test_retryable_classifies_failures() -> None:
+    assert _retryable(GitHubAPIError("POST", "/x", 502, "bad gateway"), False)
+    assert _retryable(GitHubAPIError("POST", "/x", 429, "rate limited"), False)
+    assert not _retryable(GitHubAPIError("POST", "/x", 422, "invalid"), True)
+    assert not _retryable(GitHubAPIError("GET", "/x", 404, "missing"), True)
+    assert _retryable(TransportError("POST", "/x", "refused", sent=False), False)
+    assert _retryable(TransportError("GET", "/x", "reset", sent=True), False)
+    assert not _retryable(TransportError("POST", "/x", "reset", sent=True), False)
+    assert _retryable(TransportError("POST", "/x", "reset", sent=True), True)
+    assert not _retryable(RuntimeError("git push failed"), True)
+
+
+def test_transient_failure_is_retried() -> None:
+    executor = WriteExecutor(concurrency=2, retries=2, backoff=0)
+    func, calls = flaky([GitHubAPIError("POST", "/x", 503, "unavailable")], "done")
+    executor.add(1, "comment", func)
+    [result] = executor.run()[1]
+    assert result.ok and result.value == "done" and result.attempts == 2
+    assert len(calls) == 2
+
+
+def test_non_transient_failure_fails_fast() -> None:
+    executor = WriteExecutor(retries=3, backoff=0)
+    func, calls = flaky([GitHubAPIError("PATCH", "/x", 422, "invalid label")])
+    executor.add(1, "labels", func)
+    results = executor.run()[1]
+    assert not chain_ok(results)
+    assert "labels: " in chain_error(results) and "invalid label" in chain_error(results)
+    assert len(calls) == 1
+
+
+def test_retries_are_bounded() -> None:
+    executor = WriteExecutor(retries=2, backoff=0)
+    func, calls = flaky([GitHubAPIError("POST", "/x", 500, "boom") for _ in range(5)])
+    executor.add(1, "comment", func)
+    [result] = executor.run()[1]
+    assert not result.ok and result.attempts == 3
+    assert len(calls) == 3
+
+
+def test_verify_runs_before_retrying_a_sent_write() -> None:
+    executor = WriteExecutor(retries=3, backoff=0)
+    func, calls = flaky([TransportError("POST", "/x", "reset", sent=True)])
+    checks: list[int] = []
+
+    def landed() -> bool:
+        checks.append(1)
+        return True
+
+    executor.add(1, "comment", func, verify=landed)
+    [result] = executor.run()[1]
+    assert result.ok and result.value is None and result.attempts == 1
+    assert len(calls) == 1 and len(checks) == 1
+
+
+def test_write_is_retried_when_verify_finds_nothing() -> None:
+    executor = WriteExecutor(retries=3, backoff=0)
+    func, calls = flaky([TransportError("POST", "/x", "reset", sent=True)], "created")
+    executor.add(1, "comment", func, verify=lambda: False)
+    [result] = executor.run()[1]
+    assert result.ok and result.value == "created" and result.attempts == 2
+    assert len(calls) == 2
+
+
+def test_unverifiable_sent_write_is_not_retried() -> None:
+    executor = WriteExecutor(retries=3, backoff=0)
+    func, calls = flaky([TransportError("POST", "/x", "reset", sent=True)])
+    executor.add(1, "comment", func)
+    [result] = executor.run()[1]
+    assert not result.ok and len(calls) == 1
+
+
+def test_chain_runs_in_order_and_stops_at_first_failure() -> None:
+    executor = WriteExecutor(concurrency=4, retries=0, backoff=0)
+    order: list[str] = []
+
+    def step(name: str, fail: bool = False) -> Callable[[], str]:
+        def func() -> str:
+            time.sleep(0.01 if name == "a" else 0)
+            order.append(name)
+            if fail:
+                raise GitHubAPIError("POST", "/x", 422, "rejected")
+            return name
+
+        return func
+
+    executor.add(7, "a", step("a"))
+    executor.add(7, "b", step("b", fail=True))
+    executor.add(7, "c", step("c"))
+    results = executor.run()[7]
+    assert order == ["a", "b"]
+    assert [(r.op, r.ok) for r in results] == [("a", True), ("b", False)]
+
+
+def test_distinct_keys_run_concurrently() -> None:
+    executor = WriteExecutor(concurrency=3, retries=0, backoff=0)
+    barrier = threading.Barrier(3, timeout=5)
+    for key in range(3):
+        executor.add(key, "wait", barrier.wait)
+    results = executor.run()
+    assert sorted(results) == [0, 1, 2]
+    assert all(chain_ok(chain) for chain in results.values())
+    assert executor.run() == {}